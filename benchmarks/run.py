@@ -0,0 +1,428 @@
+"""
+Benchmarks of fansly-utils commands against a local fake fansly.com API
+
+Every command runs in a separate process, so its peak RSS isn't affected by other commands or
+by the fake server itself. Results are written as JSON and can be compared with a previous run:
+
+    python benchmarks/run.py --sizes 100 1000 10000 -o baseline.json
+    python benchmarks/run.py --sizes 100 1000 10000 -o current.json --compare baseline.json
+"""
+
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from rich.console import Console
+from rich.table import Table
+
+from fansly_utils import FanslyApi
+from fansly_utils.cmd import (
+    PaymentsProcessor,
+    backup,
+    generate_html,
+    process_payments,
+    restore,
+    update_accounts,
+    wipe,
+)
+from fansly_utils.fakeserver import FakeBehavior, FakeDataset, FakeFanslyServer
+from fansly_utils.ratelimit import RateLimiter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+SCHEMA_VERSION: int = 1
+
+DEFAULT_SIZES: list[int] = [100, 1000]
+DEFAULT_RATE: float = 1000.0
+DEFAULT_BURST: float = 100.0
+DEFAULT_THRESHOLD: float = 0.1
+
+# Metrics that are compared between runs, the lower the better.
+METRICS: list[str] = ["wallTime", "requests", "sleep", "peakRss", "outputSize"]
+
+
+def _dataset(size: int) -> FakeDataset:
+    """Scale a synthetic account that follows `size` creators."""
+    return FakeDataset(
+        accounts=size * 2,
+        following=size,
+        followers=max(size // 10, 1),
+        lists=max(size // 100, 1),
+        list_items=min(size, 500),
+        chats=max(size // 20, 1),
+        messages=size * 10,
+        collections=3,
+        collection_items=max(size // 10, 1),
+        notifications=max(size // 10, 1),
+        payments=size,
+        sessions=5,
+    )
+
+
+#
+# Commands
+#
+
+
+def _backup(api: FanslyApi, logger: logging.Logger, workdir: Path) -> Path:
+    backup(api, logger, workdir / "backup.json", False)
+    return workdir / "backup.json"
+
+
+def _update_accounts(api: FanslyApi, logger: logging.Logger, workdir: Path) -> Path:
+    update_accounts(api, logger, workdir / "backup.json")
+    return workdir / "backup.json"
+
+
+def _generate_html(api: FanslyApi, logger: logging.Logger, workdir: Path) -> Path:
+    generate_html(workdir / "backup.json")
+    return workdir / "backup.html"
+
+
+def _process_payments(api: FanslyApi, logger: logging.Logger, workdir: Path) -> None:
+    for processor in PaymentsProcessor:
+        process_payments(workdir / "backup.json", processor)
+
+
+def _restore(api: FanslyApi, logger: logging.Logger, workdir: Path) -> None:
+    restore(api, logger, workdir / "backup.json")
+
+
+def _wipe(api: FanslyApi, logger: logging.Logger, workdir: Path) -> Path:
+    wipe(api, logger, workdir / "wiped.txt", True)
+    return workdir / "wiped.txt"
+
+
+# The order matters, because commands depend on results of previous ones.
+COMMANDS: dict[str, Callable[[FanslyApi, logging.Logger, Path], Path | None]] = {
+    "backup": _backup,
+    "update_accounts": _update_accounts,
+    "generate_html": _generate_html,
+    "process_payments": _process_payments,
+    "restore": _restore,
+    "wipe": _wipe,
+}
+
+
+def _peak_rss() -> int | None:
+    """Return the peak resident set size of the current process in bytes."""
+    if resource is None:
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _run_command(
+    command: str, base_url: str, workdir: str, rate: float, burst: float, jobs: int
+) -> dict[str, Any]:
+    logging.basicConfig(level=logging.ERROR)
+    logger = logging.getLogger("benchmark")
+
+    api = FanslyApi(
+        authorization_token="benchmark",
+        user_agent="fansly-utils-benchmark",
+        rate_limiter=RateLimiter(rate=rate, burst=burst),
+        workers=jobs,
+        base_url=base_url,
+    )
+
+    # Analytics commands print their reports, which is not what we want to measure.
+    with api, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        output = COMMANDS[command](api, logger, Path(workdir))
+        wall_time = time.perf_counter() - start
+
+    phases = api.stats()["rate_limiter"]["phases"].values()
+    return {
+        "wallTime": wall_time,
+        "sleep": sum(p["sleep"] for p in phases),
+        "throttled": sum(p["throttled"] for p in phases),
+        "peakRss": _peak_rss(),
+        "outputSize": output.stat().st_size if output and output.exists() else None,
+    }
+
+
+#
+# Runner
+#
+
+
+def _diff_requests(before: dict, after: dict) -> dict[str, int]:
+    result: dict[str, int] = {}
+    for endpoint, count in after["requests"].items():
+        if delta := count - before["requests"].get(endpoint, 0):
+            result[endpoint] = delta
+    return dict(sorted(result.items()))
+
+
+def _run_size(size: int, commands: list[str], args) -> list[dict[str, Any]]:
+    behavior = FakeBehavior(latency=args.latency, throttle_ratio=args.throttle_ratio)
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as workdir, FakeFanslyServer(
+        _dataset(size), behavior
+    ) as server:
+        results: list[dict[str, Any]] = []
+        for command in commands:
+            before = server.stats()
+            try:
+                with context.Pool(1) as pool:
+                    result = pool.apply(
+                        _run_command,
+                        (command, server.base_url, workdir, args.rate, args.burst, args.jobs),
+                    )
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+            after = server.stats()
+
+            requests = _diff_requests(before, after)
+            results.append(
+                {
+                    "command": command,
+                    "size": size,
+                    **result,
+                    "requests": sum(requests.values()),
+                    "requestsByEndpoint": requests,
+                    # The server counts bytes from its side.
+                    "bytesIn": after["bytesOut"] - before["bytesOut"],
+                    "bytesOut": after["bytesIn"] - before["bytesIn"],
+                }
+            )
+
+            # Commands depend on each other, so there's no point to continue.
+            if "error" in result:
+                break
+
+        return results
+
+
+def _merge_repeats(runs: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """Pick a run with the median wall time for every case."""
+    cases: dict[tuple[str, int], list[dict]] = {}
+    for run in runs:
+        for result in run:
+            cases.setdefault((result["command"], result["size"]), []).append(result)
+
+    merged: list[dict[str, Any]] = []
+    for results in cases.values():
+        ok = [r for r in results if "error" not in r]
+        if not ok:
+            merged.append(results[0])
+            continue
+
+        ok.sort(key=lambda r: r["wallTime"])
+        median = dict(ok[(len(ok) - 1) // 2])
+        median["wallTimes"] = [r["wallTime"] for r in ok]
+        median["wallTimeStdev"] = statistics.stdev(median["wallTimes"]) if len(ok) > 1 else 0.0
+        merged.append(median)
+
+    return merged
+
+
+def _git_revision() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run(args) -> dict[str, Any]:
+    commands = args.commands or list(COMMANDS)
+    commands = [c for c in COMMANDS if c in commands]
+
+    runs: list[list[dict[str, Any]]] = []
+    for _ in range(args.repeat):
+        run_results: list[dict[str, Any]] = []
+        for size in args.sizes:
+            run_results.extend(_run_size(size, commands, args))
+        runs.append(run_results)
+
+    return {
+        "version": SCHEMA_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "revision": _git_revision(),
+        },
+        "settings": {
+            "rate": args.rate,
+            "burst": args.burst,
+            "jobs": args.jobs,
+            "latency": args.latency,
+            "throttleRatio": args.throttle_ratio,
+            "repeat": args.repeat,
+        },
+        "results": _merge_repeats(runs),
+    }
+
+
+#
+# Reporting
+#
+
+
+def _format(metric: str, value: Any) -> str:
+    if value is None:
+        return "-"
+    if metric in ("wallTime", "sleep"):
+        return f"{value:.3f}s"
+    if metric in ("peakRss", "outputSize"):
+        units = ["B", "KiB", "MiB", "GiB"]
+        while value >= 1024 and len(units) > 1:
+            value /= 1024
+            units.pop(0)
+        return f"{value:.1f}{units[0]}"
+    return str(value)
+
+
+def _print_results(console: Console, report: dict[str, Any]) -> None:
+    table = Table("command", "size", *METRICS, title="Results")
+    for result in report["results"]:
+        if "error" in result:
+            row = [f"[red]{result['error']}[/red]"] + [""] * (len(METRICS) - 1)
+        else:
+            row = [_format(m, result.get(m)) for m in METRICS]
+        table.add_row(result["command"], str(result["size"]), *row)
+
+    console.print(table)
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """
+    Compare two reports
+
+    :return: a list of regressions that are bigger than `threshold` ratio.
+    """
+    baseline_results = {(r["command"], r["size"]): r for r in baseline["results"]}
+
+    regressions: list[str] = []
+    for result in current["results"]:
+        old = baseline_results.get((result["command"], result["size"]))
+        if not old or "error" in old:
+            continue
+
+        if "error" in result:
+            regressions.append(f"{result['command']}[{result['size']}]: {result['error']}")
+            continue
+
+        for metric in METRICS:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+
+            # Sleeps can be zero, let's not report 0.001s --> 0.002s as a 100% regression.
+            if new_value > old_value * (1 + threshold) and new_value - old_value > 0.01:
+                regressions.append(
+                    f"{result['command']}[{result['size']}] {metric}: "
+                    f"{_format(metric, old_value)} --> {_format(metric, new_value)}"
+                )
+
+    return regressions
+
+
+def _print_comparison(console: Console, current: dict[str, Any], baseline: dict[str, Any]) -> None:
+    baseline_results = {(r["command"], r["size"]): r for r in baseline["results"]}
+
+    table = Table("command", "size", *METRICS, title="Compared to the baseline")
+    for result in current["results"]:
+        old = baseline_results.get((result["command"], result["size"]))
+        if not old or "error" in old or "error" in result:
+            continue
+
+        row: list[str] = []
+        for metric in METRICS:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                row.append("-")
+            elif old_value == 0:
+                row.append("=" if new_value == 0 else "+inf")
+            else:
+                change = (new_value - old_value) / old_value
+                color = "red" if change > 0 else "green"
+                row.append(f"[{color}]{change:+.1%}[/{color}]")
+
+        table.add_row(result["command"], str(result["size"]), *row)
+
+    console.print(table)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Benchmark fansly-utils commands against a local fake fansly.com API.",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Amounts of followed accounts."
+    )
+    parser.add_argument(
+        "--commands", nargs="+", choices=list(COMMANDS), help="Commands to run, all by default."
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Run every case this many times.")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Amount of worker threads.")
+    parser.add_argument(
+        "--rate", type=float, default=DEFAULT_RATE, help="Initial requests per second."
+    )
+    parser.add_argument(
+        "--burst", type=float, default=DEFAULT_BURST, help="Rate limiter burst size."
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Fake server latency in seconds."
+    )
+    parser.add_argument(
+        "--throttle-ratio", type=float, default=0.0, help="A share of random 429 responses."
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Write results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Compare results with this JSON file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fail if any metric grows more than this ratio compared to the baseline.",
+    )
+    args = parser.parse_args()
+
+    console = Console(stderr=True)
+    report = run(args)
+    _print_results(console, report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=4), encoding="utf-8")
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        _print_comparison(console, report, baseline)
+
+        if regressions := compare(report, baseline, args.threshold):
+            for regression in regressions:
+                console.print(f"[red]Regression:[/red] {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
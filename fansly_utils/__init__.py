@@ -1 +1,4 @@
-from .api import FanslyApi, chunks, offset  # noqa: F401
+from .aio import AsyncFanslyApi, AsyncPaginator, aoffset  # noqa: F401
+from .api import FanslyApi, Paginator, chunks, fan_out, offset  # noqa: F401
+from .ids import IdSet  # noqa: F401
+from .records import Account, Chat, CollectionItem, Message, Note, Payment, UserList  # noqa: F401
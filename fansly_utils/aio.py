@@ -0,0 +1,739 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+from aiohttp import ClientSession, TCPConnector
+from requests import PreparedRequest, Response
+from requests.exceptions import HTTPError
+from requests.structures import CaseInsensitiveDict
+
+from .api import (
+    BASE_URL,
+    DEFAULT_LIMIT_VALUE,
+    DEFAULT_MAX_CONCURRENCY,
+    USER_INFO_TTL,
+    Paginator,
+    _body_size,
+    _get_accounts_params,
+    _get_chats_params,
+    _get_collection_data,
+    _get_headers,
+    _get_list_commands,
+    _parse_accounts,
+    _parse_chats,
+    _parse_collection_items,
+    _parse_collections,
+    _parse_lists,
+    _parse_messages,
+    _parse_payments,
+    _prepare_params,
+    _process_response,
+)
+from .cache import DEFAULT_TTL, DiskCache, ResponseCache
+from .codec import dumps
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .records import Account, Chat, CollectionItem, Message, Payment, UserList
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+__all__ = ["AsyncFanslyApi", "AsyncPaginator", "aoffset"]
+
+
+P = TypeVar("P")
+R = TypeVar("R")
+
+
+class _AsyncSession:
+    def __init__(
+        self,
+        authorization_token: str,
+        user_agent: str,
+        rate_limiter: RateLimiter | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache: ResponseCache | None = None,
+        disk_cache: DiskCache | None = None,
+        base_url: str = BASE_URL,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self._headers = _get_headers(authorization_token, user_agent)
+        self._base_url = base_url
+        self._max_concurrency = max_concurrency
+
+        self._logger = logging.getLogger("FanslyAPI")
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self._cache = cache or ResponseCache()
+        self._disk_cache = disk_cache
+        self._metrics = metrics or Metrics()
+
+        self._client: ClientSession | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def logger(self) -> "Logger":
+        return self._logger
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    async def open(self) -> None:
+        if self._client:
+            return
+
+        # NOTE(obsessedcake): Both objects are bound to the running event loop.
+        self._client = ClientSession(
+            headers=self._headers, connector=TCPConnector(limit=self._max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+    async def close(self) -> None:
+        if self._client:
+            await self._client.close()
+            self._client = None
+
+    async def _acquire(self, url: str) -> float:
+        slept = 0.0
+        wait = self._rate_limiter.reserve(url)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            slept += wait
+
+            # The bucket might be blocked by a 429 response while we were sleeping.
+            wait = self._rate_limiter.delay(url)
+
+        return slept
+
+    async def _send(self, method: str, url: str, params: dict, data: Any) -> Response:
+        self._metrics.record_sleep(method, url, await self._acquire(url))
+
+        payload = dumps(data) if data is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else None
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            async with self._client.request(
+                method, url, params=params, data=payload, headers=headers
+            ) as r:
+                body = await r.read()
+            latency = time.perf_counter() - start
+
+        self._metrics.record(
+            method,
+            url,
+            status=r.status,
+            latency=latency,
+            bytes_in=len(body),
+            bytes_out=_body_size(payload),
+        )
+
+        # NOTE(obsessedcake): Mimic requests' response to share error handling and parsing.
+        request = PreparedRequest()
+        request.method = method
+        request.url = str(r.url)
+        request.body = payload
+
+        response = Response()
+        response.status_code = r.status
+        response.reason = r.reason
+        response.headers = CaseInsensitiveDict(r.headers)
+        response.url = str(r.url)
+        response.request = request
+        response._content = body
+        return response
+
+    async def request(
+        self, method: str, url: str, *, params: dict | None = None, json: Any = None
+    ) -> Response:
+        await self.open()
+
+        # aiohttp accepts only strings and numbers as query values.
+        params = {k: str(v) for k, v in _prepare_params(params).items()}
+        joined_url = self._base_url + url
+
+        if self._disk_cache:
+            if response := self._disk_cache.get(method, url, params):
+                self._metrics.record_cached(method, url)
+                return response
+
+        while True:
+            response = await self._send(method, joined_url, params, json)
+
+            delay = self._rate_limiter.feedback(joined_url, response.status_code, response.headers)
+            if delay is None:
+                break
+
+            self._logger.warning(
+                "Faced rate-limiter! Retrying in %s minutes and %s seconds.",
+                *divmod(round(delay), 60),
+            )
+
+        if self._disk_cache:
+            self._disk_cache.put(method, url, params, response)
+
+        if method.upper() != "GET":
+            self._cache.invalidate(url)
+            if self._disk_cache:
+                self._disk_cache.invalidate(url)
+
+        return response
+
+    async def get(self, url: str, *, params: dict | None = None) -> Response:
+        return await self.request("GET", url, params=params)
+
+    async def post(self, url: str, *, json: Any = None) -> Response:
+        return await self.request("POST", url, json=json)
+
+    async def get_json(
+        self, url: str, params: dict | None = None, *, ttl: float | None = None
+    ) -> list[dict] | dict:
+        if ttl:
+            key = self._cache.key(url, params)
+            if (cached := self._cache.get(key, None)) is not None:
+                self._metrics.record_cached("GET", url)
+                return cached
+
+        response = await self.get(url, params=params)
+        result = _process_response(self._logger, response)
+
+        if ttl:
+            self._cache.put(key, result, ttl)
+
+        return result
+
+    async def post_json(self, url: str, json: dict | None = None) -> list[dict] | dict:
+        response = await self.post(url, json=json)
+        return _process_response(self._logger, response)
+
+
+class AsyncPaginator(Paginator[P]):
+    """An asyncio flavour of `Paginator` that prefetches the next page in a separate task."""
+
+    def __init__(self, callable: Callable[[dict], Awaitable[P]], **kwargs) -> None:
+        super().__init__(callable, **kwargs)  # type: ignore[arg-type]
+
+    async def __aiter__(self) -> AsyncIterator[P]:
+        task: asyncio.Task | None = None
+        try:
+            kwargs = self._first()
+            page = await self._callable(kwargs)
+
+            while size := self._count(page):
+                is_last = self._stop_on_short_page and size < self._limit
+                if not is_last:
+                    kwargs = self._next(kwargs, page)
+                    if self._prefetch:
+                        task = asyncio.ensure_future(self._callable(kwargs))
+
+                yield page
+
+                if is_last:
+                    break
+                page = await task if task else await self._callable(kwargs)
+                task = None
+        finally:
+            if task:
+                task.cancel()
+
+
+def aoffset(
+    callable: Callable[[dict], Awaitable[list]], limit: int = DEFAULT_LIMIT_VALUE
+) -> AsyncPaginator[list]:
+    return AsyncPaginator(callable, limit=limit)
+
+
+class AsyncFanslyApi:
+    """
+    An asyncio flavour of `FanslyApi`
+
+    Requests are sent over a single pooled connection with at most `max_concurrency` of them
+    being in flight at once. Pass the rate limiter of a `FanslyApi` instance to share its budget.
+    """
+
+    def __init__(
+        self,
+        *,
+        authorization_token: str,
+        user_agent: str,
+        rate_limiter: RateLimiter | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache: ResponseCache | None = None,
+        disk_cache: DiskCache | None = None,
+        base_url: str = BASE_URL,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self._session = _AsyncSession(
+            authorization_token,
+            user_agent,
+            rate_limiter=rate_limiter,
+            max_concurrency=max_concurrency,
+            cache=cache,
+            disk_cache=disk_cache,
+            base_url=base_url,
+            metrics=metrics,
+        )
+
+    async def __aenter__(self) -> "AsyncFanslyApi":
+        await self._session.open()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._session.close()
+
+    def accounts(self) -> "_AsyncFanslyAccountsApi":
+        return _AsyncFanslyAccountsApi(self._session)
+
+    def chats(self) -> "_AsyncFanslyChatsApi":
+        return _AsyncFanslyChatsApi(self._session)
+
+    def collections(self) -> "_AsyncFanslyCollectionsApi":
+        return _AsyncFanslyCollectionsApi(self._session)
+
+    def lists(self) -> "_AsyncFanslyListsApi":
+        return _AsyncFanslyListsApi(self._session)
+
+    def notes(self) -> "_AsyncFanslyNotesApi":
+        return _AsyncFanslyNotesApi(self._session)
+
+    def posts(self) -> "_AsyncFanslyPostsApi":
+        return _AsyncFanslyPostsApi(self._session)
+
+    def user(self) -> "_AsyncFanslyUserApi":
+        return _AsyncFanslyUserApi(self, self._session)
+
+    def sessions(self) -> "_AsyncFanslySessionsApi":
+        return _AsyncFanslySessionsApi(self._session)
+
+
+class _AsyncRunner:
+    """
+    Run coroutines of a single AsyncFanslyApi on an event loop in a background thread
+
+    The loop and the connection pool are created once and reused by every `run` call, which can
+    be made from any thread.
+    """
+
+    def __init__(self, api: AsyncFanslyApi) -> None:
+        self._api = api
+        self._loop = asyncio.new_event_loop()
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, name="fansly-aio", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while not self._closed:
+            try:
+                self._loop.run_forever()
+            except (KeyboardInterrupt, SystemExit):
+                # A task has raised KeyboardInterrupt or SystemExit, which asyncio lets out of the
+                # loop. The task keeps it for its caller, so the loop has to go on.
+                pass
+
+    def run(self, func: Callable[[AsyncFanslyApi], Awaitable[R]]) -> R:
+        tasks: list[asyncio.Task] = []
+        # The loop runs in its own thread, so `func` has to be run in the caller's context.
+        context = contextvars.copy_context()
+
+        async def _run() -> R:
+            task = context.run(asyncio.ensure_future, func(self._api))
+            tasks.append(task)
+            return await task
+
+        async def _cancel() -> None:
+            # It's scheduled after `_run`, so the latter has already started.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        future = asyncio.run_coroutine_threadsafe(_run(), self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            # E.g. on KeyboardInterrupt nothing should keep running behind the caller's back.
+            asyncio.run_coroutine_threadsafe(_cancel(), self._loop).result()
+            raise
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._api.close(), self._loop).result()
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+#
+# Fansly - Account API
+#
+
+
+class _AsyncFanslyAccountsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    async def get(
+        self, *, account_id: str | None = None, username: str | None = None, brief: bool = False
+    ) -> Account | dict | None:
+        if not account_id and not username:
+            return {}
+
+        if account_id:
+            params = {"accounts_ids": [account_id]}
+        else:
+            params = {"usernames": [username]}
+
+        response = await self.get_batch(**params, brief=brief)
+        return response[0] if response else None
+
+    async def get_batch(
+        self,
+        *,
+        accounts_ids: Iterable[str] | None = None,
+        usernames: Iterable[str] | None = None,
+        brief: bool = False,
+    ) -> list[Account] | list[dict]:
+        if not accounts_ids and not usernames:
+            return []
+
+        params = _get_accounts_params(accounts_ids, usernames)
+        response = await self._session.get_json("/account", params=params)
+        return _parse_accounts(response, brief)
+
+
+#
+# Fansly - Messages API
+#
+
+
+class _AsyncFanslyChatsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    def messages(self) -> "_AsyncFanslyChatMessagesApi":
+        return _AsyncFanslyChatMessagesApi(self._session)
+
+    async def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[Chat]:
+        params = _get_chats_params(limit, offset)
+        response = await self._session.get_json("/messaging/groups", params=params)
+        return _parse_chats(response)
+
+
+class _AsyncFanslyChatMessagesApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    async def get_batch(
+        self,
+        *,
+        chat_id: str,
+        oldest_msg_id: str = "0",
+        limit: int = DEFAULT_LIMIT_VALUE,
+        brief: bool = False,
+    ) -> list[Message] | list[dict]:
+        params = {
+            "before": oldest_msg_id,
+            "groupId": chat_id,
+            "limit": limit,
+        }
+
+        try:
+            response = await self._session.get_json("/message", params=params)
+        except HTTPError as e:
+            if e.response.status_code == 500:  # dead account
+                return []
+
+            raise
+
+        return _parse_messages(response, brief)
+
+    async def delete(self, *, message_id: str) -> None:
+        await self._session.post("/message/delete", json={"messageId": message_id})
+
+
+#
+# Fansly - Collections API
+#
+
+
+class _AsyncFanslyCollectionsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    def items(self) -> "_AsyncFanslyCollectionItemsApi":
+        return _AsyncFanslyCollectionItemsApi(self._session)
+
+    async def get_all(self, *, brief: bool = False) -> list[dict[str, Any]]:
+        response = await self._session.get_json("/uservault/albumsnew")
+        return _parse_collections(response, brief)
+
+    async def create(self, *, title: str, description: str = "") -> str:
+        data = _get_collection_data(title, description)
+        return (await self._session.post_json("/uservault/albums", json=data))["id"]
+
+    async def delete(self, *, collection_id: str) -> None:
+        await self._session.post("/uservault/album/delete", json={"albumId": collection_id})
+
+
+class _AsyncFanslyCollectionItemsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    async def get_batch(
+        self, *, collection_id: str, oldest_id: str = "0", limit: int = DEFAULT_LIMIT_VALUE
+    ) -> list[CollectionItem]:
+        params = {
+            "albumId": collection_id,
+            "before": oldest_id,
+            "after": 0,
+            "limit": limit,
+        }
+        response = await self._session.get_json("/uservault/album/content", params=params)
+        return _parse_collection_items(response)
+
+    async def delete(self, *, collection_id: str, items_ids: list[str] | str) -> None:
+        data = {
+            "albumId": collection_id,
+            "albumContentIds": [items_ids] if isinstance(items_ids, str) else items_ids,
+        }
+        await self._session.post("/uservault/album/content/delete", json=data)
+
+
+#
+# Fansly - Lists API
+#
+
+
+class _AsyncFanslyListsApi:
+    def __init__(self, session: _AsyncSession) -> None:
+        self._session = session
+
+    def items(self) -> "_AsyncFanslyListItemsApi":
+        return _AsyncFanslyListItemsApi(self._session)
+
+    async def get_all(self, *, only_ids: bool = True) -> list[UserList] | list[str]:
+        response = await self._session.get_json(
+            "/lists/account", params={"itemId": ""}, ttl=DEFAULT_TTL
+        )
+        return _parse_lists(response, only_ids)
+
+    async def create(self, label: str, description: str = "") -> str:
+        data = {"label": label, "description": description}
+        return (await self._session.post_json("/lists", json=data))["id"]
+
+    async def delete(self, list_id: str | None) -> None:
+        await self._session.post("/lists/remove", json={"listId": list_id})
+
+
+class _AsyncFanslyListItemsApi:
+    def __init__(self, session: _AsyncSession) -> None:
+        self._session = session
+
+    async def get_all(self, list_id: str) -> list[str]:
+        response = await self._session.get_json(
+            "/lists/items", params={"listId": list_id}, ttl=DEFAULT_TTL
+        )
+        return [obj["id"] for obj in response]
+
+    async def add(self, list_id: str, *, accounts_ids: list[str] | str) -> None:
+        if not accounts_ids:
+            return
+
+        commands = _get_list_commands(list_id, accounts_ids)
+        await self._session.post_json("/lists/commands", json={"listCommands": commands})
+
+    async def delete(self, list_id: str, *, accounts_ids: list[str] | str) -> None:
+        if not accounts_ids:
+            return
+
+        data = {
+            "listId": list_id,
+            "listItemIds": [accounts_ids] if isinstance(accounts_ids, str) else accounts_ids,
+        }
+        await self._session.post("/lists/items/remove", json=data)
+
+
+#
+# Fansly - Notes API
+#
+
+
+class _AsyncFanslyNotesApi:
+    def __init__(self, session: _AsyncSession) -> None:
+        self._session = session
+
+    async def add(self, *, account_id: str, title: str, data: str) -> str:
+        data = {
+            "contentId": account_id,
+            "contentType": 12000,
+            "title": title,
+            "data": data,
+        }
+        return (await self._session.post_json("/notes", json=data))["id"]
+
+    async def delete(self, *, account_id: str, note_id: str) -> None:
+        data = {
+            "contentId": account_id,
+            "contentType": 12000,
+            "id": note_id,
+        }
+        await self._session.post("/notes/delete", json=data)
+
+
+#
+# Fansly - Posts API
+#
+
+
+class _AsyncFanslyPostsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    async def get(self, *, post_id: str) -> dict[str, Any] | None:
+        response = await self._session.get_json("/post", params={"ids": post_id})
+
+        posts = response["posts"]
+        if not posts:
+            return None
+
+        return posts[0]
+
+    async def get_batch(self, *, posts_ids: list[str]) -> list[dict[str, Any]]:
+        if not posts_ids:
+            return []
+
+        response = await self._session.get_json("/post", params={"ids": posts_ids})
+        return response["posts"]
+
+    async def delete(self, *, post_id: str) -> None:
+        await self._session.post(f"/post/{post_id}/delete")
+
+
+#
+# Fansly - Sessions API
+#
+
+
+class _AsyncFanslySessionsApi:
+    def __init__(self, session: _AsyncSession):
+        self._session = session
+
+    async def get_batch(
+        self,
+        *,
+        oldest_session_id: str = "0",
+        limit: int = DEFAULT_LIMIT_VALUE,
+        only_ids: bool = True,
+    ) -> list[str]:
+        params = {
+            "before": oldest_session_id,
+            "limit": limit,
+            "status": "0, 2",
+        }
+        response = await self._session.get_json("/sessions", params=params)
+
+        if only_ids:
+            return [obj["id"] for obj in response]
+
+        return response
+
+    async def close(self, *, session_id: str) -> None:
+        await self._session.post_json("/session/close", json={"id": session_id})
+
+
+#
+# Fansly - User API
+#
+
+
+class _AsyncFanslyUserApi:
+    def __init__(self, root_api: AsyncFanslyApi, session: _AsyncSession):
+        self._root_api = root_api
+        self._session = session
+
+    async def id(self) -> str:
+        return (await self._session.get_json("/account/me", ttl=USER_INFO_TTL))["account"]["id"]
+
+    async def name(self) -> str:
+        response = await self._session.get_json("/account/me", ttl=USER_INFO_TTL)
+        return response["account"]["username"]
+
+    def followers(self) -> "_AsyncFanslyUserFollowersApi":
+        return _AsyncFanslyUserFollowersApi(self._root_api, self._session)
+
+    def following(self) -> "_AsyncFanslyUserFollowingApi":
+        return _AsyncFanslyUserFollowingApi(self._root_api, self._session)
+
+    def payments(self) -> "_AsyncFanslyUserPaymentsApi":
+        return _AsyncFanslyUserPaymentsApi(self._session)
+
+
+class _AsyncFanslyUserFollowersApi:
+    def __init__(self, root_api: AsyncFanslyApi, session: _AsyncSession) -> None:
+        self._root_api = root_api
+        self._session = session
+
+    async def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[str]:
+        user_id = await self._root_api.user().id()
+        params = {
+            "before": 0,
+            "after": 0,
+            "limit": limit,
+            "offset": offset,
+            "search": "",
+        }
+        response = await self._session.get_json(f"/account/{user_id}/followers", params=params)
+        return [obj["followerId"] for obj in response]
+
+
+class _AsyncFanslyUserFollowingApi:
+    def __init__(self, root_api: AsyncFanslyApi, session: _AsyncSession) -> None:
+        self._root_api = root_api
+        self._session = session
+
+    async def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[str]:
+        user_id = await self._root_api.user().id()
+        params = {
+            "before": 0,
+            "after": 0,
+            "limit": limit,
+            "offset": offset,
+        }
+        response = await self._session.get_json(f"/account/{user_id}/following", params=params)
+        return [obj["accountId"] for obj in response]
+
+    async def follow(self, account_id: str) -> None:
+        await self._session.post(f"/account/{account_id}/followers")
+
+    async def unfollow(self, account_id: str) -> None:
+        await self._session.post(f"/account/{account_id}/followers/remove")
+
+
+class _AsyncFanslyUserPaymentsApi:
+    def __init__(self, session: _AsyncSession) -> None:
+        self._session = session
+
+    async def get_batch(
+        self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0
+    ) -> list[Payment]:
+        params = {
+            "before": 0,
+            "after": 0,
+            "limit": limit,
+            "offset": offset,
+        }
+        response = await self._session.get_json("/account/wallets/transactions", params=params)
+        return _parse_payments(self._session.logger, response)
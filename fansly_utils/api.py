@@ -1,113 +1,239 @@
-import json
 import logging
-import random
+import threading
 import time
+import weakref
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager
+from contextvars import copy_context
 from itertools import islice
-from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    TypeVar,
+)
 
 from requests import Session
 from requests.exceptions import HTTPError
 
+from .cache import DEFAULT_TTL, DiskCache, ResponseCache
+from .codec import loads, loads_response
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .records import Account, Chat, CollectionItem, Message, Payment, UserList
+
 if TYPE_CHECKING:
     from logging import Logger
 
     from requests import Response
 
-__all__ = ["FanslyApi", "chunks", "offset"]
+    from .aio import AsyncFanslyApi, _AsyncRunner
+
+__all__ = ["FanslyApi", "Paginator", "chunks", "fan_out", "offset"]
 
 
 DEFAULT_CHUNK_SIZE: int = 10
 DEFAULT_LIMIT_VALUE: int = 25
+DEFAULT_MAX_CONCURRENCY: int = 8
+DEFAULT_WORKERS_COUNT: int = 4
+
+USER_INFO_TTL: float = 60.0 * 60
+
+BASE_URL: str = "https://apiv3.fansly.com/api/v1"
+
+
+#
+# Session
+#
+
+
+def _get_headers(authorization_token: str, user_agent: str) -> dict[str, str]:
+    return {
+        "Accept": "application/json, text/plain, */*",
+        "Referer": "https://fansly.com/",
+        "accept-language": "en-US,en;q=0.9",
+        "authorization": authorization_token,
+        "User-Agent": user_agent,
+    }
+
+
+def _prepare_params(params: dict | None) -> dict:
+    # Some Angular stuff (https://angular.io/guide/service-worker-devops)
+    if params:
+        params["ngsw-bypass"] = True
+    else:
+        params = {"ngsw-bypass": True}
+
+    # The server side expects a comma separated list.
+    for k, v in params.items():
+        if isinstance(v, (list, tuple, set)):
+            params[k] = ",".join(map(str, v))
+
+    return params
+
+
+def _log_response(logger: "Logger", response: "Response", is_error: bool = False) -> None:
+    req = response.request
+    level = logging.ERROR if is_error else logging.DEBUG
+
+    if req.body:
+        body = req.body.decode("utf-8", "replace") if isinstance(req.body, bytes) else req.body
+        logger.log(level, "%s %s %s", req.method, req.url, body)
+    else:
+        logger.log(level, "%s %s", req.method, req.url)
+
+
+def _body_size(body: bytes | str | None) -> int:
+    if body is None:
+        return 0
+    return len(body.encode("utf-8") if isinstance(body, str) else body)
+
+
+def _process_response(logger: "Logger", response: "Response") -> list[dict] | dict:
+    try:
+        response.raise_for_status()
+        if logger.level == logging.DEBUG:
+            _log_response(logger, response)
+    except HTTPError:
+        _log_response(logger, response, is_error=True)
+        logger.error("Request has failed with %s status: %s", response.status_code, response.text)
+        raise
+
+    return loads_response(response)["response"]
 
 
 # https://stackoverflow.com/questions/42601812
 class _Session(Session):
-    def __init__(self, authorization_token: str, user_agent: str) -> None:
+    def __init__(
+        self,
+        authorization_token: str,
+        user_agent: str,
+        rate_limiter: RateLimiter | None = None,
+        disk_cache: DiskCache | None = None,
+        base_url: str = BASE_URL,
+        metrics: Metrics | None = None,
+    ) -> None:
         super().__init__()
-        self.headers.update(
-            {
-                "Accept": "application/json, text/plain, */*",
-                "Referer": "https://fansly.com/",
-                "accept-language": "en-US,en;q=0.9",
-                "authorization": authorization_token,
-                "User-Agent": user_agent,
-            }
-        )
+        self.headers.update(_get_headers(authorization_token, user_agent))
 
+        self._base_url = base_url
         self._logger = logging.getLogger("FanslyAPI")
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self._cache = ResponseCache()
+        self._disk_cache = disk_cache
+        self._metrics = metrics or Metrics()
         self._urls_cache: dict[str, str] = {}
 
     @property
     def logger(self) -> "Logger":
         return self._logger
 
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache
+
+    @property
+    def disk_cache(self) -> DiskCache | None:
+        return self._disk_cache
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._rate_limiter
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
     def invoke_rate_limited(self, callback: Callable) -> Any:
         while True:
             try:
                 return callback()
             except HTTPError as e:
-                if e.response.status_code != 429:
+                if e.response is None or e.response.status_code != 429:
                     raise
 
-                secs = random.uniform(60, 60 * 4)  # to avoid rate limiter
+                # NOTE(obsessedcake): The rate limiter has already learned from this response,
+                # so the next request will wait as long as needed.
+                secs = self._rate_limiter.delay(e.response.url)
                 self.logger.warning(
-                    "Faced rate-limiter! Sleeping for the next %s minutes and %s seconds.",
+                    "Faced rate-limiter! Retrying in %s minutes and %s seconds.",
                     *divmod(round(secs), 60),
                 )
-                time.sleep(secs)
 
-    def request(self, method, url, *args, **kwargs):
-        # Some Angular stuff (https://angular.io/guide/service-worker-devops)
-        if params := kwargs.get("params"):
-            params["ngsw-bypass"] = True
-        else:
-            kwargs["params"] = {"ngsw-bypass": True}
+    def _send(self, method: str, url: str, *args, **kwargs) -> "Response":
+        self._metrics.record_sleep(method, url, self._rate_limiter.acquire(url))
+
+        start = time.perf_counter()
+        response = super().request(method, url, *args, **kwargs)
+        self._metrics.record(
+            method,
+            url,
+            status=response.status_code,
+            latency=time.perf_counter() - start,
+            bytes_in=len(response.content),
+            bytes_out=_body_size(response.request.body),
+        )
+
+        if self._rate_limiter.feedback(url, response.status_code, response.headers) is not None:
+            raise HTTPError("429 Too Many Requests", response=response)
 
-        # The server side expects a comma separated list.
-        for k, v in kwargs["params"].items():
-            if isinstance(v, (list, tuple, set)):
-                kwargs["params"][k] = ",".join(map(str, v))
+        return response
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs["params"] = _prepare_params(kwargs.get("params"))
 
         # Cache a full version of the url.
         joined_url = self._urls_cache.get(url)
         if not joined_url:
-            joined_url = "https://apiv3.fansly.com/api/v1" + url
+            joined_url = self._base_url + url
             self._urls_cache[url] = joined_url
 
-        return super().request(method, joined_url, *args, **kwargs)
+        if self._disk_cache:
+            if response := self._disk_cache.get(method, url, kwargs["params"]):
+                self._metrics.record_cached(method, url)
+                return response
 
-    def get_json(self, url: str | bytes, params: dict | None = None) -> list[dict] | dict:
-        response = self.get(url, params=params)
-        return self._process_response(response)
+        response = self.invoke_rate_limited(lambda: self._send(method, joined_url, *args, **kwargs))
 
-    def post_json(self, url: str | bytes, json: dict | None = None) -> list[dict] | dict:
-        response = self.post(url, json=json)
-        return self._process_response(response)
+        if self._disk_cache:
+            self._disk_cache.put(method, url, kwargs["params"], response)
 
-    def _log_response(self, response: "Response", is_error: bool = False) -> None:
-        req = response.request
-        level = logging.ERROR if is_error else logging.DEBUG
+        if method.upper() != "GET":
+            self._cache.invalidate(url)
+            if self._disk_cache:
+                self._disk_cache.invalidate(url)
 
-        if req.body:
-            self._logger.log(level, "%s %s %s", req.method, req.url, json.dumps(req.body))
-        else:
-            self._logger.log(level, "%s %s", req.method, req.url)
+        return response
 
-    def _process_response(self, response: "Response") -> list[dict] | dict:
-        try:
-            response.raise_for_status()
-            if self._logger.level == logging.DEBUG:
-                self._log_response(response)
-        except HTTPError:
-            self._log_response(response, is_error=True)
-            self._logger.error(
-                "Request has failed with %s status: %s", response.status_code, response.text
-            )
-            raise
-        else:
-            time.sleep(random.uniform(0.75, 1.25))  # to avoid rate limiter
+    def get_json(
+        self, url: str | bytes, params: dict | None = None, *, ttl: float | None = None
+    ) -> list[dict] | dict:
+        """
+        Get a parsed response
+
+        :param ttl: cache the response for the given number of seconds.
+        """
+        if ttl:
+            key = self._cache.key(url, params)
+            if (cached := self._cache.get(key, None)) is not None:
+                self._metrics.record_cached("GET", url)
+                return cached
+
+        response = self.get(url, params=params)
+        result = _process_response(self._logger, response)
+
+        if ttl:
+            self._cache.put(key, result, ttl)
 
-        return response.json()["response"]
+        return result
+
+    def post_json(self, url: str | bytes, json: dict | None = None) -> list[dict] | dict:
+        response = self.post(url, json=json)
+        return _process_response(self._logger, response)
 
 
 # https://stackoverflow.com/questions/312443
@@ -117,20 +243,221 @@ def chunks(iterable: Iterable, size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple
     return iter(lambda: tuple(islice(it, size)), ())
 
 
-def offset(callable: Callable, limit: int = DEFAULT_LIMIT_VALUE) -> Any:
-    offset = 0
-    while True:
-        r = callable(dict(limit=limit, offset=offset))
-        if not r:
-            break
+T = TypeVar("T")
+R = TypeVar("R")
+P = TypeVar("P")
+
+
+class Paginator(Generic[P]):
+    """
+    An iterator over pages of a paged endpoint
 
-        yield r
-        offset += DEFAULT_LIMIT_VALUE
+    `callable` gets a dict with `limit` and either `offset` or, if `cursor` is given, `before`
+    keyword arguments of the page. A cursor of the next page is extracted from the current one.
+    `start` is either the first offset or the first cursor.
+
+    The next page is requested in the background as soon as the current one has been received, so
+    its fetching overlaps with whatever the caller does with the current page. Iteration stops on
+    an empty page or, unless `stop_on_short_page` is disabled, on a page shorter than `limit`.
+    """
+
+    def __init__(
+        self,
+        callable: Callable[[dict], P],
+        *,
+        limit: int = DEFAULT_LIMIT_VALUE,
+        cursor: Callable[[P], Any] | None = None,
+        start: Any = "0",
+        count: Callable[[P], int] = len,
+        stop_on_short_page: bool = True,
+        prefetch: bool = True,
+    ) -> None:
+        self._callable = callable
+        self._limit = limit
+        self._cursor = cursor
+        self._start = start
+        self._count = count
+        self._stop_on_short_page = stop_on_short_page
+        self._prefetch = prefetch
+
+    def _first(self) -> dict[str, Any]:
+        if self._cursor:
+            return {"limit": self._limit, "before": self._start}
+        return {"limit": self._limit, "offset": int(self._start)}
+
+    def _next(self, kwargs: dict[str, Any], page: P) -> dict[str, Any]:
+        if self._cursor:
+            return {"limit": self._limit, "before": self._cursor(page)}
+        return {"limit": self._limit, "offset": kwargs["offset"] + self._limit}
+
+    def __iter__(self) -> Iterator[P]:
+        executor = ThreadPoolExecutor(max_workers=1) if self._prefetch else None
+        try:
+            kwargs = self._first()
+            page = self._callable(kwargs)
+
+            while size := self._count(page):
+                is_last = self._stop_on_short_page and size < self._limit
+                if not is_last:
+                    kwargs = self._next(kwargs, page)
+                    if executor:
+                        future = executor.submit(copy_context().run, self._callable, kwargs)
+
+                yield page
+
+                if is_last:
+                    break
+                page = future.result() if executor else self._callable(kwargs)
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+
+def offset(
+    callable: Callable[[dict], list],
+    limit: int = DEFAULT_LIMIT_VALUE,
+    *,
+    start: int = 0,
+    stop_on_short_page: bool = True,
+) -> Paginator[list]:
+    "offset(lambda kwarg: api.chats().get_batch(**kwarg)) --> [chat, ...], [chat, ...], ..."
+    return Paginator(callable, limit=limit, start=start, stop_on_short_page=stop_on_short_page)
+
+
+def fan_out(
+    callable: Callable[[T], R], iterable: Iterable[T], *, workers: int = DEFAULT_WORKERS_COUNT
+) -> list[R]:
+    """
+    fan_out(f, ['a', 'b', 'c']) --> [f('a'), f('b'), f('c')]
+
+    Calls are made from a pool of `workers` threads, but results are returned in the input order.
+    The first failed call cancels all calls that haven't been started yet and its error is raised.
+    """
+    items = list(iterable)
+    if workers <= 1 or len(items) <= 1:
+        return [callable(item) for item in items]
+
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(items)))
+    try:
+        # Each call gets a copy of the caller's context, e.g. to be accounted to its phase.
+        futures = [executor.submit(copy_context().run, callable, item) for item in items]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+
+        for future in futures:
+            if future in done and future.exception():
+                raise future.exception()
+
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 class FanslyApi:
-    def __init__(self, *, authorization_token: str, user_agent: str) -> None:
-        self._session = _Session(authorization_token, user_agent)
+    def __init__(
+        self,
+        *,
+        authorization_token: str,
+        user_agent: str,
+        rate_limiter: RateLimiter | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        workers: int = DEFAULT_WORKERS_COUNT,
+        disk_cache: DiskCache | None = None,
+        base_url: str = BASE_URL,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self._authorization_token = authorization_token
+        self._user_agent = user_agent
+        self._base_url = base_url
+        self._max_concurrency = max_concurrency
+        self._workers = workers
+        self._session = _Session(
+            authorization_token,
+            user_agent,
+            rate_limiter=rate_limiter,
+            disk_cache=disk_cache,
+            base_url=base_url,
+            metrics=metrics,
+        )
+
+        self._runner: "_AsyncRunner | None" = None
+        self._runner_finalizer: weakref.finalize | None = None
+        self._runner_lock = threading.Lock()
+
+    def __enter__(self) -> "FanslyApi":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the event loop of `run` calls and close its connections."""
+        with self._runner_lock:
+            if self._runner_finalizer:
+                self._runner_finalizer()
+            self._runner = self._runner_finalizer = None
+
+    @property
+    def workers(self) -> int:
+        """A number of threads to be used by `fan_out` calls."""
+        return self._workers
+
+    @property
+    def max_concurrency(self) -> int:
+        """A number of requests that `aio` flavour of this API sends at once."""
+        return self._max_concurrency
+
+    def aio(self) -> "AsyncFanslyApi":
+        """Get an asyncio flavour of this API that shares the same rate limiter and cache."""
+        from .aio import AsyncFanslyApi
+
+        return AsyncFanslyApi(
+            authorization_token=self._authorization_token,
+            user_agent=self._user_agent,
+            rate_limiter=self._session.rate_limiter,
+            max_concurrency=self._max_concurrency,
+            cache=self._session.cache,
+            disk_cache=self._session.disk_cache,
+            base_url=self._base_url,
+            metrics=self._session.metrics,
+        )
+
+    def run(self, func: Callable[["AsyncFanslyApi"], Awaitable[T]]) -> T:
+        """
+        Call `func` with an asyncio flavour of this API and wait for its result
+
+        All calls share a single event loop and connection pool, which are kept until `close`.
+        """
+        from .aio import _AsyncRunner
+
+        with self._runner_lock:
+            if not self._runner:
+                self._runner = _AsyncRunner(self.aio())
+                # Connections are closed even if the caller forgets about `close`.
+                self._runner_finalizer = weakref.finalize(self, self._runner.close)
+            runner = self._runner
+
+        return runner.run(func)
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._session.metrics
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        return self._session.rate_limiter
+
+    def phase(self, name: str) -> AbstractContextManager[None]:
+        """Attribute all rate limiter sleeps made inside of this context to `name` phase."""
+        return self._session.rate_limiter.phase(name)
+
+    def stats(self) -> dict[str, Any]:
+        result = {
+            "cache": self._session.cache.stats(),
+            "rate_limiter": self._session.rate_limiter.stats(),
+        }
+        if self._session.disk_cache:
+            result["disk_cache"] = self._session.disk_cache.stats()
+        return result
 
     def accounts(self) -> "_FanslyAccountsApi":
         return _FanslyAccountsApi(self._session)
@@ -165,13 +492,32 @@ class FanslyApi:
 #
 
 
+def _get_accounts_params(
+    accounts_ids: Iterable[str] | None, usernames: Iterable[str] | None
+) -> dict[str, Iterable[str]]:
+    if accounts_ids:
+        return {"ids": accounts_ids}
+    else:
+        return {"usernames": usernames}
+
+
+def _parse_accounts(response: list[dict], brief: bool) -> list[Account] | list[dict]:
+    if not response:
+        return []
+
+    if not brief:
+        return response
+
+    return [Account.from_response(account_info) for account_info in response]
+
+
 class _FanslyAccountsApi:
     def __init__(self, session: _Session):
         self._session = session
 
     def get(
         self, *, account_id: str | None = None, username: str | None = None, brief: bool = False
-    ) -> dict:
+    ) -> Account | dict | None:
         """
         Get account information
 
@@ -193,7 +539,7 @@ class _FanslyAccountsApi:
         accounts_ids: Iterable[str] | None,
         usernames: Iterable[str] | None,
         brief: bool,
-    ) -> list[dict]:
+    ) -> list[Account] | list[dict]:
         """
         Get accounts information in a batch
 
@@ -202,40 +548,9 @@ class _FanslyAccountsApi:
         if not accounts_ids and not usernames:
             return []
 
-        if accounts_ids:
-            params = {"ids": accounts_ids}
-        else:
-            params = {"usernames": usernames}
-
+        params = _get_accounts_params(accounts_ids, usernames)
         response = self._session.get_json("/account", params=params)
-        if not response:
-            return []
-
-        if not brief:
-            return response
-
-        result: list[dict] = []
-        for account_info in response:
-            notes_info: list[dict] = []
-            for note_info in account_info.get("notes", []):
-                notes_info.append(
-                    {
-                        "id": note_info["id"],
-                        "title": note_info["title"],
-                        "data": note_info["note"],
-                        "createdAt": note_info["createdAt"],
-                        "updatedAt": note_info["updatedAt"],
-                    }
-                )
-            result.append(
-                {
-                    "id": account_info["id"],
-                    "username": account_info["username"],
-                    "displayName": account_info.get("displayName"),
-                    "notes": notes_info,
-                }
-            )
-        return result
+        return _parse_accounts(response, brief)
 
     def get_batch(
         self,
@@ -243,10 +558,8 @@ class _FanslyAccountsApi:
         accounts_ids: Iterable[str] | None = None,
         usernames: Iterable[str] | None = None,
         brief: bool = False,
-    ) -> list[dict]:
-        return self._session.invoke_rate_limited(
-            lambda: self._get_batch(accounts_ids, usernames, brief)
-        )
+    ) -> list[Account] | list[dict]:
+        return self._get_batch(accounts_ids, usernames, brief)
 
 
 #
@@ -254,6 +567,30 @@ class _FanslyAccountsApi:
 #
 
 
+def _get_chats_params(limit: int, offset: int) -> dict[str, Any]:
+    return {
+        "flags": 0,
+        "limit": limit,
+        "offset": offset,
+        "search": "",
+        "sortOrder": 1,  # newest
+        "subscriptionTierId": "",  # all
+    }
+
+
+def _parse_chats(response: dict) -> list[Chat]:
+    return [Chat.from_response(group_info) for group_info in response.get("data", [])]
+
+
+def _parse_messages(response: dict, brief: bool) -> list[Message] | list[dict]:
+    messages = response["messages"]
+
+    if not brief:
+        return messages
+
+    return [Message.from_response(message) for message in messages]
+
+
 class _FanslyChatsApi:
     def __init__(self, session: _Session):
         self._session = session
@@ -261,28 +598,10 @@ class _FanslyChatsApi:
     def messages(self) -> "_FanslyChatMessagesApi":
         return _FanslyChatMessagesApi(self._session)
 
-    def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[dict]:
-        params = {
-            "flags": 0,
-            "limit": limit,
-            "offset": offset,
-            "search": "",
-            "sortOrder": 1,  # newest
-            "subscriptionTierId": "",  # all
-        }
-
+    def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[Chat]:
+        params = _get_chats_params(limit, offset)
         response = self._session.get_json("/messaging/groups", params=params)
-
-        result: list[dict] = []
-        for group_info in response.get("data", []):
-            result.append(
-                {
-                    "id": group_info["groupId"],
-                    "partnerAccountId": group_info["partnerAccountId"],
-                    "partnerUsername": group_info["partnerUsername"],
-                }
-            )
-        return result
+        return _parse_chats(response)
 
 
 class _FanslyChatMessagesApi:
@@ -296,7 +615,7 @@ class _FanslyChatMessagesApi:
         oldest_msg_id: str = "0",
         limit: int = DEFAULT_LIMIT_VALUE,
         brief: bool = False,
-    ) -> list[str]:
+    ) -> list[Message] | list[dict]:
         params = {
             "before": oldest_msg_id,
             "groupId": chat_id,
@@ -311,16 +630,7 @@ class _FanslyChatMessagesApi:
 
             raise
 
-        messages = response["messages"]
-
-        if not brief:
-            messages
-
-        result = []
-        for message in messages:
-            result.append({"id": message["id"], "senderId": message["senderId"]})
-
-        return result
+        return _parse_messages(response, brief)
 
     def delete(self, *, message_id: str) -> None:
         self._session.post("/message/delete", json={"messageId": message_id})
@@ -331,6 +641,40 @@ class _FanslyChatMessagesApi:
 #
 
 
+def _parse_collections(response: dict, brief: bool) -> list[dict[str, Any]]:
+    if not brief:
+        return response
+
+    result: list[dict[str, Any]] = []
+    for obj in response["albums"]:
+        result.append({"id": obj["id"], "title": obj["title"], "type": obj["type"]})
+
+    return result
+
+
+def _get_collection_data(title: str, description: str) -> dict[str, Any]:
+    return {
+        "accountId": None,
+        "description": description,
+        "id": None,
+        "public": 0,
+        "thumbnailId": None,
+        "title": title,
+        "type": 0,
+    }
+
+
+def _parse_collection_items(response: dict) -> list[CollectionItem]:
+    result: dict[str, CollectionItem] = {}
+    for obj in response["albumContent"]:
+        result[obj["mediaId"]] = CollectionItem(obj["id"])
+
+    for obj in response["aggregationData"]["accountMedia"]:
+        result[obj["mediaId"]].account_id = obj["accountId"]
+
+    return list(result.values())
+
+
 class _FanslyCollectionsApi:
     def __init__(self, session: _Session):
         self._session = session
@@ -340,27 +684,11 @@ class _FanslyCollectionsApi:
 
     def get_all(self, *, brief: bool = False) -> list[dict[str, Any]]:
         response = self._session.get_json("/uservault/albumsnew")
-
-        if not brief:
-            return response
-
-        result: list[dict[str, Any]] = []
-        for obj in response["albums"]:
-            result.append({"id": obj["id"], "title": obj["title"], "type": obj["type"]})
-
-        return result
+        return _parse_collections(response, brief)
 
     def create(self, *, title: str, description: str = "") -> str:
-        data = {
-            "accountId": None,
-            "description": description,
-            "id": None,
-            "public": 0,
-            "thumbnailId": None,
-            "title": title,
-            "type": 0,
-        }
-        self._session.post_json("/uservault/albums", json=data)["id"]
+        data = _get_collection_data(title, description)
+        return self._session.post_json("/uservault/albums", json=data)["id"]
 
     def delete(self, *, collection_id: str) -> None:
         self._session.post("/uservault/album/delete", json={"albumId": collection_id})
@@ -372,7 +700,7 @@ class _FanslyCollectionItemsApi:
 
     def get_batch(
         self, *, collection_id: str, oldest_id: str = "0", limit: int = DEFAULT_LIMIT_VALUE
-    ) -> list[dict[str, Any]]:
+    ) -> list[CollectionItem]:
         params = {
             "albumId": collection_id,
             "before": oldest_id,
@@ -380,15 +708,7 @@ class _FanslyCollectionItemsApi:
             "limit": limit,
         }
         response = self._session.get_json("/uservault/album/content", params=params)
-
-        result: dict[str, dict[str, Any]] = {}
-        for obj in response["albumContent"]:
-            result[obj["mediaId"]] = {"id": obj["id"]}
-
-        for obj in response["aggregationData"]["accountMedia"]:
-            result[obj["mediaId"]]["accountId"] = obj["accountId"]
-
-        return list(result.values())
+        return _parse_collection_items(response)
 
     def delete(self, *, collection_id: str, items_ids: list[str] | str) -> None:
         data = {
@@ -403,6 +723,28 @@ class _FanslyCollectionItemsApi:
 #
 
 
+def _parse_lists(response: list[dict], only_ids: bool) -> list[UserList] | list[str]:
+    if only_ids:
+        return [obj["id"] for obj in response]
+
+    return [UserList.from_response(list_info) for list_info in response]
+
+
+def _get_list_commands(list_id: str, accounts_ids: list[str] | str) -> list[dict]:
+    commands: list[dict] = []
+    for account_id in [accounts_ids] if isinstance(accounts_ids, str) else accounts_ids:
+        commands.append(
+            {
+                "listItem": {
+                    "id": account_id,
+                    "listId": list_id,
+                },
+                "type": 1,
+            }
+        )
+    return commands
+
+
 class _FanslyListsApi:
     def __init__(self, root_api: FanslyApi, session: _Session) -> None:
         self._root_api = root_api
@@ -411,31 +753,19 @@ class _FanslyListsApi:
     def items(self) -> "_FanslyListItemsApi":
         return _FanslyListItemsApi(self._session)
 
-    def get_all(self, *, only_ids: bool = True) -> list[dict] | list[str]:
+    def get_all(self, *, only_ids: bool = True) -> list[UserList] | list[str]:
         """
         Get all user lists
 
         **UI path:** Account -> Lists.
         """
 
-        response = self._session.get_json("/lists/account", params={"itemId": ""})
-
-        if only_ids:
-            return [obj["id"] for obj in response]
-
-        result: list[dict] = []
-        for list_info in response:
-            result.append(
-                {
-                    "id": list_info["id"],
-                    "label": list_info["label"],
-                }
-            )
-        return result
+        response = self._session.get_json("/lists/account", params={"itemId": ""}, ttl=DEFAULT_TTL)
+        return _parse_lists(response, only_ids)
 
     def create(self, label: str, description: str = "") -> str:
         data = {"label": label, "description": description}
-        self._session.post_json("/lists", json=data)["id"]
+        return self._session.post_json("/lists", json=data)["id"]
 
     def delete(self, list_id: str | None) -> None:
         self._session.post("/lists/remove", json={"listId": list_id})
@@ -451,25 +781,16 @@ class _FanslyListItemsApi:
 
         **UI path:** Account -> Lists -> <List Name>.
         """
-        response = self._session.get_json("/lists/items", params={"listId": list_id})
+        response = self._session.get_json(
+            "/lists/items", params={"listId": list_id}, ttl=DEFAULT_TTL
+        )
         return [obj["id"] for obj in response]
 
     def add(self, list_id: str, *, accounts_ids: list[str] | str) -> None:
         if not accounts_ids:
             return
 
-        commands: list[dict] = []
-        for account_id in [accounts_ids] if isinstance(accounts_ids, str) else accounts_ids:
-            commands.append(
-                {
-                    "listItem": {
-                        "id": account_id,
-                        "listId": list_id,
-                    },
-                    "type": 1,
-                }
-            )
-
+        commands = _get_list_commands(list_id, accounts_ids)
         self._session.post_json("/lists/commands", json={"listCommands": commands})
 
     def delete(self, list_id: str, *, accounts_ids: list[str] | str) -> None:
@@ -529,7 +850,7 @@ class _FanslyNotesApi:
             "title": title,
             "data": data,
         }
-        self._session.post_json("/notes", json=data)["id"]
+        return self._session.post_json("/notes", json=data)["id"]
 
     def delete(self, *, account_id: str, note_id: str) -> None:
         data = {
@@ -561,6 +882,14 @@ class _FanslyPostsApi:
 
         return posts[0]
 
+    def get_batch(self, *, posts_ids: list[str]) -> list[dict[str, Any]]:
+        """Get existing posts out of the given ones, deleted posts are silently skipped."""
+        if not posts_ids:
+            return []
+
+        response = self._session.get_json("/post", params={"ids": posts_ids})
+        return response["posts"]
+
     def delete(self, *, post_id: str) -> None:
         self._session.post(f"/post/{post_id}/delete")
 
@@ -608,13 +937,13 @@ class _FanslyUserApi:
         self._session = session
 
     def id(self) -> str:
-        return self._session.get_json("/account/me")["account"]["id"]
+        return self._session.get_json("/account/me", ttl=USER_INFO_TTL)["account"]["id"]
 
     def name(self) -> str:
-        return self._session.get_json("/account/me")["account"]["username"]
+        return self._session.get_json("/account/me", ttl=USER_INFO_TTL)["account"]["username"]
 
     def followers(self) -> "_FanslyUserFollowersApi":
-        return _FanslyUserFollowersApi(self._session)
+        return _FanslyUserFollowersApi(self._root_api, self._session)
 
     def following(self) -> "_FanslyUserFollowingApi":
         return _FanslyUserFollowingApi(self._root_api, self._session)
@@ -664,15 +993,44 @@ class _FanslyUserFollowingApi:
         self._session.post(f"/account/{account_id}/followers")
 
     def unfollow(self, account_id: str):
-        url = f"/account/{account_id}/followers/remove"
-        self._session.invoke_rate_limited(lambda: self._session.post(url))
+        self._session.post(f"/account/{account_id}/followers/remove")
+
+
+def _parse_payments(logger: "Logger", response: dict) -> list[Payment]:
+    result: list[Payment] = []
+    for obj in response["data"]:
+        transaction_id = obj["transactionId"]
+        logger.debug("Processing payment with %s transaction id", transaction_id)
+
+        product_order = obj.get("productOrder")
+        if not product_order:  # it's a balance purchase
+            continue
+
+        items = product_order["items"]
+        assert len(items) == 1
+        items = items[0]
+
+        metadata = items.get("metadata")
+        if not metadata:  # it's a tip
+            account_id = items["productId"]
+        else:  # it's a paid something
+            metadata = loads(metadata)
+            account_id = metadata.get("accountId")
+            if not account_id:
+                account_id = metadata["authorId"]  # it's a locked text
+
+        result.append(
+            Payment(transaction_id, account_id, product_order["createdAt"], items["productPrice"])
+        )
+
+    return result
 
 
 class _FanslyUserPaymentsApi:
     def __init__(self, session: _Session) -> None:
         self._session = session
 
-    def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[dict]:
+    def get_batch(self, *, limit: int = DEFAULT_LIMIT_VALUE, offset: int = 0) -> list[Payment]:
         params = {
             "before": 0,
             "after": 0,
@@ -680,39 +1038,7 @@ class _FanslyUserPaymentsApi:
             "offset": offset,
         }
         response = self._session.get_json("/account/wallets/transactions", params=params)
-
-        result: list[dict] = []
-        for obj in response["data"]:
-            transaction_id = obj["transactionId"]
-            self._session.logger.debug("Processing payment with %s transaction id", transaction_id)
-
-            product_order = obj.get("productOrder")
-            if not product_order:  # it's a balance purchase
-                continue
-
-            items = product_order["items"]
-            assert len(items) == 1
-            items = items[0]
-
-            metadata = items.get("metadata")
-            if not metadata:  # it's a tip
-                account_id = items["productId"]
-            else:  # it's a paid something
-                metadata = json.loads(metadata)
-                account_id = metadata.get("accountId")
-                if not account_id:
-                    account_id = metadata["authorId"]  # it's a locked text
-
-            result.append(
-                {
-                    "accountId": account_id,
-                    "createdAt": product_order["createdAt"],  # unix timestamp in milliseconds
-                    "price": items["productPrice"],  # price is multiplied by 1000,
-                    "transactionId": transaction_id,
-                }
-            )
-
-        return result
+        return _parse_payments(self._session.logger, response)
 
 
 class _FanslyUserSubscriptionsApi:
@@ -0,0 +1,326 @@
+import copy
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Hashable
+from urllib.parse import urlencode
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+__all__ = ["CacheMode", "DiskCache", "ReplayMissError", "ResponseCache"]
+
+
+DEFAULT_TTL: float = 60.0 * 5
+DEFAULT_MAX_ENTRIES: int = 1024
+
+DEFAULT_MAX_AGE: float = 60.0 * 60 * 24
+DEFAULT_MAX_SIZE: int = 512 * 1024 * 1024
+
+
+# A mutation of the left endpoint makes cached responses of the right ones stale.
+_INVALIDATION_RULES: list[tuple[re.Pattern, re.Pattern]] = [
+    (re.compile(r"^/lists(/remove)?$"), re.compile(r"^/lists/")),
+    (re.compile(r"^/lists/(commands|items/remove)$"), re.compile(r"^/lists/items$")),
+    (re.compile(r"^/notes"), re.compile(r"^/account$")),
+    (re.compile(r"^/account/\d+/followers"), re.compile(r"^/account/\d+/follow")),
+    (re.compile(r"^/message"), re.compile(r"^/message")),
+    (re.compile(r"^/uservault"), re.compile(r"^/uservault")),
+    (re.compile(r"^/post"), re.compile(r"^/(post|notifications)$")),
+    (re.compile(r"^/session"), re.compile(r"^/sessions$")),
+]
+
+_MISSING = object()
+
+
+def _stale_patterns(url: str) -> list[re.Pattern]:
+    return [stale for mutation, stale in _INVALIDATION_RULES if mutation.match(url)]
+
+
+def _normalize(value: Any) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return ",".join(sorted(map(str, value)))
+    return str(value)
+
+
+@dataclass
+class _CacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+class ResponseCache:
+    """
+    A thread-safe in-memory cache of parsed GET responses
+
+    Entries expire after their TTL or once a related mutation has been sent to the server. At most
+    `max_entries` of them are kept, the least recently used ones are dropped first.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._entries: OrderedDict[Hashable, tuple[float, str, Any]] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = _CacheStats()
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> Hashable:
+        items = (params or {}).items()
+        return url, tuple(sorted((k, _normalize(v)) for k, v in items if k != "ngsw-bypass"))
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or entry[0] < now:
+                self._entries.pop(key, None)
+                self._stats.misses += 1
+                return default
+
+            self._stats.hits += 1
+            self._entries.move_to_end(key)
+
+        # Callers are free to modify what they get.
+        return copy.deepcopy(entry[2])
+
+    def put(self, key: Hashable, value: Any, ttl: float = DEFAULT_TTL) -> None:
+        now = time.monotonic()
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            for stale_key in [k for k, entry in self._entries.items() if entry[0] < now]:
+                del self._entries[stale_key]
+
+            self._entries[key] = (now + ttl, key[0], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        """Drop all entries that could have been changed by a mutation of `url` endpoint."""
+        patterns = _stale_patterns(url)
+        if not patterns:
+            return
+
+        with self._lock:
+            for key, (_, entry_url, _) in list(self._entries.items()):
+                if any(p.match(entry_url) for p in patterns):
+                    del self._entries[key]
+                    self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**asdict(self._stats), "entries": len(self._entries)}
+
+
+#
+# On-disk cache
+#
+
+
+class CacheMode(str, Enum):
+    CACHE = "cache"  # serve fresh responses from the disk, fetch and store everything else
+    RECORD = "record"  # always fetch and store responses
+    REPLAY = "replay"  # serve everything from the disk and never touch the network
+
+
+class ReplayMissError(LookupError):
+    pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_created ON responses (created);
+"""
+
+
+def _matches_key(pattern: str, key: str) -> bool:
+    return re.match(pattern, key.partition("?")[0]) is not None
+
+
+def _make_response(url: str, status: int, headers: dict, body: bytes) -> Response:
+    request = PreparedRequest()
+    request.method = "GET"
+    request.url = url
+    request.body = None
+
+    response = Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.request = request
+    response._content = body
+    return response
+
+
+class DiskCache:
+    """
+    A thread-safe SQLite-backed store of raw GET responses
+
+    It can work as a regular HTTP cache or as a cassette that records responses once and then
+    replays them without any network calls. Entries are evicted by age and by the total size.
+    As a regular cache, it keeps only successful responses and drops the ones a mutation has made
+    stale, just like `ResponseCache`.
+    """
+
+    def __init__(
+        self,
+        path: "Path | str",
+        *,
+        mode: CacheMode = CacheMode.CACHE,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        self._mode = CacheMode(mode)
+        self._max_age = max_age
+        self._max_size = max_size
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.create_function("matches_key", 2, _matches_key, deterministic=True)
+
+        # Patterns of stale responses that have been dropped and not stored again since then.
+        self._invalidated: set[re.Pattern] = set()
+
+        self._stats = _CacheStats()
+        self.evict()
+
+    @property
+    def mode(self) -> CacheMode:
+        return self._mode
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        items = (params or {}).items()
+        query = sorted((k, _normalize(v)) for k, v in items if k != "ngsw-bypass")
+        return f"{url}?{urlencode(query)}"
+
+    def get(self, method: str, url: str, params: dict | None) -> Response | None:
+        """
+        Get a stored response
+
+        :raises ReplayMissError: in replay mode if there is no such response.
+        """
+        if method.upper() != "GET":
+            if self._mode == CacheMode.REPLAY:
+                raise ReplayMissError(f"Refusing to send {method} {url} request in replay mode")
+            return None
+
+        if self._mode == CacheMode.RECORD:
+            return None
+
+        key = self.key(url, params)
+        query = "SELECT url, status, headers, body FROM responses WHERE key = ?"
+        args: tuple = (key,)
+        if self._mode == CacheMode.CACHE:
+            query += " AND created >= ?"
+            args += (time.time() - self._max_age,)
+
+        with self._lock:
+            row = self._db.execute(query, args).fetchone()
+            if not row:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+
+        if row:
+            return _make_response(row[0], row[1], json.loads(row[2]), row[3])
+        if self._mode == CacheMode.REPLAY:
+            raise ReplayMissError(f"There is no recorded response for {key}")
+        return None
+
+    def put(self, method: str, url: str, params: dict | None, response: Response) -> None:
+        if method.upper() != "GET" or self._mode == CacheMode.REPLAY:
+            return
+
+        # Errors shouldn't outlive a request, but a cassette keeps them to be replayed faithfully,
+        # e.g. dead accounts are reported with 500 status. Rate limiting isn't worth replaying.
+        if self._mode == CacheMode.CACHE and not response.ok:
+            return
+        if response.status_code == 429:
+            return
+
+        body = response.content
+        row = (
+            self.key(url, params),
+            response.url,
+            response.status_code,
+            json.dumps(dict(response.headers)),
+            body,
+            time.time(),
+            len(body),
+        )
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+            self._invalidated = {p for p in self._invalidated if not p.match(url)}
+
+    def invalidate(self, url: str) -> None:
+        """Drop all responses that could have been changed by a mutation of `url` endpoint."""
+        if self._mode != CacheMode.CACHE:
+            return
+
+        with self._lock, self._db:
+            for pattern in _stale_patterns(url):
+                if pattern in self._invalidated:
+                    continue
+
+                cursor = self._db.execute(
+                    "DELETE FROM responses WHERE matches_key(?, key)", (pattern.pattern,)
+                )
+                self._stats.invalidations += cursor.rowcount
+                self._invalidated.add(pattern)
+
+    def evict(self) -> None:
+        """Drop expired entries and then the oldest ones until the total size fits the limit."""
+        if self._mode == CacheMode.REPLAY:
+            return
+
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self._max_age,)
+            )
+
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self._max_size:
+                return
+
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY created")
+            stale: list[tuple[str]] = []
+            for key, size in rows:
+                if total <= self._max_size:
+                    break
+                stale.append((key,))
+                total -= size
+
+            self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return asdict(self._stats)
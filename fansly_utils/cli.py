@@ -3,6 +3,9 @@ from enum import IntEnum, auto
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from .api import DEFAULT_WORKERS_COUNT
+from .cache import DEFAULT_MAX_AGE, DEFAULT_MAX_SIZE, CacheMode
+
 if TYPE_CHECKING:
     from argparse import _SubParsersAction
 
@@ -28,6 +31,13 @@ class FileType(IntEnum):
 
 
 _DEFAULT_FILE: Path = Path("fansly-backup.json")
+_SNAPSHOTS_FILE: Path = Path("fansly-snapshots.db")
+
+_OUTPUT_FILE_HELP = (
+    "A path to an output file. Its format is chosen by the extension: .json, .ndjson or SQLite "
+    "for .db, .sqlite and .sqlite3. JSON files can be compressed with .gz or .zst, "
+    "e.g. fansly-backup.ndjson.zst."
+)
 
 
 def _add_parser(
@@ -45,14 +55,15 @@ def _add_parser(
             "file",
             nargs="?",
             type=_is_valid_path,
-            help="A path to a JSON file with previously saved data.",
+            help="A path to a JSON, NDJSON or SQLite file with previously saved data.",
             default=_DEFAULT_FILE,
         )
     elif file_type == FileType.OUTPUT:
         parser.add_argument(
             "file",
             nargs="?",
-            help="A path to an output JSON file.",
+            type=Path,
+            help=_OUTPUT_FILE_HELP,
             default=_DEFAULT_FILE,
         )
 
@@ -63,6 +74,53 @@ def _add_parser(
         help="A path to configuration INI file.",
         default="config.ini",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="A number of lists or collections to process in parallel.",
+        default=DEFAULT_WORKERS_COUNT,
+    )
+
+    http_cache = parser.add_argument_group("HTTP cache")
+    http_cache.add_argument(
+        "--http-cache",
+        type=Path,
+        help="A path to SQLite database to store fetched responses in.",
+        default=None,
+    )
+    http_cache.add_argument(
+        "--http-cache-mode",
+        choices=[m.value for m in CacheMode],
+        help="Use fresh responses, only record them or replay them without network calls.",
+        default=CacheMode.CACHE.value,
+    )
+    http_cache.add_argument(
+        "--http-cache-max-age",
+        type=float,
+        help="Drop responses older than the given number of seconds.",
+        default=DEFAULT_MAX_AGE,
+    )
+    http_cache.add_argument(
+        "--http-cache-max-size",
+        type=int,
+        help="Drop the oldest responses once the database exceeds the given number of bytes.",
+        default=DEFAULT_MAX_SIZE,
+    )
+
+    metrics = parser.add_argument_group("metrics")
+    metrics.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write per-endpoint request metrics as JSON to the given file at the end.",
+        default=None,
+    )
+    metrics.add_argument(
+        "--metrics-prometheus",
+        type=Path,
+        help="Write the same metrics in Prometheus textfile collector format.",
+        default=None,
+    )
 
     log_levels = parser.add_mutually_exclusive_group()
     log_levels.add_argument(
@@ -99,6 +157,19 @@ def get_cli_arg_parser() -> ArgumentParser:
         help="Generate a simple HTML table to visualize saved data.",
         action="store_true",
     )
+    backup.add_argument(
+        "--resume",
+        help="Continue an interrupted backup from its journal instead of starting from scratch.",
+        action="store_true",
+    )
+    backup.add_argument(
+        "--snapshot",
+        nargs="?",
+        type=Path,
+        const=_SNAPSHOTS_FILE,
+        help="Also add a snapshot of the saved data to a history store.",
+        default=None,
+    )
     backup_update = backup.add_mutually_exclusive_group()
     backup_update.add_argument(
         "--only-update-accounts",
@@ -141,6 +212,7 @@ def get_cli_arg_parser() -> ArgumentParser:
         "-b",
         "--backup",
         nargs="?",
+        type=Path,
         help="A path to a wipe backup.",
         default=Path("wipe-backup.txt"),
     )
@@ -150,6 +222,25 @@ def get_cli_arg_parser() -> ArgumentParser:
         help="Do not show a warning message.",
         action="store_true",
     )
+    wipe.add_argument(
+        "--plan-only",
+        nargs="?",
+        type=Path,
+        const=Path("wipe-plan.json"),
+        help="Only find out what is going to be removed and save the plan to a file.",
+        default=None,
+    )
+    wipe.add_argument(
+        "--resume",
+        help="Continue an interrupted wipe from its journal instead of starting from scratch.",
+        action="store_true",
+    )
+    wipe.add_argument(
+        "--notes-from",
+        type=Path,
+        help="Take notes from a backup, only accounts it doesn't know are fetched to find theirs.",
+        default=None,
+    )
 
     # info
 
@@ -165,6 +256,84 @@ def get_cli_arg_parser() -> ArgumentParser:
         action="store_true",
     )
 
+    # convert
+
+    convert = _add_parser(
+        subparsers, "convert", "Convert saved data between JSON and SQLite formats."
+    )
+    convert.add_argument(
+        "output",
+        type=Path,
+        help=_OUTPUT_FILE_HELP,
+    )
+
+    # snapshot
+
+    snapshot = _add_parser(
+        subparsers, "snapshot", "Add a snapshot of saved data to a history store."
+    )
+    snapshot.add_argument(
+        "--store",
+        type=Path,
+        help="A path to a history store.",
+        default=_SNAPSHOTS_FILE,
+    )
+
+    # history
+
+    history = _add_parser(
+        subparsers, "history", "Look into snapshots of saved data.", FileType.NONE
+    )
+    history.add_argument(
+        "--store",
+        type=_is_valid_path,
+        help="A path to a history store.",
+        default=_SNAPSHOTS_FILE,
+    )
+    history_queries = history.add_mutually_exclusive_group(required=True)
+    history_queries.add_argument(
+        "--snapshots",
+        help="List all snapshots.",
+        action="store_true",
+    )
+    history_queries.add_argument(
+        "--following-at",
+        metavar="DATE",
+        help="Show followings as they were at the given date, e.g. 2024-01-31.",
+        default=None,
+    )
+    history_queries.add_argument(
+        "--names",
+        metavar="ID",
+        help="Show all usernames of a creator by a numerical ID or any of its usernames.",
+        default=None,
+    )
+
+    # diff
+
+    diff = _add_parser(
+        subparsers, "diff", "Show changes between two backups or two snapshots.", FileType.NONE
+    )
+    diff.add_argument(
+        "old",
+        help="An older backup file, or a snapshot id or date if --store is given.",
+    )
+    diff.add_argument(
+        "new",
+        help="A newer backup file, or a snapshot id or date if --store is given.",
+    )
+    diff.add_argument(
+        "--store",
+        type=_is_valid_path,
+        help="A path to a history store to compare snapshots from.",
+        default=None,
+    )
+    diff.add_argument(
+        "--json",
+        help="Print changes as JSON.",
+        action="store_true",
+    )
+
     # html
 
     _add_parser(subparsers, "html", "Generate a simple HTML table to visualize saved data.")
@@ -1,7 +1,10 @@
 from .add_list_items import add_list_items  # noqa: F401
 from .backup import backup, update_accounts  # noqa: F401
+from .database import convert_backup  # noqa: F401
+from .diff import diff  # noqa: F401
 from .html import generate_html  # noqa: F401
 from .info import get_account_info  # noqa: F401
 from .payments import PaymentsProcessor, process_payments  # noqa: F401
 from .restore import restore  # noqa: F401
+from .snapshots import show_history, take_snapshot  # noqa: F401
 from .wipe import wipe  # noqa: F401
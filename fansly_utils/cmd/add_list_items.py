@@ -1,13 +1,12 @@
-import random
-import time
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, Iterable
+from typing import TYPE_CHECKING, Iterable
 
 if TYPE_CHECKING:
     from logging import Logger
     from pathlib import Path
 
     from ..api import FanslyApi
+    from ..records import Account
 
 __all__ = ["add_list_items"]
 
@@ -48,18 +47,18 @@ def _read_file(file: "Path", creators: Creators) -> tuple[set[str], set[str], se
     return ids, usernames, found_ids
 
 
-def _get_creators_ids(api: "FanslyApi", ids: set[str], usernames: set[str]) -> list[dict[str, Any]]:
+def _get_creators_ids(api: "FanslyApi", ids: set[str], usernames: set[str]) -> list["Account"]:
     found_creators_info = api.accounts().get_batch(accounts_ids=ids, brief=True)
     found_creators_info += api.accounts().get_batch(usernames=usernames, brief=True)
 
     return found_creators_info
 
 
-def _collect_names(data: list[dict[str, Any]]) -> set[str]:
+def _collect_names(data: list["Account"]) -> set[str]:
     result: set[str] = set()
-    for found_account_info in data:
-        result.add(found_account_info["displayName"])
-        result.add(found_account_info["username"])
+    for found_account in data:
+        result.add(found_account.display_name)
+        result.add(found_account.username)
     return result
 
 
@@ -82,10 +81,10 @@ def _add_list_items(api: "FanslyApi", logger: "Logger", file: "Path", creators:
     # get creators ids
 
     found_info = _get_creators_ids(api, provided_ids, provided_usernames)
-    for found_account_info in found_info:
-        found_account_id = found_account_info["id"]
-        found_display_name = found_account_info["displayName"]
-        found_username = found_account_info["username"]
+    for found_account in found_info:
+        found_account_id = found_account.id
+        found_display_name = found_account.display_name
+        found_username = found_account.username
 
         creators.ids[found_account_id] = (found_username, found_display_name)
 
@@ -113,12 +112,12 @@ def _add_list_items(api: "FanslyApi", logger: "Logger", file: "Path", creators:
     list_id: str = ""
 
     label = file.stem.lower()
-    for list_info in api.lists().get_all(only_ids=False):
-        if list_info["label"].lower() == label:
+    for user_list in api.lists().get_all(only_ids=False):
+        if user_list.label.lower() == label:
             logger.info("Found %r in user lists!", label)
 
-            list_id = list_info["id"]
-            list_items = set(api.lists().items().get_all(list_info["id"]))
+            list_id = user_list.id
+            list_items = set(api.lists().items().get_all(user_list.id))
 
             _log_ids(logger, creators, found_ids & list_items, "is already added")
 
@@ -133,8 +132,6 @@ def _add_list_items(api: "FanslyApi", logger: "Logger", file: "Path", creators:
     api.lists().items().add(list_id=list_id, accounts_ids=found_ids)
     _log_ids(logger, creators, found_ids, "has been successfully added")
 
-    time.sleep(random.uniform(15, 60))  # to avoid rate limiter
-
 
 def add_list_items(api: "FanslyApi", logger: "Logger", files: list["Path"]) -> None:
     creators = Creators()
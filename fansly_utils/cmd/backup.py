@@ -1,170 +1,270 @@
-import random
 import shutil
-import time
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from itertools import count
+from typing import TYPE_CHECKING, Any, Callable
 
-from ..api import chunks, offset
-from .utils import contains, extract_ids, find_by, load_backup, merge_lists, save_backup
+from ..api import DEFAULT_LIMIT_VALUE, chunks, fan_out, offset
+from ..ids import IdSet
+from .database import Backup, open_backup
+from .index import BackupIndex
+from .journal import Journal
+from .utils import extract_ids, gather, payments_pages
 
 if TYPE_CHECKING:
     from logging import Logger
     from pathlib import Path
 
     from ..api import FanslyApi
+    from ..records import Account, UserList
 
 __all__ = ["backup", "update_accounts"]
 
 
-def backup(api: "FanslyApi", logger: "Logger", db_file: "Path", update: bool) -> None:
-    accounts_ids: set[str] = set()
-    accounts: list[dict] = []
-    deleted: list[str] = []
-    following: list[str] = []
-    lists: list[dict] = []
-    payments: list[dict] = []
+@dataclass
+class _Progress:
+    """What has already been collected according to a journal."""
+
+    lists: set[str] = field(default_factory=set)
+    following: int = 0  # an offset of the next page
+    accounts: IdSet = field(default_factory=IdSet)
+    payments: int = 0  # an offset of the next page
+    done: set[str] = field(default_factory=set)
+
+
+def _apply(entry: dict, index: BackupIndex, accounts_ids: IdSet, progress: _Progress) -> None:
+    phase = entry["phase"]
+
+    if entry.get("done"):
+        progress.done.add(phase)
+    elif phase == "lists":
+        list_info = entry["list"]
+        index.add_list(list_info)
+        accounts_ids |= list_info["items"]
+        progress.lists.add(list_info["id"])
+    elif phase == "following":
+        index.add_following(entry["ids"])
+        accounts_ids |= entry["ids"]
+        progress.following = entry["offset"] + DEFAULT_LIMIT_VALUE
+    elif phase == "accounts":
+        found = {account_info["id"]: account_info for account_info in entry["accounts"]}
+        for account_id in entry["ids"]:
+            account_info = found.get(account_id)
+            if account_info:
+                index.add_account(account_info)
+            else:
+                index.mark_deleted(account_id)
+        progress.accounts |= entry["ids"]
+    elif phase == "payments":
+        for payment in entry["payments"]:
+            index.add_payment(payment)
+        progress.payments = entry["offset"] + DEFAULT_LIMIT_VALUE
+
+
+def backup(
+    api: "FanslyApi", logger: "Logger", db_file: "Path", update: bool, resume: bool = False
+) -> None:
+    index = BackupIndex()
+    accounts_ids = IdSet()
+    progress = _Progress()
+
+    journal = Journal.for_file(db_file)
+    if resume and journal.exists():
+        logger.info("Resuming from the '%s' journal...", journal.path)
+        for entry in journal.read():
+            _apply(entry, index, accounts_ids, progress)
+    elif journal.exists():
+        logger.warning(
+            "Discarding the '%s' journal of an interrupted backup, use --resume to continue it",
+            journal.path,
+        )
+
+    def _record(phase: str, **entry: Any) -> None:
+        journal.append(phase, **entry)
+        _apply({"phase": phase, **entry}, index, accounts_ids, progress)
+
+    # The backup file is opened only at the end, unless already saved data is needed to collect
+    # new data.
+    old_backup = None
+    if update and db_file.exists():
+        db_file_backup = db_file.with_suffix(".bak")
+        if not db_file_backup.exists():
+            logger.debug("Backup '%s' file to '%s'", db_file, db_file_backup)
+            shutil.copy2(str(db_file), str(db_file_backup))
 
-    # collect
+        logger.debug("Loading old database...")
+        old_backup = open_backup(db_file)
 
-    logger.info("Backup all user lists...")
+    with journal:
+        journal.open(resume=resume)
+        _collect(api, logger, index, old_backup, accounts_ids, progress, journal, _record)
 
-    for list_info in api.lists().get_all(only_ids=False):
-        logger.info("Backup '%s' user list", list_info["label"])
+    with old_backup or open_backup(db_file, fresh=True) as storage:
+        _merge(logger, storage, index)
 
-        items = api.lists().items().get_all(list_info["id"])
-        accounts_ids |= set(items)
+        logger.info("Dumping all found data to the '%s' file...", db_file)
+        storage.save()
 
-        list_info["items"] = items
-        lists.append(list_info)
+    journal.remove()
 
-    logger.info("Processed %s lists!", len(lists))
+
+def _collect(
+    api: "FanslyApi",
+    logger: "Logger",
+    index: BackupIndex,
+    old_backup: Backup | None,
+    accounts_ids: IdSet,
+    progress: _Progress,
+    journal: Journal,
+    record: Callable[..., None],
+) -> None:
+    logger.info("Backup all user lists...")
+
+    def _backup_list(user_list: "UserList") -> dict:
+        logger.info("Backup '%s' user list", user_list.label)
+        list_info = {**user_list.to_dict(), "items": api.lists().items().get_all(user_list.id)}
+        journal.append("lists", list=list_info)  # `index` isn't thread-safe, so it's applied later
+        return list_info
+
+    if "lists" not in progress.done:
+        with api.phase("lists"):
+            lists = [
+                user_list
+                for user_list in api.lists().get_all(only_ids=False)
+                if user_list.id not in progress.lists
+            ]
+            for list_info in fan_out(_backup_list, lists, workers=api.workers):
+                _apply({"phase": "lists", "list": list_info}, index, accounts_ids, progress)
+        record("lists", done=True)
+
+    logger.info("Processed %s lists!", len(index.lists))
     logger.info("Backup a list of accounts that the user follows...")
 
-    for ids in offset(lambda kwarg: api.user().following().get_batch(**kwarg)):
-        following.extend(ids)
-        accounts_ids |= set(ids)
+    if "following" not in progress.done:
+        with api.phase("following"):
+            pages = offset(
+                lambda kwarg: api.user().following().get_batch(**kwarg), start=progress.following
+            )
+            for page_offset, ids in zip(count(progress.following, DEFAULT_LIMIT_VALUE), pages):
+                record("following", offset=page_offset, ids=ids)
+        record("following", done=True)
 
-    logger.info("Found %s accounts that the user follows!", len(following))
+    logger.info("Found %s accounts that the user follows!", len(index.following))
     logger.info("Backup all available accounts info...")
 
-    time.sleep(random.uniform(5, 15))  # to avoid rate limiter
-
-    for chunk in chunks(accounts_ids):
-        response = api.accounts().get_batch(accounts_ids=chunk, brief=True)
+    def _on_accounts(chunk: tuple[str, ...], response: list["Account"]) -> None:
+        found = {account.id for account in response}
         for account_id in chunk:
-            account_info = find_by(response, key="id", value=account_id)
-            if account_info:
-                accounts.append(account_info)
-                continue
-
-            logger.warning(
-                "Detected dead or unavailable in your region account with '%s' id!",
-                account_id,
+            if account_id not in found:
+                logger.warning(
+                    "Detected dead or unavailable in your region account with '%s' id!",
+                    account_id,
+                )
+        record("accounts", ids=chunk, accounts=[account.to_dict() for account in response])
+
+    if "accounts" not in progress.done:
+        with api.phase("accounts"):
+            gather(
+                api,
+                lambda aio_api, chunk: aio_api.accounts().get_batch(accounts_ids=chunk, brief=True),
+                chunks(accounts_ids - progress.accounts),
+                on_result=_on_accounts,
+                limit=api.max_concurrency,
             )
-            deleted.append(account_id)
-
-    for account in accounts:
-        account["oldNames"] = []  # to simplify logic, let's inject this now.
-
-    logger.info("Backup all available payments...")
-    for payments_chunk in offset(lambda kwarg: api.user().payments().get_batch(**kwarg)):
-        payments.extend(payments_chunk)
-        accounts_ids |= set(extract_ids(payments_chunk, key="accountId"))
+        record("accounts", done=True)
+
+    # The history only grows, so an update only needs payments newer than the saved ones.
+    known = IdSet(p["transactionId"] for p in old_backup.payments) if old_backup else IdSet()
+    if known:
+        logger.info("Backup new payments...")
+    else:
+        logger.info("Backup all available payments...")
+
+    if "payments" not in progress.done:
+        with api.phase("payments"):
+            pages = payments_pages(
+                api,
+                start=progress.payments,
+                is_known=(lambda payment: payment.transaction_id in known) if known else None,
+            )
+            for page_offset, payments in zip(count(progress.payments, DEFAULT_LIMIT_VALUE), pages):
+                record("payments", offset=page_offset, payments=[p.to_dict() for p in payments])
+        record("payments", done=True)
 
-    logger.info("Found %s payments!", len(following))
+    logger.info("Found %s payments!", len(index.payments))
 
-    # update data
 
-    if update and db_file.exists():
-        logger.debug("Loading old database...")
-        old_data = load_backup(db_file)
+def _merge(logger: "Logger", storage: Backup, index: BackupIndex) -> None:
+    logger.debug("Merging accounts...")
+    for account_info in index.accounts:
+        old_account_info = storage.account(account_info["id"])
+        if old_account_info and old_account_info["username"] != account_info["username"]:
+            logger.warning(
+                "'%s' has changed their name to '%s'",
+                old_account_info["username"],
+                account_info["username"],
+            )
 
-        db_file_backup = db_file.with_suffix("bak")
-        if not db_file_backup.exists():
-            logger.debug("Backup '%s' file to '%s'", db_file, db_file_backup)
-            shutil.copy2(str(db_file), str(db_file_backup))
+        storage.put_account(account_info)
+        storage.unmark_deleted(
+            account_info["id"]
+        )  # it might be available again, e.g. in another region.
 
-        logger.debug("Merging accounts...")
-        for old_account_info in old_data["accounts"]:
-            account_info = find_by(accounts, key="id", value=old_account_info["id"])
-            if not account_info:
-                logger.debug("Adding '%s' account", old_account_info["username"])
-                accounts.append(old_account_info)
-                continue
-
-            old_name = old_account_info["username"]
-            new_name = account_info["username"]
-
-            if old_name != new_name:
-                logger.warning("'%s' has changed their name to '%s'", old_name, new_name)
-                account_info["oldNames"].append(old_name)
-
-        logger.debug("Merging deleted accounts...")
-        deleted = old_data["deleted"]
-
-        logger.debug("Merging followings...")
-        following = merge_lists(following, old_data["following"])
-
-        logger.debug("Merging lists...")
-        for old_list_info in old_data["lists"]:
-            old_list_label = old_list_info["label"]
-            list_info = find_by(lists, key="label", value=old_list_label)
-            if not list_info:
-                logger.debug("Adding '%s' list", old_list_label)
-                lists.append(old_list_info)
-            else:
-                logger.debug("Updating '%s' list", old_list_label)
-                list_info["items"] = merge_lists(list_info["items"], old_list_info["items"])
+    logger.debug("Merging deleted accounts...")
+    for account_id in index.deleted:
+        storage.mark_deleted(account_id)
 
-        logger.debug("Merging payments...")
-        for old_payment_info in old_data["payments"]:
-            old_tid = old_payment_info["transactionId"]
-            payment_info = find_by(lists, key="transactionId", value=old_tid)
-            if not payment_info:
-                logger.debug("Adding payment with '%s' transaction id", old_list_label)
-                lists.append(old_payment_info)
+    logger.debug("Merging followings...")
+    storage.add_following(index.following)
 
-    # dump
+    logger.debug("Merging lists...")
+    for list_info in index.lists:
+        logger.debug("Merging '%s' list", list_info["label"])
+        storage.add_list(list_info)
 
-    backup_data = {
-        "accounts": accounts,
-        "deleted": deleted,
-        "following": following,
-        "lists": lists,
-        "payments": payments,
-    }
-
-    logger.info("Dumping all found data to the '%s' file...", db_file)
-    save_backup(db_file, backup_data)
+    logger.debug("Merging payments...")
+    for payment_info in index.payments:
+        if storage.add_payment(payment_info):
+            logger.debug("Adding payment with '%s' transaction id", payment_info["transactionId"])
 
 
 def update_accounts(api: "FanslyApi", logger: "Logger", db_file: "Path") -> None:
     logger.info("Loading saved data from '%s' file...", db_file)
-    data = load_backup(db_file)
-
-    logger.info("Checking accounts...")
-
-    logger.debug("Removing dead accounts...")
-    accounts = list(filter(lambda a: not contains(data["deleted"], a["id"]), data["accounts"]))
-
-    for chunk in chunks(accounts):
-        response = api.accounts().get_batch(accounts_ids=extract_ids(chunk), brief=True)
-        for old_account_info in chunk:
-            old_id = old_account_info["id"]
-            old_name = old_account_info["username"]
-
-            account_info = find_by(response, key="id", value=old_id)
-            if not account_info:
-                logger.warning(
-                    "'%s' has deleted their account or disabled it for your region", old_name
-                )
-                data["deleted"].append(old_id)
-                continue
-
-            new_name = account_info["username"]
-            if old_name != new_name:
-                logger.warning("'%s' has changed their name to '%s'", old_name, new_name)
-                old_account_info["username"] = new_name
-                old_account_info["oldNames"].append(old_name)
+    with open_backup(db_file) as index:
+        logger.info("Checking accounts...")
+
+        logger.debug("Removing dead accounts...")
+        accounts = list(index.alive_accounts())
+
+        with api.phase("accounts"):
+            accounts_chunks = list(chunks(accounts))
+            responses = gather(
+                api,
+                lambda aio_api, chunk: aio_api.accounts().get_batch(
+                    accounts_ids=extract_ids(chunk), brief=True
+                ),
+                accounts_chunks,
+                limit=api.max_concurrency,
+            )
 
-    logger.info("Dumping updated data back to the '%s' file...", db_file)
-    save_backup(db_file, data)
+            for chunk, response in zip(accounts_chunks, responses):
+                found = {account.id: account for account in response}
+                for old_account_info in chunk:
+                    old_id = old_account_info["id"]
+                    old_name = old_account_info["username"]
+
+                    account = found.get(old_id)
+                    if not account:
+                        logger.warning(
+                            "'%s' has deleted their account or disabled it for your region",
+                            old_name,
+                        )
+                        index.mark_deleted(old_id)
+                        continue
+
+                    new_name = account.username
+                    if old_name != new_name:
+                        logger.warning("'%s' has changed their name to '%s'", old_name, new_name)
+                        index.rename_account(old_account_info, new_name)
+
+        logger.info("Dumping updated data back to the '%s' file...", db_file)
+        index.save()
@@ -0,0 +1,403 @@
+import sqlite3
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from ..codec import dumps, loads
+from .index import BackupIndex
+
+__all__ = ["Backup", "SqliteBackup", "convert_backup", "copy_backup", "is_sqlite", "open_backup"]
+
+
+SQLITE_SUFFIXES: tuple[str, ...] = (".db", ".sqlite", ".sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    display_name TEXT
+);
+CREATE INDEX IF NOT EXISTS accounts_username ON accounts (username);
+
+CREATE TABLE IF NOT EXISTS old_names (
+    account_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (account_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    title TEXT,
+    data TEXT,
+    created_at INTEGER,
+    updated_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS notes_account_id ON notes (account_id);
+
+CREATE TABLE IF NOT EXISTS lists (
+    label TEXT PRIMARY KEY,
+    info BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS list_items (
+    label TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    PRIMARY KEY (label, account_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS list_items_account_id ON list_items (account_id);
+
+CREATE TABLE IF NOT EXISTS following (account_id TEXT PRIMARY KEY) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS deleted (account_id TEXT PRIMARY KEY) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS payments (
+    transaction_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    price INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_account_id ON payments (account_id);
+CREATE INDEX IF NOT EXISTS payments_created_at ON payments (created_at);
+"""
+
+_TABLES: tuple[str, ...] = (
+    "accounts",
+    "old_names",
+    "notes",
+    "lists",
+    "list_items",
+    "following",
+    "deleted",
+    "payments",
+)
+
+
+def _note(row: tuple) -> dict:
+    return {"id": row[1], "title": row[2], "data": row[3], "createdAt": row[4], "updatedAt": row[5]}
+
+
+def _payment(row: tuple) -> dict:
+    return {"transactionId": row[0], "accountId": row[1], "createdAt": row[2], "price": row[3]}
+
+
+class SqliteBackup:
+    """
+    A backup stored in SQLite database
+
+    It has the same interface as `BackupIndex`, but records are read on demand and every change is
+    a single upsert, so neither the whole backup is loaded into memory nor the whole file is
+    rewritten. Changes become visible to other connections only after `save()`.
+    """
+
+    def __init__(self, path: "Path | str") -> None:
+        self._path = Path(path)
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(_SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def save(self, file_path: "Path | None" = None) -> None:
+        assert file_path is None or Path(file_path) == self._path, "can't save to another file"
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "SqliteBackup":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def clear(self) -> None:
+        for table in _TABLES:
+            self._db.execute(f"DELETE FROM {table}")
+
+    def _column(self, query: str, args: tuple = ()) -> list:
+        return [row[0] for row in self._db.execute(query, args)]
+
+    def _exists(self, query: str, args: tuple) -> bool:
+        return self._db.execute(query, args).fetchone() is not None
+
+    # accounts
+
+    def _accounts(self, where: str = "", args: tuple = ()) -> Iterator[dict]:
+        # Accounts, their notes and old names are read by three cursors in the same order and
+        # merged, so there are no per-account queries.
+        accounts = self._db.execute(
+            f"SELECT id, username, display_name FROM accounts {where} ORDER BY id", args
+        )
+        notes = groupby(
+            self._db.execute(
+                "SELECT account_id, id, title, data, created_at, updated_at FROM notes "
+                "ORDER BY account_id, rowid"
+            ),
+            key=lambda row: row[0],
+        )
+        old_names = groupby(
+            self._db.execute("SELECT account_id, name FROM old_names ORDER BY account_id, rowid"),
+            key=lambda row: row[0],
+        )
+
+        next_notes = next(notes, None)
+        next_names = next(old_names, None)
+        for account_id, username, display_name in accounts:
+            while next_notes and next_notes[0] < account_id:
+                next_notes = next(notes, None)
+            while next_names and next_names[0] < account_id:
+                next_names = next(old_names, None)
+
+            account = {
+                "id": account_id,
+                "username": username,
+                "displayName": display_name,
+                "notes": [],
+                "oldNames": [],
+            }
+            if next_notes and next_notes[0] == account_id:
+                account["notes"] = [_note(row) for row in next_notes[1]]
+            if next_names and next_names[0] == account_id:
+                account["oldNames"] = [row[1] for row in next_names[1]]
+            yield account
+
+    def _account(self, where: str, args: tuple) -> dict | None:
+        row = self._db.execute(
+            f"SELECT id, username, display_name FROM accounts WHERE {where}", args
+        ).fetchone()
+        if not row:
+            return None
+
+        account_id = row[0]
+        notes = self._db.execute(
+            "SELECT account_id, id, title, data, created_at, updated_at FROM notes "
+            "WHERE account_id = ? ORDER BY rowid",
+            (account_id,),
+        )
+        old_names = self._column(
+            "SELECT name FROM old_names WHERE account_id = ? ORDER BY rowid", (account_id,)
+        )
+        return {
+            "id": account_id,
+            "username": row[1],
+            "displayName": row[2],
+            "notes": [_note(note) for note in notes],
+            "oldNames": old_names,
+        }
+
+    @property
+    def accounts(self) -> Iterator[dict]:
+        return self._accounts()
+
+    def alive_accounts(self) -> Iterator[dict]:
+        return self._accounts("WHERE id NOT IN (SELECT account_id FROM deleted)")
+
+    def account(self, account_id: str) -> dict | None:
+        return self._account("id = ?", (account_id,))
+
+    def account_by_username(self, username: str) -> dict | None:
+        return self._account("username = ?", (username,))
+
+    def _write_account(self, account: dict) -> None:
+        account_id = account["id"]
+        self._db.execute(
+            "INSERT INTO accounts (id, username, display_name) VALUES (?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET "
+            "username = excluded.username, display_name = excluded.display_name",
+            (account_id, account["username"], account.get("displayName")),
+        )
+
+        if "notes" in account:
+            self._db.execute("DELETE FROM notes WHERE account_id = ?", (account_id,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        note["id"],
+                        account_id,
+                        note["title"],
+                        note["data"],
+                        note["createdAt"],
+                        note["updatedAt"],
+                    )
+                    for note in account["notes"]
+                ],
+            )
+
+        self._add_old_names(account_id, account.get("oldNames", []))
+
+    def _add_old_names(self, account_id: str, names: Iterable[str]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO old_names VALUES (?, ?)", [(account_id, n) for n in names]
+        )
+
+    def add_account(self, account: dict) -> dict:
+        """Add an account unless there is already one with the same id, which is returned then."""
+        if existing := self.account(account["id"]):
+            return existing
+
+        account.setdefault("oldNames", [])
+        self._write_account(account)
+        return account
+
+    def put_account(self, account: dict) -> None:
+        """
+        Add an account or update an existing one with the same id
+
+        A previous username and names history of the existing account are kept in its `oldNames`.
+        """
+        row = self._db.execute(
+            "SELECT username FROM accounts WHERE id = ?", (account["id"],)
+        ).fetchone()
+
+        self._write_account(account)
+        if row and row[0] != account["username"]:
+            self._add_old_names(account["id"], [row[0]])
+
+    def rename_account(self, account: dict, new_name: str) -> None:
+        old_name = account["username"]
+        if old_name == new_name:
+            return
+
+        self._db.execute("UPDATE accounts SET username = ? WHERE id = ?", (new_name, account["id"]))
+        self._add_old_names(account["id"], [old_name])
+
+        account["username"] = new_name
+        account.setdefault("oldNames", [])
+        if old_name not in account["oldNames"]:
+            account["oldNames"].append(old_name)
+
+    # deleted
+
+    @property
+    def deleted(self) -> list[str]:
+        return self._column("SELECT account_id FROM deleted ORDER BY account_id")
+
+    def is_deleted(self, account_id: str) -> bool:
+        return self._exists("SELECT 1 FROM deleted WHERE account_id = ?", (account_id,))
+
+    def mark_deleted(self, account_id: str) -> None:
+        self._db.execute("INSERT OR IGNORE INTO deleted VALUES (?)", (account_id,))
+
+    def unmark_deleted(self, account_id: str) -> None:
+        self._db.execute("DELETE FROM deleted WHERE account_id = ?", (account_id,))
+
+    # following
+
+    @property
+    def following(self) -> list[str]:
+        return self._column("SELECT account_id FROM following ORDER BY account_id")
+
+    def is_followed(self, account_id: str) -> bool:
+        return self._exists("SELECT 1 FROM following WHERE account_id = ?", (account_id,))
+
+    def add_following(self, accounts_ids: Iterable[str]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO following VALUES (?)", [(i,) for i in accounts_ids]
+        )
+
+    # lists
+
+    def _list(self, label: str, info: bytes) -> dict:
+        list_info = loads(info)
+        list_info["items"] = self._column(
+            "SELECT account_id FROM list_items WHERE label = ? ORDER BY account_id", (label,)
+        )
+        return list_info
+
+    @property
+    def lists(self) -> list[dict]:
+        rows = self._db.execute("SELECT label, info FROM lists ORDER BY label").fetchall()
+        return [self._list(label, info) for label, info in rows]
+
+    def list_by_label(self, label: str) -> dict | None:
+        row = self._db.execute("SELECT label, info FROM lists WHERE label = ?", (label,)).fetchone()
+        return self._list(*row) if row else None
+
+    def in_list(self, label: str, account_id: str) -> bool:
+        return self._exists(
+            "SELECT 1 FROM list_items WHERE label = ? AND account_id = ?", (label, account_id)
+        )
+
+    def add_list(self, list_info: dict) -> dict:
+        """Add a list or merge its items into an existing one with the same label."""
+        label = list_info["label"]
+        info = dumps({k: v for k, v in list_info.items() if k != "items"})
+
+        self._db.execute("INSERT OR IGNORE INTO lists VALUES (?, ?)", (label, info))
+        self._db.executemany(
+            "INSERT OR IGNORE INTO list_items VALUES (?, ?)",
+            [(label, account_id) for account_id in list_info["items"]],
+        )
+        return self.list_by_label(label)  # type: ignore[return-value]
+
+    # payments
+
+    @property
+    def payments(self) -> list[dict]:
+        rows = self._db.execute("SELECT * FROM payments ORDER BY transaction_id")
+        return [_payment(row) for row in rows]
+
+    def payment(self, transaction_id: str) -> dict | None:
+        row = self._db.execute(
+            "SELECT * FROM payments WHERE transaction_id = ?", (transaction_id,)
+        ).fetchone()
+        return _payment(row) if row else None
+
+    def add_payment(self, payment: dict) -> bool:
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO payments VALUES (?, ?, ?, ?)",
+            (
+                payment["transactionId"],
+                payment["accountId"],
+                payment["createdAt"],
+                payment["price"],
+            ),
+        )
+        return cursor.rowcount > 0
+
+
+Backup = BackupIndex | SqliteBackup
+
+
+def is_sqlite(path: "Path | str") -> bool:
+    return Path(path).suffix.lower() in SQLITE_SUFFIXES
+
+
+def open_backup(path: "Path", *, fresh: bool = False) -> Backup:
+    """
+    Open a backup file, its format is chosen by the file extension
+
+    A `fresh` backup starts empty and replaces the existing file only once it's saved.
+    """
+    if is_sqlite(path):
+        backup = SqliteBackup(path)
+        if fresh:
+            backup.clear()
+        return backup
+
+    if fresh or not path.exists():
+        return BackupIndex(path=path)
+    return BackupIndex.load(path)
+
+
+def copy_backup(src: Backup, dst: Backup) -> None:
+    """Copy all records of one backup into another one regardless of their formats."""
+    for account in src.accounts:
+        dst.put_account(account)
+    for account_id in src.deleted:
+        dst.mark_deleted(account_id)
+    dst.add_following(src.following)
+    for list_info in src.lists:
+        dst.add_list(list_info)
+    for payment in src.payments:
+        dst.add_payment(payment)
+
+
+def convert_backup(src_path: "Path", dst_path: "Path") -> None:
+    """Convert a backup from one format to another, e.g. JSON to SQLite."""
+    with open_backup(src_path) as src, open_backup(dst_path, fresh=True) as dst:
+        copy_backup(src, dst)
+        dst.save()
@@ -0,0 +1,235 @@
+"""
+Differences between two backups or two snapshots
+
+Every section of a backup is sorted by its key (`save_backup`, SQLite backups and snapshots all
+guarantee that), so sections are compared with a single sorted merge: nothing is indexed and
+sections are streamed wherever the storage allows it. Arrays of ids are compared as `IdSet`s.
+"""
+
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from rich import print
+
+from ..codec import dumps
+from ..ids import IdSet
+from .database import SqliteBackup, is_sqlite
+from .ndjson import is_ndjson, read_records
+from .snapshots import SnapshotStore
+from .utils import backup_loader
+
+__all__ = ["diff", "diff_backups"]
+
+
+Sections = Callable[[str], Iterable[Any]]
+
+_KEYS: dict[str, Callable[[Any], str]] = {
+    "accounts": lambda o: o["id"],
+    "lists": lambda o: o["label"],
+    "payments": lambda o: o["transactionId"],
+}
+
+
+def _merge(
+    old: Iterable[Any], new: Iterable[Any], key: Callable[[Any], str]
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Pair items of two sorted sequences by their keys
+
+    _merge([1, 2], [2, 3], key) --> (1, None), (2, 2), (None, 3)
+    """
+
+    def _sorted(items: Iterable[Any]) -> Iterator[tuple[str, Any]]:
+        previous = None
+        for item in items:
+            item_key = key(item)
+            if previous is not None and item_key < previous:
+                raise ValueError("A backup is not sorted, re-save it with `convert` command")
+            previous = item_key
+            yield item_key, item
+
+    old_items, new_items = _sorted(old), _sorted(new)
+    old_next, new_next = next(old_items, None), next(new_items, None)
+
+    while old_next and new_next:
+        if old_next[0] == new_next[0]:
+            yield old_next[1], new_next[1]
+            old_next, new_next = next(old_items, None), next(new_items, None)
+        elif old_next[0] < new_next[0]:
+            yield old_next[1], None
+            old_next = next(old_items, None)
+        else:
+            yield None, new_next[1]
+            new_next = next(new_items, None)
+
+    while old_next:
+        yield old_next[1], None
+        old_next = next(old_items, None)
+    while new_next:
+        yield None, new_next[1]
+        new_next = next(new_items, None)
+
+
+def _added_removed(old: Iterable[str], new: Iterable[str]) -> dict[str, list[str]]:
+    old_ids, new_ids = IdSet(old), IdSet(new)
+    return {"added": list(new_ids - old_ids), "removed": list(old_ids - new_ids)}
+
+
+def diff_backups(old: Sections, new: Sections) -> dict:
+    """Compare two backups given as functions that return a sorted section by its name."""
+    result: dict[str, Any] = {"following": _added_removed(old("following"), new("following"))}
+
+    result["deleted"] = _added_removed(old("deleted"), new("deleted"))["added"]
+
+    lists: dict[str, dict] = {}
+    for old_list, new_list in _merge(old("lists"), new("lists"), _KEYS["lists"]):
+        if old_list is None:
+            lists[new_list["label"]] = {"added": new_list["items"], "removed": [], "new": True}
+        elif new_list is None:
+            lists[old_list["label"]] = {"added": [], "removed": old_list["items"], "gone": True}
+        else:
+            changes = _added_removed(old_list["items"], new_list["items"])
+            if changes["added"] or changes["removed"]:
+                lists[new_list["label"]] = changes
+    result["lists"] = lists
+
+    result["payments"] = [
+        new_payment
+        for old_payment, new_payment in _merge(old("payments"), new("payments"), _KEYS["payments"])
+        if old_payment is None
+    ]
+
+    # Only names of accounts mentioned in the diff are kept, so the output stays small.
+    mentioned = {
+        *result["following"]["added"],
+        *result["following"]["removed"],
+        *result["deleted"],
+        *(p["accountId"] for p in result["payments"]),
+    }
+    for changes in lists.values():
+        mentioned.update(changes["added"])
+        mentioned.update(changes["removed"])
+
+    renames: list[dict] = []
+    notes: list[dict] = []
+    usernames: dict[str, str] = {}
+    for old_account, new_account in _merge(old("accounts"), new("accounts"), _KEYS["accounts"]):
+        account = new_account or old_account
+        if account["id"] in mentioned:
+            usernames[account["id"]] = account["username"]
+        if old_account is None or new_account is None or old_account == new_account:
+            continue
+
+        if old_account["username"] != new_account["username"]:
+            renames.append(
+                {
+                    "id": account["id"],
+                    "from": old_account["username"],
+                    "to": new_account["username"],
+                    "oldNames": new_account.get("oldNames", []),
+                }
+            )
+        if old_account.get("notes", []) != new_account.get("notes", []):
+            usernames[account["id"]] = account["username"]
+            notes.append(
+                {
+                    "id": account["id"],
+                    "old": old_account.get("notes", []),
+                    "new": new_account.get("notes", []),
+                }
+            )
+    result["renames"] = renames
+    result["notes"] = notes
+    result["usernames"] = usernames
+
+    return result
+
+
+#
+# Command
+#
+
+
+def _file_sections(stack: ExitStack, path: "Path") -> Sections:
+    if is_sqlite(path):
+        backup = stack.enter_context(SqliteBackup(path))
+        return lambda section: getattr(backup, section)
+    if is_ndjson(path):
+        return lambda section: (record for _, record in read_records(path, {section}))
+    return backup_loader(path)
+
+
+def _snapshot_sections(store: SnapshotStore, snapshot_id: int) -> Sections:
+    def _section(section: str) -> Iterable[Any]:
+        if section == "lists":
+            return store.lists(snapshot_id)
+        return store.section(snapshot_id, section)
+
+    return _section
+
+
+def _print_ids(title: str, ids: list[str], usernames: dict[str, str]) -> None:
+    if ids:
+        print(f"{title}:")
+        for account_id in ids:
+            username = usernames.get(account_id)
+            print(f"  {username} ({account_id})" if username else f"  {account_id}")
+
+
+def _print_diff(result: dict) -> None:
+    usernames = result["usernames"]
+    following = result["following"]
+
+    sections = ("deleted", "lists", "renames", "notes", "payments")
+    if not (following["added"] or following["removed"] or any(result[k] for k in sections)):
+        print("No changes.")
+        return
+
+    _print_ids("Followed", following["added"], usernames)
+    _print_ids("Unfollowed", following["removed"], usernames)
+    _print_ids("Deleted", result["deleted"], usernames)
+
+    for label, changes in result["lists"].items():
+        status = " (new)" if changes.get("new") else " (removed)" if changes.get("gone") else ""
+        _print_ids(f"Added to '{label}'{status}", changes["added"], usernames)
+        _print_ids(f"Removed from '{label}'{status}", changes["removed"], usernames)
+
+    if result["renames"]:
+        print("Renamed:")
+        for rename in result["renames"]:
+            print(f"  {rename['from']} -> {rename['to']} ({rename['id']})")
+
+    if result["notes"]:
+        print("Notes changed:")
+        for note in result["notes"]:
+            username = usernames.get(note["id"], note["id"])
+            print(f"  {username}: {len(note['old'])} -> {len(note['new'])} note(s)")
+
+    if result["payments"]:
+        print("New payments:")
+        for payment in result["payments"]:
+            username = usernames.get(payment["accountId"], payment["accountId"])
+            print(f"  {username}: {payment['price'] / 1000}$")
+
+
+def diff(old: str, new: str, *, store_path: "Path | None" = None, as_json: bool = False) -> None:
+    """
+    Compare two backup files or, if a snapshot store is given, two snapshots by their ids or dates
+    """
+    with ExitStack() as stack:
+        if store_path:
+            store = stack.enter_context(SnapshotStore(store_path))
+            old_sections = _snapshot_sections(store, store.resolve(old))
+            new_sections = _snapshot_sections(store, store.resolve(new))
+        else:
+            old_sections = _file_sections(stack, Path(old))
+            new_sections = _file_sections(stack, Path(new))
+
+        result = diff_backups(old_sections, new_sections)
+
+    if as_json:
+        sys.stdout.write(dumps(result, pretty=True).decode() + "\n")
+    else:
+        _print_diff(result)
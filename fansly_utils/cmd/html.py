@@ -2,7 +2,8 @@ from typing import TYPE_CHECKING
 
 from jinja2 import Environment, PackageLoader, select_autoescape
 
-from .utils import contains, load_backup
+from ..codec import strip_compression
+from .database import Backup, open_backup
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -18,41 +19,39 @@ def _render(html_template: str, data: dict, output: "Path") -> None:
     template.stream(**data).dump(str(output))
 
 
-def _generate_html_table(db_file: "Path", data: dict) -> None:
-    data["accounts"].sort(key=lambda o: o["username"])
+def _generate_html_table(db_file: "Path", index: Backup) -> None:
+    labels = ["Following"]
+    for list_info in index.lists:
+        labels.append(list_info["label"])
 
     rows = []
-    for account_info in data["accounts"]:
+    for account_info in sorted(index.accounts, key=lambda o: o["username"]):
         account_id = account_info["id"]
 
-        row = [contains(data["following"], account_id)]
-        for list_info in data["lists"]:
-            row.append(contains(list_info["items"], account_id))
+        row = [index.is_followed(account_id)]
+        for label in labels[1:]:
+            row.append(index.in_list(label, account_id))
 
         rows.append(
             {
                 "id": account_id,
                 "username": account_info["username"],
-                "deleted": contains(data["deleted"], account_id),
+                "deleted": index.is_deleted(account_id),
                 "data": row,
                 "notes": account_info["notes"],
                 "oldNames": account_info["oldNames"],
             }
         )
 
-    labels = ["Following"]
-    for list_info in data["lists"]:
-        labels.append(list_info["label"])
-
-    _render("table.html", data=dict(labels=labels, rows=rows), output=db_file.with_suffix(".html"))
+    html_file = strip_compression(db_file).with_suffix(".html")
+    _render("table.html", data=dict(labels=labels, rows=rows), output=html_file)
 
 
-def _generate_html_charts(db_file: "Path", data: dict) -> None:
+def _generate_html_charts(db_file: "Path", index: Backup) -> None:
     pass  # TODO(obsessedcake): Implement this function.
 
 
 def generate_html(db_file: "Path") -> None:
-    data = load_backup(db_file)
-
-    for func in (_generate_html_table, _generate_html_charts):
-        func(db_file, data)
+    with open_backup(db_file) as index:
+        for func in (_generate_html_table, _generate_html_charts):
+            func(db_file, index)
@@ -0,0 +1,253 @@
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from ..ids import IdSet
+from .ndjson import SECTIONS
+from .utils import backup_loader, save_backup
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+__all__ = ["BackupIndex"]
+
+
+def _empty_backup() -> dict:
+    return {"accounts": [], "deleted": [], "following": [], "lists": [], "payments": []}
+
+
+class BackupIndex:
+    """
+    A backup data with O(1) lookups
+
+    The wrapped dict stays the source of truth and is exactly what gets saved, so all changes have
+    to go through this class to keep indexes in sync.
+
+    A loaded backup is lazy: a section is read from the file and indexed only once it's accessed,
+    so commands pay only for sections they use.
+    """
+
+    def __init__(
+        self,
+        data: dict | None = None,
+        *,
+        path: "Path | None" = None,
+        loader: Callable[[str], list] | None = None,
+    ) -> None:
+        self._data = data if data is not None else ({} if loader else _empty_backup())
+        self._path = path
+        self._loader = loader
+        self._indexed: set[str] = set()
+
+        self._accounts: dict[str, dict] = {}
+        self._usernames: dict[str, dict] = {}
+        self._deleted = IdSet()
+        self._following = IdSet()
+        self._lists: dict[str, dict] = {}
+        self._lists_items: dict[str, IdSet] = {}
+        self._payments: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, file_path: "Path") -> "BackupIndex":
+        return cls(path=file_path, loader=backup_loader(file_path))
+
+    def _section(self, name: str) -> list:
+        if name in self._indexed:
+            return self._data[name]
+
+        if name not in self._data:
+            self._data[name] = self._loader(name) if self._loader else []
+        section = self._data[name]
+
+        if name == "accounts":
+            for account in section:
+                account.setdefault("oldNames", [])
+                self._accounts[account["id"]] = account
+                self._usernames[account["username"]] = account
+        elif name == "deleted":
+            self._deleted = IdSet(section)
+        elif name == "following":
+            self._following = IdSet(section)
+        elif name == "lists":
+            for list_info in section:
+                self._lists[list_info["label"]] = list_info
+                self._lists_items[list_info["label"]] = IdSet(list_info["items"])
+        elif name == "payments":
+            self._payments = {p["transactionId"]: p for p in section}
+
+        self._indexed.add(name)
+        return section
+
+    def save(self, file_path: "Path | None" = None) -> None:
+        file_path = file_path or self._path
+        assert file_path, "there is no file to save the backup to"
+        save_backup(file_path, self.data)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "BackupIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def data(self) -> dict:
+        """The whole backup, all sections that haven't been accessed yet are loaded."""
+        for name in SECTIONS:
+            self._section(name)
+        return self._data
+
+    # accounts
+
+    @property
+    def accounts(self) -> list[dict]:
+        return self._section("accounts")
+
+    def alive_accounts(self) -> Iterator[dict]:
+        self._section("deleted")
+        return (a for a in self._section("accounts") if a["id"] not in self._deleted)
+
+    def account(self, account_id: str) -> dict | None:
+        self._section("accounts")
+        return self._accounts.get(account_id)
+
+    def account_by_username(self, username: str) -> dict | None:
+        self._section("accounts")
+        return self._usernames.get(username)
+
+    def add_account(self, account: dict) -> dict:
+        """Add an account unless there is already one with the same id, which is returned then."""
+        accounts = self._section("accounts")
+        if existing := self._accounts.get(account["id"]):
+            return existing
+
+        account.setdefault("oldNames", [])
+        accounts.append(account)
+        self._accounts[account["id"]] = account
+        self._usernames[account["username"]] = account
+        return account
+
+    def put_account(self, account: dict) -> None:
+        """
+        Add an account or update an existing one with the same id
+
+        A previous username and names history of the existing account are kept in its `oldNames`.
+        """
+        existing = self.account(account["id"])
+        if not existing:
+            self.add_account(account)
+            return
+
+        for name in account.get("oldNames", []):
+            if name != account["username"] and name not in existing["oldNames"]:
+                existing["oldNames"].append(name)
+        self.rename_account(existing, account["username"])
+
+        existing.update((k, v) for k, v in account.items() if k not in ("oldNames", "username"))
+
+    def rename_account(self, account: dict, new_name: str) -> None:
+        self._section("accounts")
+
+        old_name = account["username"]
+        if old_name == new_name:
+            return
+
+        if self._usernames.get(old_name) is account:
+            del self._usernames[old_name]
+
+        account["username"] = new_name
+        if old_name not in account["oldNames"]:
+            account["oldNames"].append(old_name)
+        self._usernames[new_name] = account
+
+    # deleted
+
+    @property
+    def deleted(self) -> list[str]:
+        return self._section("deleted")
+
+    def is_deleted(self, account_id: str) -> bool:
+        self._section("deleted")
+        return account_id in self._deleted
+
+    def mark_deleted(self, account_id: str) -> None:
+        deleted = self._section("deleted")
+        if account_id not in self._deleted:
+            self._deleted.add(account_id)
+            deleted.append(account_id)
+
+    def unmark_deleted(self, account_id: str) -> None:
+        deleted = self._section("deleted")
+        if account_id in self._deleted:
+            self._deleted.discard(account_id)
+            deleted.remove(account_id)
+
+    # following
+
+    @property
+    def following(self) -> list[str]:
+        return self._section("following")
+
+    def is_followed(self, account_id: str) -> bool:
+        self._section("following")
+        return account_id in self._following
+
+    def add_following(self, accounts_ids: Iterable[str]) -> None:
+        following = self._section("following")
+        for account_id in accounts_ids:
+            if account_id not in self._following:
+                self._following.add(account_id)
+                following.append(account_id)
+
+    # lists
+
+    @property
+    def lists(self) -> list[dict]:
+        return self._section("lists")
+
+    def list_by_label(self, label: str) -> dict | None:
+        self._section("lists")
+        return self._lists.get(label)
+
+    def in_list(self, label: str, account_id: str) -> bool:
+        self._section("lists")
+        items = self._lists_items.get(label)
+        return items is not None and account_id in items
+
+    def add_list(self, list_info: dict) -> dict:
+        """Add a list or merge its items into an existing one with the same label."""
+        lists = self._section("lists")
+        label = list_info["label"]
+
+        existing = self._lists.get(label)
+        if not existing:
+            lists.append(list_info)
+            self._lists[label] = list_info
+            self._lists_items[label] = IdSet(list_info["items"])
+            return list_info
+
+        items = self._lists_items[label]
+        for account_id in list_info["items"]:
+            if account_id not in items:
+                items.add(account_id)
+                existing["items"].append(account_id)
+        return existing
+
+    # payments
+
+    @property
+    def payments(self) -> list[dict]:
+        return self._section("payments")
+
+    def payment(self, transaction_id: str) -> dict | None:
+        self._section("payments")
+        return self._payments.get(transaction_id)
+
+    def add_payment(self, payment: dict) -> bool:
+        payments = self._section("payments")
+        if payment["transactionId"] in self._payments:
+            return False
+
+        payments.append(payment)
+        self._payments[payment["transactionId"]] = payment
+        return True
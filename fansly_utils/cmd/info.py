@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING
 
 from rich import print
 
+from ..records import Account
+
 if TYPE_CHECKING:
     from ..api import FanslyApi
 
@@ -16,4 +18,7 @@ def get_account_info(api: "FanslyApi", id: str, raw: bool) -> None:
     else:
         info = api.accounts().get(username=id, brief=brief)
 
+    if isinstance(info, Account):
+        info = info.to_dict()
+
     print(json.dumps(info, indent=4, sort_keys=True))
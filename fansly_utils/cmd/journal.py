@@ -0,0 +1,80 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..codec import dumps, loads
+
+__all__ = ["Journal"]
+
+
+class Journal:
+    """
+    An append-only log of completed steps, one JSON object per line
+
+    Every entry is flushed to disk as soon as it's appended, so whatever has been written survives
+    an interruption. A truncated last line, which is left by a crash in the middle of a write, is
+    ignored on read.
+    """
+
+    def __init__(self, path: "Path | str") -> None:
+        self._path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, file_path: "Path | str") -> "Journal":
+        """A journal that lives next to the given output file."""
+        file_path = Path(file_path)
+        return cls(file_path.with_name(file_path.name + ".journal"))
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def read(self) -> Iterator[dict[str, Any]]:
+        if not self._path.exists():
+            return
+
+        with self._path.open("rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # an interrupted write
+                yield loads(line)
+
+    def open(self, *, resume: bool) -> None:
+        """Open the journal for appending, a non-resumed one starts from scratch."""
+        self._file = self._path.open("ab" if resume else "wb")
+
+        # Drop a truncated last line, so new entries don't get glued to it.
+        if resume and self._file.tell():
+            with self._path.open("rb") as file:
+                data = file.read()
+            self._file.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, phase: str, **entry: Any) -> None:
+        assert self._file, "the journal is not opened"
+
+        data = dumps({"phase": phase, **entry}) + b"\n"
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        self._path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,108 @@
+"""
+Newline-delimited JSON backups
+
+Every line is a single record of some section, e.g. `{"section": "accounts", "data": {...}}`, so
+a backup is written and read record by record and is never held in memory as a whole document.
+Like any other backup file it's compressed if its name ends with `.gz` or `.zst`.
+
+Records of a section are contiguous and the section tag always comes first in a line. Thus a
+reader that only needs some sections skips the other ones without parsing them and stops once
+it has passed all sections it needs. The huge "accounts" section is written last for that reason.
+"""
+
+from typing import TYPE_CHECKING, Any, Collection, Iterable, Iterator
+
+from ..codec import dumps, loads, open_atomic, open_file, strip_compression
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+__all__ = ["backup_records", "is_ndjson", "read_records", "write_records"]
+
+
+NDJSON_SUFFIXES: tuple[str, ...] = (".ndjson", ".jsonl")
+
+FORMAT_VERSION: int = 1
+
+# Sections in the order they are written, every record of a list section is a single item.
+SECTIONS: tuple[str, ...] = ("deleted", "following", "lists", "payments", "accounts")
+
+_HEADER = "header"
+_TAG_PREFIX = b'{"section":"'
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def is_ndjson(path: "Path | str") -> bool:
+    return strip_compression(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def _record(section: str, data: Any) -> bytes:
+    return b"".join(
+        (_TAG_PREFIX, section.encode(), b'","data":', dumps(data, sort_keys=True), b"}\n")
+    )
+
+
+def _section_of(line: bytes) -> str:
+    if line.startswith(_TAG_PREFIX):
+        tag, _ = line.removeprefix(_TAG_PREFIX).split(b'"', 1)
+        return tag.decode()
+    return loads(line)["section"]  # e.g. a hand-written file
+
+
+def read_records(
+    path: "Path | str", sections: Collection[str] | None = None
+) -> Iterator[tuple[str, Any]]:
+    """
+    read_records("backup.ndjson.gz") --> ("deleted", "123"), ..., ("accounts", {...})
+
+    Only records of the given `sections` are parsed and returned, if they are specified.
+    """
+    pending = set(sections) if sections is not None else None
+    current = None
+    current_tag = b"\0"  # records of a section are contiguous, so its tag is checked first
+
+    with open_file(path) as f:
+        for line in f:
+            if line.startswith(current_tag):
+                section = current
+            elif not line.strip():
+                continue
+            else:
+                section = _section_of(line)
+                current_tag = b"".join((_TAG_PREFIX, section.encode(), b'"'))
+
+            if section != current:
+                if pending is not None:
+                    pending.discard(current)  # type: ignore[arg-type]
+                    if not pending:
+                        return
+                current = section
+
+            if section == _HEADER:
+                if loads(line)["data"]["version"] > FORMAT_VERSION:
+                    raise ValueError(f"'{path}' has unsupported version of the format")
+                continue
+
+            if pending is None or section in pending:
+                yield section, loads(line)["data"]
+
+
+def write_records(path: "Path | str", records: Iterable[tuple[str, Any]]) -> None:
+    with open_atomic(path) as f:
+        buffer = bytearray(_record(_HEADER, {"version": FORMAT_VERSION}))
+
+        for section, data in records:
+            buffer += _record(section, data)
+
+            # Compressors are way faster with large chunks than with separate lines.
+            if len(buffer) >= _WRITE_BUFFER_SIZE:
+                f.write(buffer)
+                buffer.clear()
+
+        f.write(buffer)
+
+
+def backup_records(data: dict) -> Iterator[tuple[str, Any]]:
+    for section in SECTIONS:
+        for item in data[section]:
+            yield section, item
@@ -6,7 +6,7 @@ import inflect
 from dateutil.relativedelta import relativedelta
 from rich import print
 
-from .utils import find_by, load_backup
+from .database import Backup, open_backup
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -47,11 +47,12 @@ def _pretty_timedelta(delta: relativedelta) -> str:
 _DATE_FORMAT = "%b %d %Y"
 
 
-def _calculate_total_spending(data: dict) -> None:
-    payments = data["payments"]
+def _calculate_total_spending(index: Backup) -> None:
+    payments = index.payments
 
-    first_payment = _convert_ts(payments[0]["createdAt"])
-    last_payment = _convert_ts(payments[-1]["createdAt"])
+    # Payments are sorted by their transaction ids, which are not guaranteed to be chronological.
+    first_payment = _convert_ts(min(payment["createdAt"] for payment in payments))
+    last_payment = _convert_ts(max(payment["createdAt"] for payment in payments))
     total = sum(payment["price"] for payment in payments) / 1000
     delta = relativedelta(last_payment, first_payment)
 
@@ -62,7 +63,7 @@ def _calculate_total_spending(data: dict) -> None:
     def _(data) -> str:
         return f"[bold red]{data}[/bold red]"
 
-    if delta:
+    if delta_str:
         print(
             f"You have spent {_(total)}$ in total during {_(delta_str)} in period "
             f"from {_(first_payment_str)} to {_(last_payment_str)}!"
@@ -73,40 +74,26 @@ def _calculate_total_spending(data: dict) -> None:
         )
 
 
-def _distribute_by_accounts(data: dict) -> None:
-    result: list[dict] = []
-    for payment in data["payments"]:
-        entry = find_by(result, key="accountId", value=payment["accountId"])
-        if entry:
-            entry["price"] += payment["price"]
-        else:
-            result.append({"accountId": payment["accountId"], "price": payment["price"]})
+def _distribute_by_accounts(index: Backup) -> None:
+    result: dict[str, int] = {}
+    for payment in index.payments:
+        account_id = payment["accountId"]
+        result[account_id] = result.get(account_id, 0) + payment["price"]
 
-    result.sort(key=lambda e: e["price"])
+    for account_id, price in sorted(result.items(), key=lambda e: e[1]):
+        account_info = index.account(account_id)
+        name = account_info["username"] if account_info else account_id
+        print(f"{name}: {price / 1000}$")
 
-    for entry in result:
-        account_info = find_by(data["accounts"], key="id", value=entry["accountId"])
-        if account_info:
-            entry["accountId"] = account_info["username"]
 
-    for entry in result:
-        print(f'{entry["accountId"]}: {entry["price"] / 1000}$')
-
-
-def _distribute_by_years(data: dict) -> None:
-    result: list[dict] = []
-    for payment in data["payments"]:
+def _distribute_by_years(index: Backup) -> None:
+    result: dict[int, int] = {}
+    for payment in index.payments:
         year = _convert_ts(payment["createdAt"]).year
-        entry = find_by(result, key="year", value=year)
-        if entry:
-            entry["price"] += payment["price"]
-        else:
-            result.append({"year": year, "price": payment["price"]})
-
-    result.sort(key=lambda e: e["year"])
+        result[year] = result.get(year, 0) + payment["price"]
 
-    for entry in result:
-        print(f'{entry["year"]}: {entry["price"] / 1000}$')
+    for year, price in sorted(result.items()):
+        print(f"{year}: {price / 1000}$")
 
 
 #
@@ -128,9 +115,9 @@ _PROCESSORS = {
 
 
 def process_payments(db_file: "Path", processor: PaymentsProcessor) -> None:
-    data = load_backup(db_file)
-    if not data["payments"]:
-        print("No payments found!")
-        return
+    with open_backup(db_file) as index:
+        if not index.payments:
+            print("No payments found!")
+            return
 
-    _PROCESSORS[processor](data)
+        _PROCESSORS[processor](index)
@@ -0,0 +1,341 @@
+"""
+Versioned history of backups
+
+Every snapshot is a set of sections, each one is a sorted list of items (accounts, ids, lists,
+payments). A section is split into chunks at content-defined boundaries, i.e. after items whose
+key hashes to a certain value, so adding or changing a single item changes only its own chunk.
+Chunks are stored once by their SHA-256 and a snapshot is just a manifest of chunk hashes, thus
+daily snapshots of mostly unchanged data cost next to nothing. Chunks of ids are stored as packed
+64-bit integers, the other ones as JSON.
+
+Usernames are additionally indexed by the first snapshot they've been seen in, so the history of
+renames is answered without touching snapshots at all.
+"""
+
+import hashlib
+import sqlite3
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from rich import print
+
+from ..codec import dumps, loads
+from .database import open_backup
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+__all__ = ["SnapshotStore", "show_history", "take_snapshot"]
+
+
+# A chunk ends after an item whose key hash is divisible by this, i.e. it has ~64 items on average.
+CHUNK_BOUNDARY: int = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_created_at ON snapshots (created_at);
+
+CREATE TABLE IF NOT EXISTS manifests (
+    snapshot_id INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, section, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS names (
+    account_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    PRIMARY KEY (account_id, username)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS names_username ON names (username);
+"""
+
+_LIST_ITEMS_PREFIX = "list:"
+
+
+def _is_ids(section: str) -> bool:
+    return section in ("deleted", "following") or section.startswith(_LIST_ITEMS_PREFIX)
+
+
+def _key(section: str, item: Any) -> str:
+    if section == "accounts":
+        return item["id"]
+    if section == "lists":
+        return item["label"]
+    if section == "payments":
+        return item["transactionId"]
+    return item  # a list of ids
+
+
+def _sections(data: dict) -> Iterator[tuple[str, list]]:
+    """Split a backup into sorted sections, items of every list are a section on its own."""
+    yield "accounts", sorted(data["accounts"], key=lambda o: o["id"])
+    yield "deleted", sorted(data["deleted"])
+    yield "following", sorted(data["following"])
+    yield "payments", sorted(data["payments"], key=lambda o: o["transactionId"])
+
+    lists = sorted(data["lists"], key=lambda o: o["label"])
+    yield "lists", [{k: v for k, v in o.items() if k != "items"} for o in lists]
+    for list_info in lists:
+        yield _LIST_ITEMS_PREFIX + list_info["label"], sorted(list_info["items"])
+
+
+def _pack_ids(ids: list[str]) -> bytes:
+    """
+    Ids as little-endian 64-bit integers
+
+    Unlike `IdSet.tobytes`, ids keep their order, i.e. they stay sorted as strings just like
+    accounts are, so both can be merged by id.
+    """
+    packed = array("Q", map(int, ids))
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_ids(data: bytes) -> Iterator[str]:
+    packed = array("Q")
+    packed.frombytes(data)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return map(str, packed)
+
+
+def _chunks(section: str, items: list) -> Iterator[list]:
+    chunk: list = []
+    for item in items:
+        chunk.append(item)
+        if zlib.crc32(_key(section, item).encode()) % CHUNK_BOUNDARY == 0:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_date(value: str) -> float:
+    """
+    Parse an ISO date into a timestamp
+
+    A date without time means the end of that day, so snapshots taken during it are included.
+    """
+    moment = datetime.fromisoformat(value)
+    if len(value) <= len("YYYY-MM-DD"):
+        moment += timedelta(days=1)
+    return moment.timestamp()
+
+
+class SnapshotStore:
+    """A SQLite-backed store of deduplicated backup snapshots."""
+
+    def __init__(self, path: "Path | str") -> None:
+        self._path = Path(path)
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "SnapshotStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    # writing
+
+    def add(self, data: dict, created_at: float | None = None) -> tuple[int, int, int]:
+        """
+        Add a snapshot of a backup
+
+        :returns: an id of the snapshot, a number of its chunks and how many of them are new.
+        """
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO snapshots (created_at) VALUES (?)", (created_at or time.time(),)
+            )
+            snapshot_id = cursor.lastrowid
+            assert snapshot_id is not None
+
+            total = new = 0
+            for section, items in _sections(data):
+                manifest: list[tuple[int, str, int, str]] = []
+                for position, chunk in enumerate(_chunks(section, items)):
+                    if _is_ids(section):
+                        payload = _pack_ids(chunk)
+                    else:
+                        payload = dumps(chunk, sort_keys=True)
+                    digest = hashlib.sha256(payload).hexdigest()
+
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO chunks VALUES (?, ?)",
+                        (digest, zlib.compress(payload)),
+                    )
+                    new += cursor.rowcount
+                    total += 1
+                    manifest.append((snapshot_id, section, position, digest))
+
+                self._db.executemany("INSERT INTO manifests VALUES (?, ?, ?, ?)", manifest)
+
+            self._db.executemany(
+                "INSERT OR IGNORE INTO names VALUES (?, ?, ?)",
+                [(a["id"], a["username"], snapshot_id) for a in data["accounts"]],
+            )
+
+        return snapshot_id, total, new
+
+    # reading
+
+    def snapshots(self) -> list[tuple[int, float]]:
+        return self._db.execute("SELECT id, created_at FROM snapshots ORDER BY id").fetchall()
+
+    def snapshot_at(self, timestamp: float) -> int | None:
+        """An id of the latest snapshot taken before the given moment."""
+        row = self._db.execute(
+            "SELECT id FROM snapshots WHERE created_at < ? ORDER BY created_at DESC LIMIT 1",
+            (timestamp,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def section(self, snapshot_id: int, section: str) -> Iterator[Any]:
+        rows = self._db.execute(
+            "SELECT c.data FROM manifests m JOIN chunks c ON c.hash = m.hash "
+            "WHERE m.snapshot_id = ? AND m.section = ? ORDER BY m.position",
+            (snapshot_id, section),
+        )
+        for (data,) in rows:
+            if _is_ids(section):
+                yield from _unpack_ids(zlib.decompress(data))
+            else:
+                yield from loads(zlib.decompress(data))
+
+    def lists(self, snapshot_id: int) -> Iterator[dict]:
+        for list_info in self.section(snapshot_id, "lists"):
+            items = self.section(snapshot_id, _LIST_ITEMS_PREFIX + list_info["label"])
+            yield {**list_info, "items": list(items)}
+
+    def load(self, snapshot_id: int) -> dict:
+        """Rebuild the whole backup as it was at the given snapshot."""
+        data: dict[str, Any] = {
+            section: list(self.section(snapshot_id, section))
+            for section in ("accounts", "deleted", "following", "payments")
+        }
+        data["lists"] = list(self.lists(snapshot_id))
+        return data
+
+    def resolve(self, value: str) -> int:
+        """A snapshot id given as is, e.g. `12`, or as a date of the latest snapshot by then."""
+        if value.isdigit():
+            snapshot_id = int(value)
+            if self._db.execute("SELECT 1 FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone():
+                return snapshot_id
+            raise ValueError(f"There is no snapshot #{value}")
+
+        found = self.snapshot_at(parse_date(value))
+        if found is None:
+            raise ValueError(f"There are no snapshots before {value}")
+        return found
+
+    def names(self, account: str) -> list[tuple[str, float]]:
+        """
+        All usernames of an account, given by its id or any username, with the moments they've
+        been seen for the first time.
+        """
+        return self._db.execute(
+            "SELECT n.username, s.created_at FROM names n JOIN snapshots s ON s.id = n.snapshot_id "
+            "WHERE n.account_id = ? "
+            "OR n.account_id IN (SELECT account_id FROM names WHERE username = ?) "
+            "ORDER BY s.created_at",
+            (account, account),
+        ).fetchall()
+
+
+#
+# Commands
+#
+
+
+def _format_ts(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def take_snapshot(logger: "Logger", db_file: "Path", store_path: "Path") -> None:
+    logger.info("Taking a snapshot of '%s' file into '%s' store...", db_file, store_path)
+    with open_backup(db_file) as backup, SnapshotStore(store_path) as store:
+        data = {
+            "accounts": list(backup.accounts),
+            "deleted": backup.deleted,
+            "following": backup.following,
+            "lists": backup.lists,
+            "payments": backup.payments,
+        }
+        snapshot_id, total, new = store.add(data)
+
+    logger.info("Snapshot #%s has %s chunk(s), %s of them are new", snapshot_id, total, new)
+
+
+def show_history(
+    store_path: "Path",
+    *,
+    snapshots: bool = False,
+    following_at: str | None = None,
+    names_of: str | None = None,
+) -> None:
+    with SnapshotStore(store_path) as store:
+        if snapshots:
+            for snapshot_id, created_at in store.snapshots():
+                print(f"#{snapshot_id}: {_format_ts(created_at)}")
+
+        if following_at:
+            snapshot_id = store.snapshot_at(parse_date(following_at))
+            if snapshot_id is None:
+                print(f"There are no snapshots before {following_at}!")
+                return
+
+            usernames = _usernames(store, snapshot_id, store.section(snapshot_id, "following"))
+            for account_id, username in usernames:
+                print(f"{username} ({account_id})" if username else account_id)
+
+        if names_of:
+            names = store.names(names_of)
+            if not names:
+                print(f"'{names_of}' has never been seen!")
+
+            for username, seen_at in names:
+                print(f"{_format_ts(seen_at)}: {username}")
+
+
+def _usernames(
+    store: SnapshotStore, snapshot_id: int, accounts_ids: Iterable[str]
+) -> list[tuple[str, str | None]]:
+    # Both sections are sorted by string ids, so they are merged without loading accounts into a
+    # dict.
+    accounts = store.section(snapshot_id, "accounts")
+    account = next(accounts, None)
+
+    result: list[tuple[str, str | None]] = []
+    previous = None
+    for account_id in accounts_ids:
+        if previous is not None and account_id < previous:
+            raise ValueError("Ids of a snapshot are not sorted, take it again with `snapshot`")
+        previous = account_id
+
+        while account and account["id"] < account_id:
+            account = next(accounts, None)
+        username = account["username"] if account and account["id"] == account_id else None
+        result.append((account_id, username))
+    return result
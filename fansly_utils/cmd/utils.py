@@ -1,15 +1,23 @@
-import json
-from typing import TYPE_CHECKING, Iterable
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+from ..api import Paginator
+from ..codec import dump, load
+from .ndjson import SECTIONS, backup_records, is_ndjson, read_records, write_records
 
 if TYPE_CHECKING:
     from pathlib import Path
 
+    from ..aio import AsyncFanslyApi
+    from ..api import FanslyApi
+    from ..records import Payment
+
 __all__ = [
-    "contains",
+    "backup_loader",
     "extract_ids",
-    "find_by",
+    "gather",
     "load_backup",
-    "merge_lists",
+    "payments_pages",
     "save_backup",
 ]
 
@@ -24,38 +32,110 @@ def save_backup(file_path: "Path", data: dict) -> None:
     for items in data["lists"]:
         items["items"].sort()
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4, sort_keys=True)
+    if is_ndjson(file_path):
+        write_records(file_path, backup_records(data))
+    else:
+        dump(file_path, data, pretty=True, sort_keys=True)
 
 
 def load_backup(file_path: "Path") -> dict:
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if not is_ndjson(file_path):
+        return load(file_path)
+
+    data: dict[str, list] = {section: [] for section in SECTIONS}
+    for section, record in read_records(file_path):
+        data.setdefault(section, []).append(record)
+    return data
 
 
-# https://stackoverflow.com/questions/38346013
-def contains(data: list[str], item: str) -> bool:
-    low = 0
-    high = len(data) - 1
-    while low <= high:
-        mid = (low + high) // 2
-        if data[mid] == item:
-            return True
-        if item < data[mid]:
-            high = mid - 1
-        else:
-            low = mid + 1
-    return False
+def backup_loader(file_path: "Path") -> Callable[[str], list]:
+    """
+    Make a function that loads a single section of a backup file
 
+    Only the requested section is parsed from a NDJSON file. A JSON file can't be parsed partially,
+    so it's parsed once and then its sections are handed out one by one.
+    """
+    if is_ndjson(file_path):
+        return lambda section: [record for _, record in read_records(file_path, {section})]
 
-# https://stackoverflow.com/questions/9542738
-def find_by(iterable: Iterable[dict], *, key: str, value: str) -> dict | None:
-    return next(filter(lambda o: o[key] == value, iterable), None)
+    data: dict | None = None
 
+    def _load(section: str) -> list:
+        nonlocal data
+        if data is None:
+            data = load(file_path)
+        return data.pop(section, [])
 
-def merge_lists(lhs: list[str], rhs: list[str]) -> list[str]:
-    return list(set(lhs) | set(rhs))
+    return _load
 
 
 def extract_ids(iterable: Iterable[dict], *, key: str = "id") -> list[str]:
     return [o[key] for o in iterable]
+
+
+def payments_pages(
+    api: "FanslyApi", *, start: int = 0, is_known: Callable[["Payment"], bool] | None = None
+) -> Iterator[list["Payment"]]:
+    """
+    Iterate over pages of user's payments, the newest ones come first.
+
+    If `is_known` is given, iteration stops after the first page with a known payment, as the
+    history only grows and thus everything older is known too.
+    """
+    # Balance purchases are filtered out, so a short page doesn't mean the last one.
+    pages = Paginator(
+        lambda kwarg: api.user().payments().get_batch(**kwarg),
+        start=start,
+        stop_on_short_page=False,
+        prefetch=is_known is None,  # an incremental sync usually needs a single page
+    )
+
+    for page in pages:
+        yield page
+
+        if is_known and any(is_known(payment) for payment in page):
+            return
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def gather(
+    api: "FanslyApi",
+    func: Callable[["AsyncFanslyApi", T], Awaitable[R]],
+    items: Iterable[T],
+    *,
+    on_result: Callable[[T, R], None] | None = None,
+    limit: int | None = None,
+) -> list[R]:
+    """
+    Call `func` for every item concurrently and return results in the same order.
+
+    All calls are made on the shared event loop of `api`, see `FanslyApi.run`.
+
+    `on_result` is called with an item and its result as soon as the latter is available. If
+    `limit` is given, at most that many calls are in progress at once, so large batches don't
+    reserve rate limiter slots far ahead of their requests.
+    """
+
+    async def _call(aio_api: "AsyncFanslyApi", item: T, semaphore: asyncio.Semaphore) -> R:
+        async with semaphore:
+            result = await func(aio_api, item)
+        if on_result:
+            on_result(item, result)
+        return result
+
+    async def _gather(aio_api: "AsyncFanslyApi") -> list[R]:
+        items_list = list(items)
+        semaphore = asyncio.Semaphore(limit or max(len(items_list), 1))
+        tasks = [asyncio.ensure_future(_call(aio_api, item, semaphore)) for item in items_list]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # The loop outlives this call, so calls left after a failure have to be cancelled here.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    return api.run(_gather)
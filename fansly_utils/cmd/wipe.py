@@ -1,12 +1,26 @@
-from typing import TYPE_CHECKING
-
-from ..api import chunks, offset
-from .utils import extract_ids
+import threading
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Callable
+
+from ..api import chunks
+from ..codec import dump
+from ..ids import IdSet
+from .journal import Journal
+from .utils import gather
+from .wipe_plan import (
+    COLLECTION_ITEMS_BATCH_SIZE,
+    Record,
+    WipePlan,
+    WipeProgress,
+    apply_entry,
+    take_inventory,
+)
 
 if TYPE_CHECKING:
     from logging import Logger
     from pathlib import Path
 
+    from ..aio import AsyncFanslyApi
     from ..api import FanslyApi
 
 __all__ = ["wipe"]
@@ -22,161 +36,185 @@ Are you sure? [y/N]
 """
 
 
-def _inspect_payments(api: "FanslyApi", logger: "Logger") -> set[str]:
-    logger.info("Inspecting all user's payments")
-    accounts_ids: set[str] = set()
-
-    for payments_chunk in offset(lambda kwarg: api.user().payments().get_batch(**kwarg)):
-        accounts_ids |= set(extract_ids(payments_chunk, key="accountId"))
-
+def _read_accounts(backup_path: "Path") -> IdSet:
+    accounts_ids = IdSet()
+    if backup_path.exists():
+        with backup_path.open("r", encoding="utf-8") as file:
+            accounts_ids |= (line.rstrip() for line in file if line.strip())
     return accounts_ids
 
 
-def _wipe_user_lists(api: "FanslyApi", logger: "Logger") -> set[str]:
-    logger.info("Wiping all user's lists")
-    accounts_ids: set[str] = set()
+def _write_accounts(backup_path: "Path", accounts_ids: IdSet) -> None:
+    with backup_path.open("w", encoding="utf-8") as file:
+        for account_id in accounts_ids:
+            file.write(account_id)
+            file.write("\n")
 
-    for list_info in api.lists().get_all(only_ids=False):
-        logger.info("Wiping '%s' user's list", list_info["label"])
-
-        list_id = list_info["id"]
-        list_items = api.lists().items().get_all(list_id)
-
-        accounts_ids |= set(list_items)
 
-        api.lists().items().delete(list_id, accounts_ids=list_items)
-        api.lists().delete(list_id)
-
-    return accounts_ids
+def _log_plan(api: "FanslyApi", logger: "Logger", plan: WipePlan) -> None:
+    logger.info(
+        "Found %s list(s) with %s item(s)",
+        len(plan.lists),
+        sum(len(o["items"]) for o in plan.lists),
+    )
+    logger.info(
+        "Found %s collection(s) with %s item(s)",
+        len(plan.collections),
+        sum(len(o["items"]) for o in plan.collections),
+    )
+    logger.info("Found %s post(s) and comment(s)", len(plan.posts))
+    logger.info(
+        "Found %s message(s) in %s chat(s)",
+        sum(len(o["messages"]) for o in plan.chats),
+        len(plan.chats),
+    )
+    logger.info("Found %s followed account(s)", len(plan.following))
+    logger.info("Found %s note(s)", len(plan.notes))
+    logger.info("Found %s web session(s)", len(plan.sessions))
 
+    estimate = timedelta(seconds=round(plan.estimate(api.rate_limiter)))
+    logger.info("Wiping takes %s request(s) and about %s", sum(plan.requests().values()), estimate)
 
-def _wipe_user_collections(api: "FanslyApi", logger: "Logger") -> set[str]:
-    logger.info("Wiping all user's collections")
-    accounts_ids: set[str] = set()
 
-    for collection in api.collections().get_all(brief=True):
-        collection_id = collection["id"]
-        collection_type = collection["type"]
+#
+# Execution
+#
 
-        if collection_type == 2007:  # purchases
-            continue
 
-        logger.info("Wiping %r user's collections", collection["title"])
+def _on_removed(
+    record: Record, kind: str, ids: Callable[[Any], list[str]] = lambda item: [item]
+) -> Callable[[Any, Any], None]:
+    return lambda item, _: record("removed", kind=kind, ids=ids(item))
 
-        while True:
-            items = api.collections().items().get_batch(collection_id=collection_id)
-            if not items:
-                break
 
-            items_ids: list[str] = []
-            for item in items:
-                accounts_ids.add(item["accountId"])
-                items_ids.append(item["id"])
+def _wipe_user_lists(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
+    logger.info("Wiping all user's lists")
 
-            api.collections().items().delete(collection_id=collection_id, items_ids=items_ids)
+    async def _wipe_user_list(aio_api: "AsyncFanslyApi", list_info: dict) -> None:
+        logger.info("Wiping '%s' user's list", list_info["label"])
+        await aio_api.lists().items().delete(list_info["id"], accounts_ids=list_info["items"])
+        await aio_api.lists().delete(list_info["id"])
 
-        if not collection_type:  # user's collections
-            api.collections().delete(collection_id=collection_id)
+    gather(
+        api,
+        _wipe_user_list,
+        plan.lists,
+        on_result=_on_removed(record, "lists", lambda list_info: [list_info["id"]]),
+        limit=api.max_concurrency,
+    )
 
-    return accounts_ids
 
+def _wipe_user_collections(
+    api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record
+) -> None:
+    logger.info("Wiping all user's collections")
 
-def _wipe_user_comments(api: "FanslyApi", logger: "Logger") -> None:
+    batches = [
+        (collection["id"], list(items_ids))
+        for collection in plan.collections
+        for items_ids in chunks(collection["items"], COLLECTION_ITEMS_BATCH_SIZE)
+    ]
+    gather(
+        api,
+        lambda aio_api, batch: aio_api.collections()
+        .items()
+        .delete(collection_id=batch[0], items_ids=batch[1]),
+        batches,
+        on_result=_on_removed(record, "collection_items", lambda batch: batch[1]),
+        limit=api.max_concurrency,
+    )
+
+    gather(
+        api,
+        lambda aio_api, collection: aio_api.collections().delete(collection_id=collection["id"]),
+        [collection for collection in plan.collections if collection["owned"]],
+        on_result=_on_removed(record, "collections", lambda collection: [collection["id"]]),
+        limit=api.max_concurrency,
+    )
+
+
+def _wipe_user_comments(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
     logger.info("Removing all user's comments")
-    accounts_ids: set[str] = set()
-
-    self_id = api.user().id()
-    params = {
-        "before": "0",
-        "after": 0,
-        "type": [1002, 1004, 1005, 2002, 5003],  # likes, post replies, post quotes
-    }
-
-    while True:
-        response = api._session.get_json("/notifications", params=params)
-
-        notifications = response["notifications"]
-        if not notifications:
-            break
-
-        params["before"] = notifications[-1]
-
-        for post in response["posts"]:
-            post_account_id = post["accountId"]
-
-            if post_account_id != self_id:
-                accounts_ids.add(post_account_id)
-                continue
 
-            post_id = post["id"]
-            if api.posts().get(post_id=post_id):  # let's skip already deleted posts.
-                api.posts().delete(post_id=post_id)
-
-    return accounts_ids
+    gather(
+        api,
+        lambda aio_api, post_id: aio_api.posts().delete(post_id=post_id),
+        plan.posts,
+        on_result=_on_removed(record, "posts"),
+        limit=api.max_concurrency,
+    )
 
 
-def _wipe_user_messages(api: "FanslyApi", logger: "Logger") -> None:
+def _wipe_user_messages(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
     logger.info("Removing all user's messages")
-    accounts_ids: set[str] = set()
-
-    for chats in offset(lambda kwarg: api.chats().get_batch(**kwarg)):
-        for chat in chats:
-            partner_id = chat["partnerAccountId"]
-            accounts_ids.add(partner_id)
 
-            logger.info("Inspecting chat with %r", chat["partnerUsername"])
+    # Messages of all chats share a single queue, so requests are sent at full concurrency even
+    # when chats are small, while chats are still reported one by one as they are emptied.
+    chats = [chat for chat in plan.chats if chat["messages"]]
+    left = {chat["id"]: len(chat["messages"]) for chat in chats}
+    wiped = 0
 
-            oldest_msg_id = "0"
-            while True:
-                messages = (
-                    api.chats()
-                    .messages()
-                    .get_batch(chat_id=chat["id"], oldest_msg_id=oldest_msg_id, brief=True)
-                )
-                if not messages:
-                    break
+    def _on_message_removed(message: tuple[dict, str], _: None) -> None:
+        nonlocal wiped
+        chat, msg_id = message
+        record("removed", kind="messages", ids=[msg_id])
 
-                for message in messages:
-                    if message["senderId"] != partner_id:
-                        api.chats().messages().delete(message_id=message["id"])
+        left[chat["id"]] -= 1
+        if not left[chat["id"]]:
+            wiped += 1
+            logger.info(
+                "Removed %s message(s) from chat with %r (%s/%s chats)",
+                len(chat["messages"]),
+                chat["partnerUsername"],
+                wiped,
+                len(chats),
+            )
 
-                oldest_msg_id = message["id"]
+    gather(
+        api,
+        lambda aio_api, message: aio_api.chats().messages().delete(message_id=message[1]),
+        [(chat, msg_id) for chat in chats for msg_id in chat["messages"]],
+        on_result=_on_message_removed,
+        limit=api.max_concurrency,
+    )
 
-    return accounts_ids
 
-
-def _unfollow(api: "FanslyApi", logger: "Logger") -> set[str]:
+def _unfollow(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
     logger.info("Unfollowing all accounts that the user follows")
-    accounts_ids: set[str] = set()
 
-    while True:
-        followings = api.user().following().get_batch()
-        if not followings:
-            break
+    gather(
+        api,
+        lambda aio_api, account_id: aio_api.user().following().unfollow(account_id),
+        plan.following,
+        on_result=_on_removed(record, "following"),
+        limit=api.max_concurrency,
+    )
 
-        for account_id in followings:
-            api.user().following().unfollow(account_id)
-            accounts_ids.add(account_id)
 
-    return accounts_ids
+def _wipe_user_notes(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
+    logger.info("Wipe all available user's notes")
 
+    gather(
+        api,
+        lambda aio_api, note: aio_api.notes().delete(
+            account_id=note["accountId"], note_id=note["id"]
+        ),
+        plan.notes,
+        on_result=_on_removed(record, "notes", lambda note: [note["id"]]),
+        limit=api.max_concurrency,
+    )
 
-def _wipe_user_notes(api: "FanslyApi", logger: "Logger", accounts_ids: set[str]) -> None:
-    logger.info("Wipe all available user's notes")
 
-    for chunk in chunks(accounts_ids):
-        for account in api.accounts().get_batch(accounts_ids=chunk):
-            notes = account.get("notes")
-            if not notes:
-                continue
+def _wipe_sessions(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
+    logger.info("Removing all user's web sessions")
 
-            logger.info(
-                "Wiping %s note(s) from '%s' account",
-                len(notes),
-                account["username"],
-            )
-            for note in notes:
-                api.notes().delete(account_id=account["id"], note_id=note["id"])
+    gather(
+        api,
+        lambda aio_api, session_id: aio_api.sessions().close(session_id=session_id),
+        plan.sessions,
+        on_result=_on_removed(record, "sessions"),
+        limit=api.max_concurrency,
+    )
 
 
 def _wipe_subscriptions(api: "FanslyApi", logger: "Logger") -> None:
@@ -188,49 +226,80 @@ def _wipe_subscriptions(api: "FanslyApi", logger: "Logger") -> None:
         api.user().subscriptions().unsubscribe(sub_id=sub_id)
 
 
-def _wipe_sessions(api: "FanslyApi", logger: "Logger") -> None:
-    logger.info("Removing all user's web sessions")
-
-    while True:
-        sessions = api.sessions().get_batch()
-        sessions.pop(0)  # don't close current session
-
-        if not sessions:
-            break
-
-        for session_id in sessions:
-            api.sessions().close(session_id=session_id)
-
-
-def wipe(api: "FanslyApi", logger: "Logger", backup_path: "Path", no_warning: bool) -> None:
-    if not no_warning:
-        answer = input(_WIPE_WARNING)
-        if (not answer) or (answer.lower() in ("n", "no")):
+def wipe(
+    api: "FanslyApi",
+    logger: "Logger",
+    backup_path: "Path",
+    no_warning: bool,
+    plan_path: "Path | None" = None,
+    resume: bool = False,
+    notes_from: "Path | None" = None,
+) -> None:
+    """
+    Wipe the account in two steps: a read-only inventory makes a plan, which is then executed
+
+    If `plan_path` is given, the plan is saved there and nothing is removed. Notes are taken from
+    the `notes_from` backup instead of fetching every account, if it's given.
+    """
+    payments_path = backup_path.with_name(backup_path.name + ".payments")
+    plan = WipePlan(accounts=_read_accounts(backup_path))
+    progress = WipeProgress()
+
+    journal = Journal.for_file(backup_path)
+    if resume and journal.exists():
+        logger.info("Resuming from the '%s' journal...", journal.path)
+        for entry in journal.read():
+            apply_entry(entry, plan, progress)
+        plan.prune(progress.removed)
+    elif journal.exists():
+        logger.warning(
+            "Discarding the '%s' journal of an interrupted wipe, use --resume to continue it",
+            journal.path,
+        )
+
+    lock = threading.Lock()
+
+    def _record(phase: str, **entry: Any) -> None:
+        with lock:  # inventory steps are run by several threads
+            journal.append(phase, **entry)
+            apply_entry({"phase": phase, **entry}, plan, progress)
+
+    with journal:
+        journal.open(resume=resume)
+
+        with api.phase("inventory"):
+            take_inventory(api, logger, plan, progress, _record, payments_path, notes_from)
+        _log_plan(api, logger, plan)
+
+        if plan_path:
+            dump(plan_path, plan.to_dict(), pretty=True)
+            logger.info("The wipe plan is saved to '%s'", plan_path)
+            journal.remove()
             return
 
-    accounts_ids: set[str] = set()
-    if backup_path.exists():
-        with backup_path.open("r", encoding="utf-8") as file:
-            for line in file:
-                accounts_ids.add(line.rstrip())
+        if not no_warning:
+            answer = input(_WIPE_WARNING)
+            if (not answer) or (answer.lower() in ("n", "no")):
+                journal.remove()
+                return
+
+        # Everything the plan relates to is known now, so it's saved before anything is removed.
+        _write_accounts(backup_path, plan.accounts)
+        if plan.newest_payment:
+            dump(payments_path, plan.newest_payment)
 
-    try:
         for wipe in (
-            _inspect_payments,
             _wipe_user_lists,
             _wipe_user_collections,
             _wipe_user_comments,
             _wipe_user_messages,
             _unfollow,
+            _wipe_user_notes,
         ):
-            accounts_ids |= wipe(api, logger)
+            with api.phase(wipe.__name__.lstrip("_")):
+                wipe(api, logger, plan, _record)
 
-        _wipe_user_notes(api, logger, accounts_ids)
-    finally:
-        with backup_path.open("w", encoding="utf-8") as file:
-            for account_id in accounts_ids:
-                file.write(account_id)
-                file.write("\n")
+        _wipe_subscriptions(api, logger)
+        _wipe_sessions(api, logger, plan, _record)
 
-    _wipe_subscriptions(api, logger)
-    _wipe_sessions(api, logger)
+    journal.remove()
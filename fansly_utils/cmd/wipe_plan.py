@@ -0,0 +1,505 @@
+"""
+A plan of a wipe
+
+A wipe starts with a read-only inventory of everything that is going to be removed. The plan tells
+how many requests the removal takes and how long it's going to be, and can be saved for review
+without touching the account at all.
+
+Both the inventory and the removal are recorded to a journal page by page, so an interrupted wipe
+is continued from the cursors it stopped at, e.g. in the middle of a chat history.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import count
+from math import ceil
+from typing import TYPE_CHECKING, Any, Callable
+
+from ..aio import AsyncPaginator
+from ..api import DEFAULT_LIMIT_VALUE, Paginator, chunks, fan_out, offset
+from ..codec import load
+from ..ids import IdSet
+from .database import open_backup
+from .utils import gather, payments_pages
+
+if TYPE_CHECKING:
+    from logging import Logger
+    from pathlib import Path
+
+    from ..aio import AsyncFanslyApi
+    from ..api import FanslyApi
+    from ..ratelimit import RateLimiter
+    from ..records import Chat, Payment, UserList
+
+__all__ = ["WipePlan", "WipeProgress", "apply_entry", "take_inventory"]
+
+
+# Collection items are removed with a single request for this many of them.
+COLLECTION_ITEMS_BATCH_SIZE: int = 100
+
+_COLLECTION_PURCHASES = 2007
+
+
+@dataclass
+class WipePlan:
+    """Everything a wipe removes, each kind of content is removed by its own step."""
+
+    lists: list[dict] = field(default_factory=list)  # {"id", "label", "items"}
+    collections: list[dict] = field(default_factory=list)  # {"id", "title", "owned", "items"}
+    posts: list[str] = field(default_factory=list)
+    # {"id", "partnerAccountId", "partnerUsername", "messages"}
+    chats: list[dict] = field(default_factory=list)
+    following: list[str] = field(default_factory=list)
+    notes: list[dict] = field(default_factory=list)  # {"accountId", "id"}
+    sessions: list[str] = field(default_factory=list)
+    accounts: IdSet = field(default_factory=IdSet)  # every account the wiped content relates to
+
+    # A newest inspected payment, it's saved once the plan is executed.
+    newest_payment: dict | None = None
+
+    def requests(self) -> dict[str, int]:
+        """Amounts of requests by an endpoint they are sent to."""
+        return {
+            "/lists/items/remove": sum(1 for o in self.lists if o["items"]),
+            "/lists/remove": len(self.lists),
+            "/uservault/album/content/delete": sum(
+                ceil(len(o["items"]) / COLLECTION_ITEMS_BATCH_SIZE) for o in self.collections
+            ),
+            "/uservault/album/delete": sum(1 for o in self.collections if o["owned"]),
+            "/post/0/delete": len(self.posts),
+            "/message/delete": sum(len(o["messages"]) for o in self.chats),
+            "/account/0/followers/remove": len(self.following),
+            "/notes/delete": len(self.notes),
+            "/session/close": len(self.sessions),
+        }
+
+    def estimate(self, rate_limiter: "RateLimiter") -> float:
+        """Roughly how many seconds it takes to execute the plan."""
+        return sum(rate_limiter.estimate(url, count) for url, count in self.requests().items())
+
+    def prune(self, removed: dict[str, set[str]]) -> None:
+        """Drop everything that has already been removed, ids are grouped by a kind of content."""
+
+        def _kept(kind: str, ids: list[str]) -> list[str]:
+            return [i for i in ids if i not in removed[kind]]
+
+        self.lists = [o for o in self.lists if o["id"] not in removed["lists"]]
+        for collection in self.collections:
+            collection["items"] = _kept("collection_items", collection["items"])
+        self.collections = [o for o in self.collections if o["id"] not in removed["collections"]]
+        self.posts = _kept("posts", self.posts)
+        for chat in self.chats:
+            chat["messages"] = _kept("messages", chat["messages"])
+        self.following = _kept("following", self.following)
+        self.notes = [o for o in self.notes if o["id"] not in removed["notes"]]
+        self.sessions = _kept("sessions", self.sessions)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "lists": self.lists,
+            "collections": self.collections,
+            "posts": self.posts,
+            "chats": self.chats,
+            "following": self.following,
+            "notes": self.notes,
+            "sessions": self.sessions,
+            "accounts": list(self.accounts),
+            "newestPayment": self.newest_payment,
+            "requests": self.requests(),
+        }
+
+
+@dataclass
+class WipeProgress:
+    """What has already been inspected and removed according to a journal."""
+
+    done: set[str] = field(default_factory=set)  # completed inventory steps
+    collections: dict[str, str] = field(default_factory=dict)  # a cursor of the next page
+    drained: set[str] = field(default_factory=set)  # fully inspected collections
+    notifications: str = "0"  # a cursor of the next page
+    seen_posts: set[str] = field(default_factory=set)  # already looked up own posts
+    messages: dict[str, str] = field(default_factory=dict)  # a cursor of the next page by chat
+    finished_chats: set[str] = field(default_factory=set)
+    following: int = 0  # an offset of the next page
+    notes: IdSet = field(default_factory=IdSet)  # accounts whose notes are known
+    removed: dict[str, set[str]] = field(default_factory=lambda: defaultdict(set))
+
+
+def _find(items: list[dict], item_id: str) -> dict | None:
+    return next((item for item in items if item["id"] == item_id), None)
+
+
+def apply_entry(entry: dict, plan: WipePlan, progress: WipeProgress) -> None:
+    phase = entry["phase"]
+
+    if entry.get("done"):
+        progress.done.add(phase)
+    elif phase == "payments":
+        plan.accounts |= entry["accounts"]
+        plan.newest_payment = entry["newest"]
+    elif phase == "lists":
+        plan.lists.append(entry["list"])
+        plan.accounts |= entry["list"]["items"]
+    elif phase == "collections":
+        info = entry["collection"]
+        collection = _find(plan.collections, info["id"])
+        if not collection:
+            collection = {**info, "items": []}
+            plan.collections.append(collection)
+
+        if entry.get("finished"):
+            progress.drained.add(info["id"])
+        else:
+            collection["items"].extend(entry["items"])
+            plan.accounts |= entry["accounts"]
+            progress.collections[info["id"]] = entry["before"]
+    elif phase == "comments":
+        plan.accounts |= entry["accounts"]
+        plan.posts.extend(entry["existing"])
+        progress.seen_posts.update(entry["posts"])
+        progress.notifications = entry["before"]
+    elif phase == "chats":
+        plan.chats.extend({**chat, "messages": []} for chat in entry["chats"])
+        plan.accounts |= (chat["partnerAccountId"] for chat in entry["chats"])
+    elif phase == "messages":
+        if entry.get("finished"):
+            progress.finished_chats.add(entry["chat"])
+        else:
+            chat = _find(plan.chats, entry["chat"])
+            assert chat, "messages of an unknown chat"
+            chat["messages"].extend(entry["ids"])
+            progress.messages[entry["chat"]] = entry["before"]
+    elif phase == "following":
+        plan.following.extend(entry["ids"])
+        plan.accounts |= entry["ids"]
+        progress.following = entry["offset"] + DEFAULT_LIMIT_VALUE
+    elif phase == "notes":
+        plan.notes.extend(entry["notes"])
+        plan.accounts |= (note["accountId"] for note in entry["notes"])
+        progress.notes |= entry["ids"]
+    elif phase == "sessions":
+        plan.sessions = entry["ids"]
+    elif phase == "removed":
+        progress.removed[entry["kind"]].update(entry["ids"])
+
+
+#
+# Inventory
+#
+
+Record = Callable[..., None]
+
+
+def _inspect_payments(
+    api: "FanslyApi", logger: "Logger", newest_path: "Path", record: Record
+) -> None:
+    """
+    Collect accounts from payments
+
+    Accounts of already inspected payments are kept in a wipe backup, so only payments newer than
+    the newest one saved to `newest_path` are fetched.
+    """
+    newest = load(newest_path) if newest_path.exists() else None
+
+    def _is_known(payment: "Payment") -> bool:
+        assert newest
+        if payment.transaction_id == newest["transactionId"]:
+            return True
+        return payment.created_at < newest["createdAt"]
+
+    if newest:
+        logger.info("Inspecting new user's payments")
+    else:
+        logger.info("Inspecting all user's payments")
+
+    accounts_ids = IdSet()
+    first = None
+    for payments_chunk in payments_pages(api, is_known=_is_known if newest else None):
+        if payments_chunk and not first:
+            first = payments_chunk[0]
+        accounts_ids |= (payment.account_id for payment in payments_chunk)
+
+    newest_payment = None
+    if first and (not newest or first.created_at >= newest["createdAt"]):
+        newest_payment = {"transactionId": first.transaction_id, "createdAt": first.created_at}
+
+    record("payments", accounts=list(accounts_ids), newest=newest_payment)
+
+
+def _inspect_lists(api: "FanslyApi", logger: "Logger", plan: WipePlan, record: Record) -> None:
+    logger.info("Inspecting user's lists")
+
+    def _inspect_list(user_list: "UserList") -> None:
+        items = api.lists().items().get_all(user_list.id)
+        record("lists", list={"id": user_list.id, "label": user_list.label, "items": items})
+
+    inspected = {list_info["id"] for list_info in plan.lists}
+    fan_out(
+        _inspect_list,
+        [o for o in api.lists().get_all(only_ids=False) if o.id not in inspected],
+        workers=api.workers,
+    )
+
+
+def _inspect_collections(
+    api: "FanslyApi", logger: "Logger", progress: WipeProgress, record: Record
+) -> None:
+    logger.info("Inspecting user's collections")
+
+    def _inspect_collection(collection: dict) -> None:
+        collection_id = collection["id"]
+        info = {
+            "id": collection_id,
+            "title": collection["title"],
+            "owned": not collection["type"],  # user's collections
+        }
+
+        pages = Paginator(
+            lambda kwarg: api.collections()
+            .items()
+            .get_batch(
+                collection_id=collection_id, oldest_id=kwarg["before"], limit=kwarg["limit"]
+            ),
+            cursor=lambda items: items[-1].id,
+            start=progress.collections.get(collection_id, "0"),
+            # Items are deduplicated by their media, so a short page doesn't mean the last one.
+            stop_on_short_page=False,
+        )
+        for items in pages:
+            record(
+                "collections",
+                collection=info,
+                before=items[-1].id,
+                items=[item.id for item in items],
+                accounts=[item.account_id for item in items],
+            )
+
+        record("collections", collection=info, finished=True)
+
+    collections = [
+        collection
+        for collection in api.collections().get_all(brief=True)
+        if collection["type"] != _COLLECTION_PURCHASES and collection["id"] not in progress.drained
+    ]
+    fan_out(_inspect_collection, collections, workers=api.workers)
+
+
+def _inspect_comments(
+    api: "FanslyApi", logger: "Logger", progress: WipeProgress, record: Record
+) -> None:
+    logger.info("Inspecting user's comments")
+
+    self_id = api.user().id()
+    params = {
+        "after": 0,
+        "type": [1002, 1004, 1005, 2002, 5003],  # likes, post replies, post quotes
+    }
+
+    pages = Paginator(
+        lambda kwarg: api._session.get_json("/notifications", params={**params, **kwarg}),
+        cursor=lambda response: response["notifications"][-1]["id"],
+        start=progress.notifications,
+        count=lambda response: len(response["notifications"]),
+        stop_on_short_page=False,
+    )
+    for response in pages:
+        posts = response["posts"]
+
+        # The same post is mentioned by many notifications, but it's looked up only once.
+        own_posts_ids = list(
+            dict.fromkeys(
+                post["id"]
+                for post in posts
+                if post["accountId"] == self_id and post["id"] not in progress.seen_posts
+            )
+        )
+        # Let's skip already deleted posts, a whole page of them is checked at once.
+        existing = api.posts().get_batch(posts_ids=own_posts_ids)
+
+        record(
+            "comments",
+            before=response["notifications"][-1]["id"],
+            accounts=[post["accountId"] for post in posts if post["accountId"] != self_id],
+            posts=own_posts_ids,
+            existing=[post["id"] for post in existing],
+        )
+
+
+def _inspect_chats(
+    api: "FanslyApi", logger: "Logger", plan: WipePlan, progress: WipeProgress, record: Record
+) -> None:
+    logger.info("Inspecting user's messages")
+
+    if "chats" not in progress.done:
+        chats: list["Chat"] = []
+        for chats_chunk in offset(lambda kwarg: api.chats().get_batch(**kwarg)):
+            chats.extend(chats_chunk)
+
+        record(
+            "chats",
+            chats=[
+                {
+                    "id": chat.id,
+                    "partnerAccountId": chat.partner_account_id,
+                    "partnerUsername": chat.partner_username,
+                }
+                for chat in chats
+            ],
+        )
+        record("chats", done=True)
+
+    # Every chat has a single page request in flight, so as many chats are paged at once as the API
+    # sends requests concurrently. They all share its rate limiter, so they never exceed its budget.
+    async def _inspect_chat(aio_api: "AsyncFanslyApi", chat: dict) -> None:
+        chat_id = chat["id"]
+        pages = AsyncPaginator(
+            lambda kwarg: aio_api.chats()
+            .messages()
+            .get_batch(
+                chat_id=chat_id, oldest_msg_id=kwarg["before"], limit=kwarg["limit"], brief=True
+            ),
+            cursor=lambda messages: messages[-1].id,
+            start=progress.messages.get(chat_id, "0"),
+        )
+        async for messages in pages:
+            record(
+                "messages",
+                chat=chat_id,
+                before=messages[-1].id,
+                ids=[m.id for m in messages if m.sender_id != chat["partnerAccountId"]],
+            )
+
+        record("messages", chat=chat_id, finished=True)
+
+    def _on_inspected(chat: dict, _: None) -> None:
+        logger.info(
+            "Found %s own message(s) in chat with %r (%s/%s chats)",
+            len(chat["messages"]),
+            chat["partnerUsername"],
+            len(progress.finished_chats),
+            len(plan.chats),
+        )
+
+    gather(
+        api,
+        _inspect_chat,
+        [chat for chat in plan.chats if chat["id"] not in progress.finished_chats],
+        on_result=_on_inspected,
+        limit=api.max_concurrency,
+    )
+
+
+def _inspect_following(
+    api: "FanslyApi", logger: "Logger", progress: WipeProgress, record: Record
+) -> None:
+    logger.info("Inspecting accounts that the user follows")
+
+    pages = offset(
+        lambda kwarg: api.user().following().get_batch(**kwarg), start=progress.following
+    )
+    for page_offset, ids in zip(count(progress.following, DEFAULT_LIMIT_VALUE), pages):
+        record("following", offset=page_offset, ids=ids)
+
+
+def _take_notes(
+    logger: "Logger", progress: WipeProgress, record: Record, backup_path: "Path"
+) -> None:
+    """Take notes from a backup, all accounts it knows about don't have to be fetched."""
+    logger.info("Taking user's notes from the '%s' backup", backup_path)
+
+    known = IdSet()
+    notes: list[dict] = []
+    with open_backup(backup_path) as backup:
+        known |= backup.deleted
+        for account in backup.accounts:
+            if account["id"] in progress.notes:
+                continue
+
+            known.add(account["id"])
+            notes.extend(
+                {"accountId": account["id"], "id": note["id"]} for note in account["notes"]
+            )
+
+    record("notes", ids=list(known - progress.notes), notes=notes)
+
+
+def _inspect_notes(
+    api: "FanslyApi",
+    logger: "Logger",
+    plan: WipePlan,
+    progress: WipeProgress,
+    record: Record,
+    backup_path: "Path | None",
+) -> None:
+    if backup_path:
+        _take_notes(logger, progress, record, backup_path)
+
+    unknown = plan.accounts - progress.notes
+    if unknown:
+        logger.info("Inspecting user's notes of %s account(s)", len(unknown))
+
+    gather(
+        api,
+        lambda aio_api, chunk: aio_api.accounts().get_batch(accounts_ids=chunk, brief=True),
+        list(chunks(unknown)),
+        on_result=lambda chunk, response: record(
+            "notes",
+            ids=chunk,
+            notes=[
+                {"accountId": account.id, "id": note.id}
+                for account in response
+                for note in account.notes
+            ],
+        ),
+        limit=api.max_concurrency,
+    )
+
+
+def _inspect_sessions(api: "FanslyApi", logger: "Logger", record: Record) -> None:
+    logger.info("Inspecting user's web sessions")
+
+    pages = Paginator(
+        lambda kwarg: api.sessions().get_batch(
+            oldest_session_id=kwarg["before"], limit=kwarg["limit"]
+        ),
+        cursor=lambda sessions: sessions[-1],
+    )
+
+    sessions_ids: list[str] = []
+    for page, sessions in enumerate(pages):
+        sessions_ids.extend(sessions[1:] if page == 0 else sessions)  # keep current session
+    record("sessions", ids=sessions_ids)
+
+
+def take_inventory(
+    api: "FanslyApi",
+    logger: "Logger",
+    plan: WipePlan,
+    progress: WipeProgress,
+    record: Record,
+    payments_path: "Path",
+    notes_from: "Path | None" = None,
+) -> None:
+    """
+    Find out everything a wipe is going to remove without changing anything
+
+    Found content is passed to `record`, which is expected to apply it to `plan` and `progress`.
+    Steps that `progress` marks as done are skipped and the rest continue from their cursors.
+
+    Notes are taken from the `notes_from` backup if it's given, only accounts it doesn't know
+    about are fetched to find their notes.
+    """
+    for step, inspect in (
+        ("payments", lambda: _inspect_payments(api, logger, payments_path, record)),
+        ("lists", lambda: _inspect_lists(api, logger, plan, record)),
+        ("collections", lambda: _inspect_collections(api, logger, progress, record)),
+        ("comments", lambda: _inspect_comments(api, logger, progress, record)),
+        ("messages", lambda: _inspect_chats(api, logger, plan, progress, record)),
+        ("following", lambda: _inspect_following(api, logger, progress, record)),
+        # Accounts that notes are looked for are found by all previous steps.
+        ("notes", lambda: _inspect_notes(api, logger, plan, progress, record, notes_from)),
+        ("sessions", lambda: _inspect_sessions(api, logger, record)),
+    ):
+        if step not in progress.done:
+            inspect()
+            record(step, done=True)
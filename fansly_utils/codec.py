@@ -0,0 +1,138 @@
+"""
+JSON encoding and decoding
+
+orjson is used when it's installed (`pip install fansly_utils[fast]`), stdlib json otherwise.
+Both paths work with raw UTF-8 bytes, so response bodies and backup files are never decoded into
+an intermediate string.
+
+Files ending with `.gz` or `.zst` are transparently (de)compressed, the latter requires zstandard
+(`pip install fansly_utils[zstd]`).
+"""
+
+import gzip
+import io
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from requests import Response
+
+__all__ = [
+    "dump",
+    "dumps",
+    "load",
+    "loads",
+    "loads_response",
+    "open_atomic",
+    "open_file",
+    "strip_compression",
+]
+
+COMPRESSION_SUFFIXES: tuple[str, ...] = (".gz", ".zst")
+
+GZIP_LEVEL: int = 6
+ZSTD_LEVEL: int = 10
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize `obj` into UTF-8 encoded JSON. Pretty output is indented with two spaces."""
+    if orjson:
+        option = 0
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+
+    text = json.dumps(
+        obj,
+        ensure_ascii=False,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+        sort_keys=sort_keys,
+    )
+    return text.encode("utf-8")
+
+
+def loads_response(response: "Response") -> Any:
+    """
+    Parse a response body
+
+    Unlike `Response.json()` it doesn't guess an encoding and doesn't build a decoded copy of the
+    body, which is as large as the body itself.
+    """
+    return loads(response.content)
+
+
+def strip_compression(path: "Path | str") -> Path:
+    """strip_compression("backup.ndjson.zst") --> Path("backup.ndjson")"""
+    path = Path(path)
+    if path.suffix.lower() in COMPRESSION_SUFFIXES:
+        return path.with_suffix("")
+    return path
+
+
+def open_file(path: "Path | str", mode: str = "rb") -> IO[bytes]:
+    """Open a binary file, which is (de)compressed according to its extension."""
+    suffix = Path(path).suffix.lower()
+
+    if suffix == ".gz":
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)  # type: ignore[return-value]
+
+    if suffix == ".zst":
+        if not zstandard:
+            raise RuntimeError(
+                "zstandard is required for .zst files: pip install fansly_utils[zstd]"
+            )
+        if "w" in mode:
+            return zstandard.open(path, mode, cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL))
+        return io.BufferedReader(zstandard.open(path, mode))  # the reader can't read lines
+
+    return open(path, mode)
+
+
+@contextmanager
+def open_atomic(path: "Path | str") -> Iterator[IO[bytes]]:
+    """
+    Open a file for writing, which replaces `path` only once everything has been written
+
+    This way a truncated file is never left behind if something goes wrong.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.stem}.tmp{path.suffix}")  # keep a compression suffix
+    try:
+        with open_file(tmp_path, "wb") as f:
+            yield f
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    tmp_path.replace(path)
+
+
+def load(path: "Path | str") -> Any:
+    with open_file(path) as f:
+        return loads(f.read())
+
+
+def dump(path: "Path | str", obj: Any, *, pretty: bool = False, sort_keys: bool = False) -> None:
+    data = dumps(obj, pretty=pretty, sort_keys=sort_keys)
+    with open_atomic(path) as f:
+        f.write(data)
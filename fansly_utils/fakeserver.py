@@ -0,0 +1,798 @@
+"""
+A local stand-in for fansly.com API
+
+It implements all endpoints used by `FanslyApi` on top of a synthetic dataset, which is generated
+lazily, so even millions of messages cost almost nothing until they are requested. The server can
+also add latency, enforce a rate limit and inject random 429 and 500 responses.
+
+    python -m fansly_utils.fakeserver --following 100000 --messages 1000000
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+__all__ = ["FakeBehavior", "FakeDataset", "FakeFanslyServer"]
+
+
+API_PREFIX: str = "/api/v1"
+PAGE_SIZE: int = 25
+
+_ACCOUNT_BASE: int = 400_000_000_000_000_000
+_LIST_BASE: int = 410_000_000_000_000_000
+_MESSAGE_BASE: int = 420_000_000_000_000_000
+_CHAT_BASE: int = 430_000_000_000_000_000
+_ALBUM_BASE: int = 440_000_000_000_000_000
+_ALBUM_ITEM_BASE: int = 450_000_000_000_000_000
+_MEDIA_BASE: int = 460_000_000_000_000_000
+_NOTIFICATION_BASE: int = 470_000_000_000_000_000
+_POST_BASE: int = 480_000_000_000_000_000
+_SESSION_BASE: int = 490_000_000_000_000_000
+_NOTE_BASE: int = 500_000_000_000_000_000
+_TRANSACTION_BASE: int = 510_000_000_000_000_000
+
+_PURCHASES_ALBUM_TYPE: int = 2007
+
+
+@dataclass
+class FakeDataset:
+    """A size of the synthetic dataset."""
+
+    accounts: int = 2000
+    following: int = 1000
+    followers: int = 100
+    lists: int = 10
+    list_items: int = 100  # per list
+    chats: int = 20
+    messages: int = 2000  # in total
+    collections: int = 3
+    collection_items: int = 50  # per collection
+    notifications: int = 100
+    payments: int = 500
+    sessions: int = 5
+    notes_ratio: float = 0.1
+    dead_ratio: float = 0.01
+
+
+@dataclass
+class FakeBehavior:
+    """How the server should misbehave."""
+
+    latency: float = 0.0  # seconds
+    rate_limit: int = 0  # requests per `rate_window`, 0 means unlimited
+    rate_window: float = 10.0  # seconds
+    throttle_ratio: float = 0.0  # a share of random 429 responses
+    retry_after: float = 1.0  # seconds
+    error_ratio: float = 0.0  # a share of random 500 responses
+    seed: int = 0
+
+
+def _every(ratio: float) -> int:
+    return round(1 / ratio) if ratio > 0 else 0
+
+
+class _IndexedSet:
+    """A set of integers in [0, size) with O(log n) removals and lookups by position."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._present = bytearray(b"\x01") * size
+        self._len = size
+
+        # https://en.wikipedia.org/wiki/Fenwick_tree#Construction
+        self._tree = [0] + [1] * size
+        for i in range(1, size + 1):
+            j = i + (i & -i)
+            if j <= size:
+                self._tree[j] += self._tree[i]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, i: int) -> bool:
+        return 0 <= i < self._size and bool(self._present[i])
+
+    def _update(self, i: int, delta: int) -> None:
+        i += 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def add(self, i: int) -> None:
+        if 0 <= i < self._size and not self._present[i]:
+            self._present[i] = 1
+            self._len += 1
+            self._update(i, 1)
+
+    def discard(self, i: int) -> None:
+        if i in self:
+            self._present[i] = 0
+            self._len -= 1
+            self._update(i, -1)
+
+    def _at(self, position: int) -> int:
+        i = 0
+        step = 1 << self._size.bit_length()
+        while step:
+            j = i + step
+            if j <= self._size and self._tree[j] <= position:
+                i = j
+                position -= self._tree[j]
+            step >>= 1
+        return i
+
+    def page(self, offset: int, limit: int) -> list[int]:
+        if offset >= self._len:
+            return []
+
+        result: list[int] = []
+        i = self._at(offset)
+        while i < self._size and len(result) < limit:
+            if self._present[i]:
+                result.append(i)
+            i += 1
+        return result
+
+
+class _FakeState:
+    def __init__(self, dataset: FakeDataset) -> None:
+        self.dataset = d = dataset
+        self.lock = threading.Lock()
+
+        self.dead_every = _every(d.dead_ratio)
+        self.notes_every = _every(d.notes_ratio)
+
+        self.following = _IndexedSet(min(d.following, d.accounts))
+        self.deleted_notes: set[int] = set()
+        self.added_notes: dict[int, list[dict]] = defaultdict(list)
+
+        self.lists: dict[int, dict[str, Any]] = {}
+        for n in range(d.lists):
+            items = {
+                self.account_id((n * d.list_items + k) % d.accounts): None
+                for k in range(d.list_items)
+            }
+            self.lists[_LIST_BASE + n] = {"label": f"list{n}", "items": items}
+        self.next_list_id = _LIST_BASE + d.lists
+
+        self.messages_per_chat = d.messages // d.chats if d.chats else 0
+        self.deleted_messages: set[int] = set()
+
+        self.collections: dict[int, int] = {_ALBUM_BASE + n: 0 for n in range(d.collections)}
+        self.collections[_ALBUM_BASE + d.collections] = _PURCHASES_ALBUM_TYPE
+        self.deleted_album_items: set[int] = set()
+
+        self.deleted_posts: set[int] = set()
+        self.sessions = _IndexedSet(d.sessions)
+
+    # accounts
+
+    def account_id(self, index: int) -> str:
+        return str(_ACCOUNT_BASE + 1 + index)
+
+    def account_index(self, account_id: str) -> int | None:
+        try:
+            index = int(account_id) - _ACCOUNT_BASE - 1
+        except ValueError:
+            return None
+        return index if 0 <= index < self.dataset.accounts else None
+
+    def is_dead(self, index: int) -> bool:
+        return bool(self.dead_every) and index % self.dead_every == self.dead_every - 1
+
+    def account(self, index: int) -> dict[str, Any]:
+        notes: list[dict] = []
+        if self.notes_every and index % self.notes_every == 0 and index not in self.deleted_notes:
+            notes.append(
+                {
+                    "id": str(_NOTE_BASE + index),
+                    "title": f"note{index}",
+                    "note": f"A note about creator{index}",
+                    "createdAt": 1_600_000_000_000 + index,
+                    "updatedAt": 1_600_000_000_000 + index,
+                }
+            )
+        notes.extend(self.added_notes.get(index, []))
+
+        return {
+            "id": self.account_id(index),
+            "username": f"creator{index}",
+            "displayName": f"Creator #{index}",
+            "notes": notes,
+        }
+
+    # chats
+
+    def chat_partner(self, chat: int) -> int:
+        return (chat * 7) % self.dataset.accounts
+
+    def messages(self, chat: int, before: int, limit: int) -> Iterator[dict]:
+        first = _MESSAGE_BASE + chat * self.messages_per_chat
+        last = first + self.messages_per_chat - 1
+        if before:
+            last = min(last, before - 1)
+
+        partner_id = self.account_id(self.chat_partner(chat))
+        message_id = last
+        count = 0
+        while message_id >= first and count < limit:
+            if message_id not in self.deleted_messages:
+                sender_id = partner_id if message_id % 2 else self.account_id(-1)
+                yield {"id": str(message_id), "senderId": sender_id, "content": "Hi!"}
+                count += 1
+            message_id -= 1
+
+    # payments
+
+    def payment(self, index: int) -> dict[str, Any]:
+        # The newest payments come first. A transaction only depends on its age, so a dataset with
+        # more payments looks like the same history with new payments on top.
+        n = self.dataset.payments - index
+
+        transaction = {"transactionId": str(_TRANSACTION_BASE + n), "type": 0}
+        if n % 10 == 0:  # a balance purchase
+            return transaction
+
+        account_id = self.account_id((n * 13) % self.dataset.accounts)
+        item: dict[str, Any] = {"productId": account_id, "productPrice": 1000 * (1 + n % 50)}
+        if n % 3:
+            item["metadata"] = json.dumps({"accountId": account_id})
+
+        created_at = 1_600_000_000_000 + n * 3_600_000
+        transaction["productOrder"] = {"createdAt": created_at, "items": [item]}
+        return transaction
+
+
+def _envelope(response: Any) -> dict:
+    return {"success": True, "response": response}
+
+
+def _int(value: str | None, default: int = 0) -> int:
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+_Route = tuple[str, re.Pattern, Callable]
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Clients open many connections at once, a tiny default backlog ends up in SYN retransmits.
+    request_queue_size = 128
+
+
+class FakeFanslyServer:
+    """
+    A threaded HTTP server that pretends to be fansly.com API
+
+    Use it as a context manager to run it in a background thread and point `FanslyApi` to
+    `base_url` property.
+    """
+
+    def __init__(
+        self,
+        dataset: FakeDataset | None = None,
+        behavior: FakeBehavior | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self._state = _FakeState(dataset or FakeDataset())
+        self._behavior = behavior or FakeBehavior()
+        self._random = random.Random(self._behavior.seed)
+
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+
+        self._stats_lock = threading.Lock()
+        self._requests: Counter[str] = Counter()
+        self._statuses: Counter[int] = Counter()
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+        self._routes: list[_Route] = [
+            ("GET", re.compile(r"^/account$"), self._get_accounts),
+            ("GET", re.compile(r"^/account/me$"), self._get_me),
+            ("GET", re.compile(r"^/account/(\d+)/followers$"), self._get_followers),
+            ("GET", re.compile(r"^/account/(\d+)/following$"), self._get_following),
+            ("POST", re.compile(r"^/account/(\d+)/followers$"), self._follow),
+            ("POST", re.compile(r"^/account/(\d+)/followers/remove$"), self._unfollow),
+            ("GET", re.compile(r"^/account/wallets/transactions$"), self._get_payments),
+            ("GET", re.compile(r"^/lists/account$"), self._get_lists),
+            ("GET", re.compile(r"^/lists/items$"), self._get_list_items),
+            ("POST", re.compile(r"^/lists$"), self._create_list),
+            ("POST", re.compile(r"^/lists/remove$"), self._delete_list),
+            ("POST", re.compile(r"^/lists/commands$"), self._add_list_items),
+            ("POST", re.compile(r"^/lists/items/remove$"), self._delete_list_items),
+            ("GET", re.compile(r"^/messaging/groups$"), self._get_chats),
+            ("GET", re.compile(r"^/message$"), self._get_messages),
+            ("POST", re.compile(r"^/message/delete$"), self._delete_message),
+            ("GET", re.compile(r"^/uservault/albumsnew$"), self._get_albums),
+            ("GET", re.compile(r"^/uservault/album/content$"), self._get_album_items),
+            ("POST", re.compile(r"^/uservault/albums$"), self._create_album),
+            ("POST", re.compile(r"^/uservault/album/delete$"), self._delete_album),
+            ("POST", re.compile(r"^/uservault/album/content/delete$"), self._delete_album_items),
+            ("POST", re.compile(r"^/notes$"), self._add_note),
+            ("POST", re.compile(r"^/notes/delete$"), self._delete_note),
+            ("GET", re.compile(r"^/notifications$"), self._get_notifications),
+            ("GET", re.compile(r"^/post$"), self._get_posts),
+            ("POST", re.compile(r"^/post/(\d+)/delete$"), self._delete_post),
+            ("GET", re.compile(r"^/sessions$"), self._get_sessions),
+            ("POST", re.compile(r"^/session/close$"), self._close_session),
+            ("GET", re.compile(r"^/subscriptions$"), self._get_subscriptions),
+        ]
+
+        self._server = _HTTPServer((host, port), self._make_handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def __enter__(self) -> "FakeFanslyServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": dict(self._requests),
+                "statuses": {str(k): v for k, v in self._statuses.items()},
+                "total": sum(self._requests.values()),
+                "bytesIn": self._bytes_in,
+                "bytesOut": self._bytes_out,
+            }
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._requests.clear()
+            self._statuses.clear()
+            self._bytes_in = self._bytes_out = 0
+
+    # transport
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server._handle(self, "GET")
+
+            def do_POST(self) -> None:
+                server._handle(self, "POST")
+
+        return _Handler
+
+    def _throttle(self) -> tuple[float | None, dict[str, str]]:
+        b = self._behavior
+        headers: dict[str, str] = {}
+
+        with self._stats_lock:
+            if b.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= b.rate_window:
+                    self._window_start = now
+                    self._window_requests = 0
+
+                self._window_requests += 1
+                reset = b.rate_window - (now - self._window_start)
+                remaining = max(b.rate_limit - self._window_requests, 0)
+
+                headers["X-RateLimit-Limit"] = str(b.rate_limit)
+                headers["X-RateLimit-Remaining"] = str(remaining)
+                headers["X-RateLimit-Reset"] = str(max(round(reset), 1))
+
+                if self._window_requests > b.rate_limit:
+                    return reset, headers
+
+            if b.throttle_ratio and self._random.random() < b.throttle_ratio:
+                return b.retry_after, headers
+
+        return None, headers
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, payload: Any, headers: dict):
+        body = json.dumps(payload).encode("utf-8")
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+        with self._stats_lock:
+            self._statuses[status] += 1
+            self._bytes_out += len(body)
+
+    def _route(self, method: str, path: str) -> tuple[re.Pattern, re.Match, Callable] | None:
+        for route_method, pattern, callback in self._routes:
+            if route_method == method and (match := pattern.match(path)):
+                return pattern, match, callback
+        return None
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        url = urlsplit(handler.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+
+        length = _int(handler.headers.get("Content-Length"))
+        raw_body = handler.rfile.read(length) if length else b""
+        body = json.loads(raw_body) if raw_body else {}
+
+        if url.path == "/__stats":
+            self._send(handler, 200, self.stats(), {})
+            return
+
+        path = url.path.removeprefix(API_PREFIX)
+        route = self._route(method, path)
+        if not route:
+            self._send(handler, 404, {"success": False, "error": "Not found"}, {})
+            return
+
+        pattern, match, callback = route
+
+        with self._stats_lock:
+            self._requests[f"{method} {pattern.pattern.strip('^$')}"] += 1
+            self._bytes_in += len(raw_body)
+
+        if self._behavior.latency:
+            time.sleep(self._behavior.latency)
+
+        retry_after, headers = self._throttle()
+        if retry_after is not None:
+            headers["Retry-After"] = str(max(round(retry_after), 1))
+            self._send(handler, 429, {"success": False, "error": "Too many requests"}, headers)
+            return
+
+        if self._behavior.error_ratio and self._random.random() < self._behavior.error_ratio:
+            self._send(handler, 500, {"success": False, "error": "Internal error"}, headers)
+            return
+
+        with self._state.lock:
+            response = callback(*match.groups(), query=query, body=body)
+
+        self._send(handler, 200, _envelope(response), headers)
+
+    # account
+
+    def _get_accounts(self, *, query: dict, body: dict) -> list[dict]:
+        s = self._state
+
+        indexes: list[int | None] = []
+        if ids := query.get("ids"):
+            indexes = [s.account_index(i) for i in ids.split(",")]
+        elif usernames := query.get("usernames"):
+            for username in usernames.split(","):
+                suffix = username.removeprefix("creator")
+                indexes.append(int(suffix) if suffix.isdigit() else None)
+
+        return [
+            s.account(i)
+            for i in indexes
+            if i is not None and i < s.dataset.accounts and not s.is_dead(i)
+        ]
+
+    def _get_me(self, *, query: dict, body: dict) -> dict:
+        return {"account": {"id": self._state.account_id(-1), "username": "me"}}
+
+    def _get_followers(self, account_id: str, *, query: dict, body: dict) -> list[dict]:
+        s = self._state
+        offset, limit = _int(query.get("offset")), _int(query.get("limit"), PAGE_SIZE)
+        end = min(offset + limit, s.dataset.followers)
+
+        return [
+            {"followerId": s.account_id(s.dataset.accounts - 1 - i)} for i in range(offset, end)
+        ]
+
+    def _get_following(self, account_id: str, *, query: dict, body: dict) -> list[dict]:
+        s = self._state
+        offset, limit = _int(query.get("offset")), _int(query.get("limit"), PAGE_SIZE)
+        return [{"accountId": s.account_id(i)} for i in s.following.page(offset, limit)]
+
+    def _follow(self, account_id: str, *, query: dict, body: dict) -> dict:
+        if (index := self._state.account_index(account_id)) is not None:
+            self._state.following.add(index)
+        return {}
+
+    def _unfollow(self, account_id: str, *, query: dict, body: dict) -> dict:
+        if (index := self._state.account_index(account_id)) is not None:
+            self._state.following.discard(index)
+        return {}
+
+    def _get_payments(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        offset, limit = _int(query.get("offset")), _int(query.get("limit"), PAGE_SIZE)
+        end = min(offset + limit, s.dataset.payments)
+        return {"data": [s.payment(i) for i in range(offset, end)]}
+
+    # lists
+
+    def _get_lists(self, *, query: dict, body: dict) -> list[dict]:
+        return [
+            {"id": str(list_id), "label": info["label"], "itemsCount": len(info["items"])}
+            for list_id, info in self._state.lists.items()
+        ]
+
+    def _get_list_items(self, *, query: dict, body: dict) -> list[dict]:
+        info = self._state.lists.get(_int(query.get("listId")))
+        return [{"id": account_id} for account_id in info["items"]] if info else []
+
+    def _create_list(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        list_id = s.next_list_id
+        s.next_list_id += 1
+
+        s.lists[list_id] = {"label": body.get("label", ""), "items": {}}
+        return {"id": str(list_id)}
+
+    def _delete_list(self, *, query: dict, body: dict) -> dict:
+        self._state.lists.pop(_int(body.get("listId")), None)
+        return {}
+
+    def _add_list_items(self, *, query: dict, body: dict) -> dict:
+        for command in body.get("listCommands", []):
+            item = command["listItem"]
+            if info := self._state.lists.get(_int(item["listId"])):
+                info["items"][item["id"]] = None
+        return {}
+
+    def _delete_list_items(self, *, query: dict, body: dict) -> dict:
+        if info := self._state.lists.get(_int(body.get("listId"))):
+            for account_id in body.get("listItemIds", []):
+                info["items"].pop(account_id, None)
+        return {}
+
+    # messages
+
+    def _get_chats(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        offset, limit = _int(query.get("offset")), _int(query.get("limit"), PAGE_SIZE)
+        end = min(offset + limit, s.dataset.chats)
+
+        data: list[dict] = []
+        for chat in range(offset, end):
+            partner = s.chat_partner(chat)
+            data.append(
+                {
+                    "groupId": str(_CHAT_BASE + chat),
+                    "partnerAccountId": s.account_id(partner),
+                    "partnerUsername": f"creator{partner}",
+                }
+            )
+        return {"data": data}
+
+    def _get_messages(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        chat = _int(query.get("groupId")) - _CHAT_BASE
+        if not 0 <= chat < s.dataset.chats:
+            return {"messages": []}
+
+        limit = _int(query.get("limit"), PAGE_SIZE)
+        return {"messages": list(s.messages(chat, _int(query.get("before")), limit))}
+
+    def _delete_message(self, *, query: dict, body: dict) -> dict:
+        self._state.deleted_messages.add(_int(body.get("messageId")))
+        return {}
+
+    # collections
+
+    def _get_albums(self, *, query: dict, body: dict) -> dict:
+        return {
+            "albums": [
+                {"id": str(album_id), "title": f"album{album_id - _ALBUM_BASE}", "type": type}
+                for album_id, type in self._state.collections.items()
+            ]
+        }
+
+    def _get_album_items(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        album = _int(query.get("albumId")) - _ALBUM_BASE
+        per_album = s.dataset.collection_items
+        limit = _int(query.get("limit"), PAGE_SIZE)
+
+        content: list[dict] = []
+        media: list[dict] = []
+        if _ALBUM_BASE + album in s.collections:
+            first = album * per_album
+            last = first + per_album - 1
+            if before := _int(query.get("before")):
+                last = min(last, before - _ALBUM_ITEM_BASE - 1)
+
+            for n in range(last, first - 1, -1):
+                if len(content) >= limit:
+                    break
+                if _ALBUM_ITEM_BASE + n in s.deleted_album_items:
+                    continue
+
+                media_id = str(_MEDIA_BASE + n)
+                content.append({"id": str(_ALBUM_ITEM_BASE + n), "mediaId": media_id})
+                media.append(
+                    {"mediaId": media_id, "accountId": s.account_id(n % s.dataset.accounts)}
+                )
+
+        return {"albumContent": content, "aggregationData": {"accountMedia": media}}
+
+    def _create_album(self, *, query: dict, body: dict) -> dict:
+        album_id = max(self._state.collections) + 1
+        self._state.collections[album_id] = 0
+        return {"id": str(album_id)}
+
+    def _delete_album(self, *, query: dict, body: dict) -> dict:
+        self._state.collections.pop(_int(body.get("albumId")), None)
+        return {}
+
+    def _delete_album_items(self, *, query: dict, body: dict) -> dict:
+        self._state.deleted_album_items.update(map(_int, body.get("albumContentIds", [])))
+        return {}
+
+    # notes
+
+    def _add_note(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        index = s.account_index(str(body.get("contentId")))
+        note_id = str(_NOTE_BASE + s.dataset.accounts + sum(map(len, s.added_notes.values())))
+
+        if index is not None:
+            s.added_notes[index].append(
+                {
+                    "id": note_id,
+                    "title": body.get("title", ""),
+                    "note": body.get("data", ""),
+                    "createdAt": int(time.time() * 1000),
+                    "updatedAt": int(time.time() * 1000),
+                }
+            )
+        return {"id": note_id}
+
+    def _delete_note(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        index = s.account_index(str(body.get("contentId")))
+        if index is None:
+            return {}
+
+        note_id = str(body.get("id"))
+        if note_id == str(_NOTE_BASE + index):
+            s.deleted_notes.add(index)
+        s.added_notes[index] = [n for n in s.added_notes.get(index, []) if n["id"] != note_id]
+        return {}
+
+    # posts
+
+    def _post(self, n: int) -> dict:
+        s = self._state
+        author = s.account_id(-1) if n % 2 == 0 else s.account_id(n % s.dataset.accounts)
+        return {"id": str(_POST_BASE + n), "accountId": author, "content": "Hello!"}
+
+    def _get_notifications(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        limit = _int(query.get("limit"), PAGE_SIZE)
+
+        last = s.dataset.notifications - 1
+        if before := _int(query.get("before")):
+            last = min(last, before - _NOTIFICATION_BASE - 1)
+
+        notifications: list[dict] = []
+        posts: list[dict] = []
+        for n in range(last, max(last - limit, -1), -1):
+            notifications.append({"id": str(_NOTIFICATION_BASE + n), "type": 1002})
+            if _POST_BASE + n not in s.deleted_posts:
+                posts.append(self._post(n))
+
+        return {"notifications": notifications, "posts": posts}
+
+    def _get_posts(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+
+        posts: list[dict] = []
+        for post_id in query.get("ids", "").split(","):
+            n = _int(post_id) - _POST_BASE
+            if 0 <= n < s.dataset.notifications and _POST_BASE + n not in s.deleted_posts:
+                posts.append(self._post(n))
+        return {"posts": posts}
+
+    def _delete_post(self, post_id: str, *, query: dict, body: dict) -> dict:
+        self._state.deleted_posts.add(_int(post_id))
+        return {}
+
+    # sessions
+
+    def _get_sessions(self, *, query: dict, body: dict) -> list[dict]:
+        s = self._state
+        limit = _int(query.get("limit"), PAGE_SIZE)
+        before = _int(query.get("before"))
+
+        # The newest one is the current session, it comes first.
+        result: list[dict] = []
+        for i in s.sessions.page(0, len(s.sessions)):
+            session_id = _SESSION_BASE + s.dataset.sessions - i
+            if before and session_id >= before:
+                continue
+            if len(result) >= limit:
+                break
+            result.append({"id": str(session_id)})
+        return result
+
+    def _close_session(self, *, query: dict, body: dict) -> dict:
+        s = self._state
+        index = s.dataset.sessions - (_int(body.get("id")) - _SESSION_BASE)
+        if index > 0:  # the current session can't be closed
+            s.sessions.discard(index)
+        return {}
+
+    # subscriptions
+
+    def _get_subscriptions(self, *, query: dict, body: dict) -> dict:
+        return {"subscriptions": []}
+
+
+def _add_dataclass_arguments(parser: ArgumentParser, cls: type, title: str) -> None:
+    group = parser.add_argument_group(title)
+    for f in fields(cls):
+        group.add_argument(
+            f"--{f.name.replace('_', '-')}", type=type(f.default), default=f.default, help=" "
+        )
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Run a local fake fansly.com API server.",
+        formatter_class=ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="An address to listen on.")
+    parser.add_argument("--port", type=int, default=8080, help="A port to listen on.")
+    _add_dataclass_arguments(parser, FakeDataset, "dataset")
+    _add_dataclass_arguments(parser, FakeBehavior, "behavior")
+    args = vars(parser.parse_args())
+
+    dataset = FakeDataset(**{f.name: args[f.name] for f in fields(FakeDataset)})
+    behavior = FakeBehavior(**{f.name: args[f.name] for f in fields(FakeBehavior)})
+
+    server = FakeFanslyServer(dataset, behavior, host=args["host"], port=args["port"])
+    print(f"Serving fake fansly.com API at {server.base_url}")
+    print(json.dumps({"dataset": asdict(dataset), "behavior": asdict(behavior)}, indent=4))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
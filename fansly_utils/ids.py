@@ -0,0 +1,171 @@
+"""
+Compact sets of account ids
+
+Ids are numeric snowflakes, so they are kept as a sorted `array("Q")` of 8-byte integers instead
+of a set of strings, which is several times smaller. Set operations merge sorted arrays with
+iterators that are implemented in C (`itertools.compress` over `operator` maps), so even sets of
+millions of ids are combined in a fraction of a second.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import chain, compress, filterfalse, islice
+from operator import eq, ne
+from typing import Iterable, Iterator
+
+__all__ = ["IdSet"]
+
+
+Id = str | int
+
+# Added ids are buffered in a plain set and merged into the array once there are enough of them.
+_MIN_PENDING: int = 4096
+
+
+def _sorted(ids: Iterable[Id]) -> array:
+    return array("Q", sorted({int(i) for i in ids}))
+
+
+def _to_array(ids: Iterable[Id]) -> array:
+    return ids._array() if isinstance(ids, IdSet) else _sorted(ids)
+
+
+def _merged(a: array, b: array) -> list[int]:
+    """Both arrays are sorted, so sorting their concatenation is just a single merge."""
+    items = a.tolist()
+    items += b.tolist()
+    items.sort()
+    return items
+
+
+def _first(items: list[int]) -> Iterator[int]:
+    """All items of a sorted list without repetitions."""
+    return compress(items, map(ne, items, chain((None,), items)))
+
+
+def _repeated(items: list[int]) -> Iterator[int]:
+    """Items that occur twice in a sorted list."""
+    return compress(items, map(eq, items, islice(items, 1, None)))
+
+
+class IdSet:
+    """
+    A set of numeric ids, e.g. accounts ids
+
+    It accepts ids both as strings and integers, but yields them as strings, as they are used by
+    the API and stored in backups.
+    """
+
+    __slots__ = ("_ids", "_pending")
+
+    def __init__(self, ids: Iterable[Id] = ()) -> None:
+        self._ids = array("Q", ids._array()) if isinstance(ids, IdSet) else _sorted(ids)
+        self._pending: set[int] = set()
+
+    @classmethod
+    def _from_sorted(cls, ids: Iterable[int]) -> "IdSet":
+        result = cls()
+        result._ids = array("Q", ids)
+        return result
+
+    def _array(self) -> array:
+        if self._pending:
+            pending = array("Q", sorted(self._pending))
+            self._ids = array("Q", _first(_merged(self._ids, pending)))
+            self._pending.clear()
+        return self._ids
+
+    def _position(self, i: int) -> int | None:
+        position = bisect_left(self._ids, i)
+        if position < len(self._ids) and self._ids[position] == i:
+            return position
+        return None
+
+    # serialization
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> "IdSet":
+        """Load ids saved by `tobytes`."""
+        ids = array("Q")
+        ids.frombytes(data)
+        if sys.byteorder == "big":
+            ids.byteswap()
+        return cls._from_sorted(ids)
+
+    def tobytes(self) -> bytes:
+        """Sorted ids as little-endian 64-bit integers."""
+        ids = self._array()
+        if sys.byteorder == "big":
+            ids = array("Q", ids)
+            ids.byteswap()
+        return ids.tobytes()
+
+    # set interface
+
+    def __len__(self) -> int:
+        return len(self._array())
+
+    def __bool__(self) -> bool:
+        return bool(self._ids) or bool(self._pending)
+
+    def __iter__(self) -> Iterator[str]:
+        return map(str, self._array())
+
+    def __contains__(self, account_id: object) -> bool:
+        try:
+            i = int(account_id)  # type: ignore[call-overload]
+        except (TypeError, ValueError):
+            return False
+        return i in self._pending or self._position(i) is not None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IdSet):
+            return NotImplemented
+        return self._array() == other._array()
+
+    def __repr__(self) -> str:
+        return f"IdSet({list(self)!r})"
+
+    def add(self, account_id: Id) -> None:
+        self._pending.add(int(account_id))
+        if len(self._pending) > max(_MIN_PENDING, len(self._ids) // 4):
+            self._array()
+
+    def update(self, *others: Iterable[Id]) -> None:
+        for other in others:
+            other_ids = _to_array(other)
+            if other_ids:
+                self._ids = array("Q", _first(_merged(self._array(), other_ids)))
+
+    def discard(self, account_id: Id) -> None:
+        i = int(account_id)
+        self._pending.discard(i)
+        position = self._position(i)
+        if position is not None:
+            del self._ids[position]
+
+    def union(self, *others: Iterable[Id]) -> "IdSet":
+        result = IdSet(self)
+        result.update(*others)
+        return result
+
+    def intersection(self, other: Iterable[Id]) -> "IdSet":
+        return IdSet._from_sorted(_repeated(_merged(self._array(), _to_array(other))))
+
+    def difference(self, other: Iterable[Id]) -> "IdSet":
+        # A lookup table of the other side beats a merge here, which would need two passes.
+        excluded = set(other._array()) if isinstance(other, IdSet) else {int(i) for i in other}
+        return IdSet._from_sorted(filterfalse(excluded.__contains__, self._array()))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def __ior__(self, other: Iterable[Id]) -> "IdSet":
+        self.update(other)
+        return self
+
+    def __isub__(self, other: Iterable[Id]) -> "IdSet":
+        self._ids = self.difference(other)._ids
+        return self
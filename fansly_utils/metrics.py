@@ -0,0 +1,205 @@
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+from .codec import dump
+
+__all__ = ["Metrics", "endpoint_template"]
+
+
+# Upper bounds of latency histogram buckets in seconds, as exported to Prometheus.
+LATENCY_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX: str = "fansly_utils"
+
+_ID_RE = re.compile(r"^\d+$")
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """
+    Reduce a request to its endpoint template
+
+    ("POST", "https://.../api/v1/account/123/followers") --> "POST /account/{id}/followers"
+    """
+    path = urlsplit(url).path.removeprefix("/api/v1")
+    segments = ["{id}" if _ID_RE.match(s) else s for s in path.split("/") if s]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+def _percentile(sorted_values: array, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # https://en.wikipedia.org/wiki/Percentile#The_nearest-rank_method
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+@dataclass
+class _EndpointMetrics:
+    latencies: array = field(default_factory=lambda: array("d"))
+    statuses: Counter = field(default_factory=Counter)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    cached: int = 0
+    sleep: float = 0.0
+
+    def summary(self) -> dict[str, Any]:
+        latencies = array("d", sorted(self.latencies))
+        return {
+            "requests": len(latencies),
+            "cached": self.cached,
+            "latency": {
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else 0.0,
+                "sum": math.fsum(latencies),
+            },
+            "bytesIn": self.bytes_in,
+            "bytesOut": self.bytes_out,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "throttled": self.statuses.get(429, 0),
+            "sleep": self.sleep,
+        }
+
+
+class Metrics:
+    """
+    Thread-safe per-endpoint request metrics
+
+    An instance is owned by a session and thus shared by all API objects that use it.
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: dict[str, _EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method: str, url: str) -> _EndpointMetrics:
+        template = endpoint_template(method, url)
+        metrics = self._endpoints.get(template)
+        if not metrics:
+            metrics = _EndpointMetrics()
+            self._endpoints[template] = metrics
+        return metrics
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        *,
+        status: int,
+        latency: float,
+        bytes_in: int,
+        bytes_out: int,
+    ) -> None:
+        """Record a request that has been sent over the network."""
+        with self._lock:
+            metrics = self._endpoint(method, url)
+            metrics.latencies.append(latency)
+            metrics.statuses[status] += 1
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+
+    def record_cached(self, method: str, url: str) -> None:
+        """Record a request that has been served from a cache."""
+        with self._lock:
+            self._endpoint(method, url).cached += 1
+
+    def record_sleep(self, method: str, url: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+
+        with self._lock:
+            self._endpoint(method, url).sleep += seconds
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            endpoints = {name: m.summary() for name, m in sorted(self._endpoints.items())}
+
+        total: dict[str, Any] = {
+            "requests": 0,
+            "cached": 0,
+            "bytesIn": 0,
+            "bytesOut": 0,
+            "throttled": 0,
+            "sleep": 0.0,
+            "latency": 0.0,
+        }
+        for summary in endpoints.values():
+            for key in ("requests", "cached", "bytesIn", "bytesOut", "throttled", "sleep"):
+                total[key] += summary[key]
+            total["latency"] += summary["latency"]["sum"]
+
+        return {"endpoints": endpoints, "total": total}
+
+    def write_json(self, path: "Path | str") -> None:
+        dump(path, self.summary(), pretty=True)
+
+    def _prometheus_lines(self) -> Iterable[str]:
+        with self._lock:
+            endpoints = {
+                name: replace(
+                    m, latencies=array("d", sorted(m.latencies)), statuses=Counter(m.statuses)
+                )
+                for name, m in sorted(self._endpoints.items())
+            }
+
+        def _labels(endpoint: str, **extra: str) -> str:
+            method, path = endpoint.split(" ", 1)
+            labels = {"method": method, "endpoint": path, **extra}
+            return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+        p = PROMETHEUS_PREFIX
+
+        yield f"# HELP {p}_requests_total Requests sent to fansly.com API."
+        yield f"# TYPE {p}_requests_total counter"
+        for endpoint, m in endpoints.items():
+            for status, count in sorted(m.statuses.items()):
+                yield f"{p}_requests_total{{{_labels(endpoint, status=str(status))}}} {count}"
+
+        yield f"# HELP {p}_cached_requests_total Requests served from a cache."
+        yield f"# TYPE {p}_cached_requests_total counter"
+        for endpoint, m in endpoints.items():
+            yield f"{p}_cached_requests_total{{{_labels(endpoint)}}} {m.cached}"
+
+        yield f"# HELP {p}_request_duration_seconds Latency of requests."
+        yield f"# TYPE {p}_request_duration_seconds histogram"
+        for endpoint, m in endpoints.items():
+            latencies = m.latencies
+            count = 0
+            for bound in LATENCY_BUCKETS:
+                while count < len(latencies) and latencies[count] <= bound:
+                    count += 1
+                labels = _labels(endpoint, le=str(bound))
+                yield f"{p}_request_duration_seconds_bucket{{{labels}}} {count}"
+
+            labels = _labels(endpoint)
+            yield f'{p}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {len(latencies)}'
+            yield f"{p}_request_duration_seconds_sum{{{labels}}} {math.fsum(latencies)}"
+            yield f"{p}_request_duration_seconds_count{{{labels}}} {len(latencies)}"
+
+        yield f"# HELP {p}_bytes_total Bytes received from and sent to fansly.com API."
+        yield f"# TYPE {p}_bytes_total counter"
+        for endpoint, m in endpoints.items():
+            yield f"{p}_bytes_total{{{_labels(endpoint, direction='in')}}} {m.bytes_in}"
+            yield f"{p}_bytes_total{{{_labels(endpoint, direction='out')}}} {m.bytes_out}"
+
+        yield f"# HELP {p}_rate_limit_sleep_seconds_total Time spent waiting for the rate limiter."
+        yield f"# TYPE {p}_rate_limit_sleep_seconds_total counter"
+        for endpoint, m in endpoints.items():
+            yield f"{p}_rate_limit_sleep_seconds_total{{{_labels(endpoint)}}} {m.sleep}"
+
+    def write_prometheus(self, path: "Path | str") -> None:
+        """Write metrics in the textfile collector format of Prometheus node exporter."""
+        path = Path(path)
+
+        # The collector may read the file at any moment, so it has to be replaced atomically.
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text("\n".join(self._prometheus_lines()) + "\n", encoding="utf-8")
+        tmp_path.replace(path)
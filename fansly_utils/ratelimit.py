@@ -0,0 +1,297 @@
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Iterator, Mapping
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from logging import Logger
+
+__all__ = ["RateLimiter", "TokenBucket", "endpoint_family"]
+
+
+DEFAULT_RATE: float = 1.0  # requests per second
+DEFAULT_BURST: float = 3.0
+MIN_RATE: float = 1 / 60
+MAX_RATE: float = 10.0
+
+RATE_DECREASE_FACTOR: float = 0.5
+RATE_INCREASE_STEP: float = 0.25
+SUCCESS_STREAK: int = 20
+
+DEFAULT_BACKOFF: float = 30.0  # seconds
+MAX_BACKOFF: float = 60.0 * 4
+
+DEFAULT_PHASE: str = "default"
+
+_ID_RE = re.compile(r"^\d+$")
+
+
+def endpoint_family(url: str) -> str:
+    """
+    Reduce a request url to its endpoint family
+
+    "/account/123/followers/remove" --> "account/followers"
+    """
+    path = urlsplit(url).path.removeprefix("/api/v1")
+    segments = [s for s in path.split("/") if s and not _ID_RE.match(s)]
+    return "/".join(segments[:2])
+
+
+def _parse_retry_after(value: str | None, now: float) -> float | None:
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(date.timestamp() - now, 0.0)
+
+
+def _parse_float(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _get_header(headers: Mapping[str, str], *names: str) -> str | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class TokenBucket:
+    """
+    A token bucket that adapts its refill rate to the server feedback
+
+    Tokens are allowed to go negative, which represents requests that have already reserved a
+    slot in the future. That way the bucket can be shared by multiple threads or coroutines.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        capacity: float = DEFAULT_BURST,
+        *,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate, rate)  # never throttle below an explicitly requested rate
+
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._streak = 0
+        self._penalties = 0
+
+    @property
+    def blocked_until(self) -> float:
+        return self._updated if self._tokens <= 0 else 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how many seconds the caller has to wait before using it."""
+        self._refill(now)
+        self._tokens -= 1
+
+        wait = max(self._updated - now, 0.0)
+        if self._tokens < 0:
+            wait += -self._tokens / self.rate
+        return wait
+
+    def block(self, now: float, delay: float) -> None:
+        """Don't hand out any tokens for the next `delay` seconds."""
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = max(self._updated, now + delay)
+
+    def on_success(self) -> None:
+        self._streak += 1
+        if self._streak >= SUCCESS_STREAK:
+            self._streak = 0
+            self._penalties = 0
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE_STEP)
+
+    def on_throttle(self, now: float, retry_after: float | None) -> float:
+        self._streak = 0
+        self._penalties += 1
+        self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+
+        if retry_after is None:
+            retry_after = min(DEFAULT_BACKOFF * 2 ** (self._penalties - 1), MAX_BACKOFF)
+
+        self.block(now, retry_after)
+        return retry_after
+
+    def on_quota(self, now: float, remaining: float, reset: float) -> None:
+        """Follow rate limit headers sent by the server."""
+        if reset <= 0:
+            return
+
+        if remaining <= 0:
+            self.block(now, reset)
+        else:
+            self.rate = min(self.max_rate, max(self.min_rate, remaining / reset))
+
+
+@dataclass
+class _PhaseStats:
+    requests: int = 0
+    throttled: int = 0
+    waits: int = 0
+    sleep: float = 0.0
+
+
+class RateLimiter:
+    """
+    A thread-safe rate limiter with a separate token bucket per endpoint family
+
+    An instance is owned by a session and thus shared by all API objects that use it.
+    """
+
+    def __init__(self, *, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST) -> None:
+        self._rate = rate
+        self._burst = burst
+
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("FanslyAPI")
+
+        # Threads and tasks making requests at once can be in different phases.
+        self._phase: ContextVar[str] = ContextVar(f"phase-{id(self)}", default=DEFAULT_PHASE)
+        self._stats: dict[str, _PhaseStats] = {}
+
+    @property
+    def logger(self) -> "Logger":
+        return self._logger
+
+    def _bucket(self, family: str) -> TokenBucket:
+        bucket = self._buckets.get(family)
+        if not bucket:
+            bucket = TokenBucket(self._rate, self._burst)
+            self._buckets[family] = bucket
+        return bucket
+
+    def _phase_stats(self) -> _PhaseStats:
+        phase = self._phase.get()
+        stats = self._stats.get(phase)
+        if not stats:
+            stats = _PhaseStats()
+            self._stats[phase] = stats
+        return stats
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Account all requests made inside of this context manager to `name` phase.
+
+        The phase is kept per thread and per task, `fan_out`, `Paginator` and `FanslyApi.run`
+        pass it on to the threads and tasks they make requests from.
+        """
+        token = self._phase.set(name)
+        try:
+            yield
+        finally:
+            self._phase.reset(token)
+
+    def reserve(self, url: str) -> float:
+        """Reserve a request slot and return how many seconds the caller has to wait for it."""
+        now = time.monotonic()
+        with self._lock:
+            wait = self._bucket(endpoint_family(url)).reserve(now)
+
+            stats = self._phase_stats()
+            stats.requests += 1
+            if wait > 0:
+                stats.waits += 1
+                stats.sleep += wait
+        return wait
+
+    def delay(self, url: str) -> float:
+        """Return how many seconds are left until the endpoint family is unblocked."""
+        with self._lock:
+            bucket = self._buckets.get(endpoint_family(url))
+            blocked_until = bucket.blocked_until if bucket else 0.0
+        return max(blocked_until - time.monotonic(), 0.0)
+
+    def estimate(self, url: str, count: int) -> float:
+        """Return how many seconds it takes to send `count` requests to `url` at current rates."""
+        with self._lock:
+            bucket = self._buckets.get(endpoint_family(url))
+            rate, burst = (bucket.rate, bucket.capacity) if bucket else (self._rate, self._burst)
+        return max(count - burst, 0.0) / rate
+
+    def acquire(self, url: str) -> float:
+        """Block the calling thread until a request to `url` is allowed."""
+        slept = 0.0
+        wait = self.reserve(url)
+        while wait > 0:
+            time.sleep(wait)
+            slept += wait
+
+            # The bucket might be blocked by a 429 response while we were sleeping.
+            wait = self.delay(url)
+            if wait > 0:
+                with self._lock:
+                    self._phase_stats().sleep += wait
+        return slept
+
+    def feedback(self, url: str, status_code: int, headers: Mapping[str, str]) -> float | None:
+        """
+        Learn from a server response
+
+        :return: a delay before a retry if the server has rejected the request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(endpoint_family(url))
+
+            remaining = _parse_float(
+                _get_header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+            )
+            reset = _parse_float(_get_header(headers, "X-RateLimit-Reset", "RateLimit-Reset"))
+            if reset is not None and reset > 1e9:  # an epoch timestamp
+                reset = max(reset - datetime.now(timezone.utc).timestamp(), 0.0)
+
+            if status_code == 429:
+                retry_after = _parse_retry_after(_get_header(headers, "Retry-After"), time.time())
+                if retry_after is None and remaining == 0 and reset:
+                    retry_after = reset
+
+                self._phase_stats().throttled += 1
+                return bucket.on_throttle(now, retry_after)
+
+            if remaining is not None and reset is not None:
+                bucket.on_quota(now, remaining, reset)
+            bucket.on_success()
+
+        return None
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                "phases": {name: asdict(stats) for name, stats in self._stats.items()},
+                "rates": {family: bucket.rate for family, bucket in self._buckets.items()},
+            }
@@ -0,0 +1,115 @@
+"""
+Typed records of API results
+
+Brief API results are built straight from parsed responses into slotted dataclasses, which are
+several times smaller than dicts and don't carry a hash table per object. Records that end up in
+backups are turned into dicts of the backup format with `to_dict()` only when they are saved.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+__all__ = ["Account", "Chat", "CollectionItem", "Message", "Note", "Payment", "UserList"]
+
+
+@dataclass(slots=True)
+class Note:
+    id: str
+    title: str
+    data: str
+    created_at: int  # unix timestamp in milliseconds
+    updated_at: int  # unix timestamp in milliseconds
+
+    @classmethod
+    def from_response(cls, obj: dict[str, Any]) -> "Note":
+        return cls(obj["id"], obj["title"], obj["note"], obj["createdAt"], obj["updatedAt"])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "data": self.data,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+
+@dataclass(slots=True)
+class Account:
+    id: str
+    username: str
+    display_name: str | None = None
+    notes: list[Note] = field(default_factory=list)
+
+    @classmethod
+    def from_response(cls, obj: dict[str, Any]) -> "Account":
+        return cls(
+            obj["id"],
+            obj["username"],
+            obj.get("displayName"),
+            [Note.from_response(note) for note in obj.get("notes", ())],
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "displayName": self.display_name,
+            "notes": [note.to_dict() for note in self.notes],
+        }
+
+
+@dataclass(slots=True)
+class Payment:
+    transaction_id: str
+    account_id: str
+    created_at: int  # unix timestamp in milliseconds
+    price: int  # price is multiplied by 1000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "accountId": self.account_id,
+            "createdAt": self.created_at,
+            "price": self.price,
+            "transactionId": self.transaction_id,
+        }
+
+
+@dataclass(slots=True)
+class Chat:
+    id: str
+    partner_account_id: str
+    partner_username: str
+
+    @classmethod
+    def from_response(cls, obj: dict[str, Any]) -> "Chat":
+        return cls(obj["groupId"], obj["partnerAccountId"], obj["partnerUsername"])
+
+
+@dataclass(slots=True)
+class Message:
+    id: str
+    sender_id: str
+
+    @classmethod
+    def from_response(cls, obj: dict[str, Any]) -> "Message":
+        return cls(obj["id"], obj["senderId"])
+
+
+@dataclass(slots=True)
+class CollectionItem:
+    id: str
+    account_id: str | None = None
+
+
+@dataclass(slots=True)
+class UserList:
+    id: str
+    label: str
+
+    @classmethod
+    def from_response(cls, obj: dict[str, Any]) -> "UserList":
+        return cls(obj["id"], obj["label"])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"id": self.id, "label": self.label}
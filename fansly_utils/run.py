@@ -6,16 +6,21 @@ from typing import TYPE_CHECKING
 from requests.exceptions import HTTPError
 from rich.logging import RichHandler
 
-from .api import FanslyApi
+from .api import BASE_URL, FanslyApi
+from .cache import DiskCache
 from .cli import get_cli_arg_parser
 from .cmd import (
     PaymentsProcessor,
     add_list_items,
     backup,
+    convert_backup,
+    diff,
     generate_html,
     get_account_info,
     process_payments,
     restore,
+    show_history,
+    take_snapshot,
     update_accounts,
     wipe,
 )
@@ -38,6 +43,27 @@ def _setup_logging(args: "Namespace") -> None:
     )
 
 
+def _log_stats(api: FanslyApi, logger: logging.Logger) -> None:
+    stats = api.stats()
+
+    cache_stats = stats["cache"]
+    logger.debug(
+        "Response cache: %s hit(s), %s miss(es), %s invalidation(s)",
+        cache_stats["hits"],
+        cache_stats["misses"],
+        cache_stats["invalidations"],
+    )
+
+    for phase, phase_stats in stats["rate_limiter"]["phases"].items():
+        logger.debug(
+            "%r phase: %s request(s), %s throttled, %.1f second(s) spent sleeping",
+            phase,
+            phase_stats["requests"],
+            phase_stats["throttled"],
+            phase_stats["sleep"],
+        )
+
+
 def main() -> None:
     try:
         args = get_cli_arg_parser().parse_args()
@@ -50,9 +76,21 @@ def main() -> None:
     config = ConfigParser()
     config.read(args.config)
 
+    disk_cache = None
+    if args.http_cache:
+        disk_cache = DiskCache(
+            args.http_cache,
+            mode=args.http_cache_mode,
+            max_age=args.http_cache_max_age,
+            max_size=args.http_cache_max_size,
+        )
+
     api = FanslyApi(
         authorization_token=config["user"]["authorization_token"],
         user_agent=config["user"]["user_agent"],
+        workers=args.jobs,
+        disk_cache=disk_cache,
+        base_url=config.get("api", "base_url", fallback=BASE_URL),
     )
     logger = logging.getLogger(__package__.replace("_", "-"))
 
@@ -61,17 +99,41 @@ def main() -> None:
             add_list_items(api, logger, args.files)
         elif args.command == "backup":
             if not args.only_update_accounts:
-                backup(api, logger, args.file, args.update)
+                backup(api, logger, args.file, args.update, args.resume)
 
             if args.update:
                 update_accounts(api, logger, args.file)
 
             if args.html:
                 generate_html(args.file)
+
+            if args.snapshot:
+                take_snapshot(logger, args.file, args.snapshot)
         elif args.command == "restore":
             restore(api, logger, args.file)
         elif args.command == "wipe":
-            wipe(api, logger, args.backup, args.silent)
+            wipe(
+                api,
+                logger,
+                args.backup,
+                args.silent,
+                args.plan_only,
+                args.resume,
+                args.notes_from,
+            )
+        elif args.command == "convert":
+            convert_backup(args.file, args.output)
+        elif args.command == "snapshot":
+            take_snapshot(logger, args.file, args.store)
+        elif args.command == "history":
+            show_history(
+                args.store,
+                snapshots=args.snapshots,
+                following_at=args.following_at,
+                names_of=args.names,
+            )
+        elif args.command == "diff":
+            diff(args.old, args.new, store_path=args.store, as_json=args.json)
         elif args.command == "html":
             generate_html(args.file)
         elif args.command == "info":
@@ -87,6 +149,17 @@ def main() -> None:
         pass  # NOTE(obsessedcake): Should be already logged on FanslyApi side.
     except Exception:
         logger.exception("")
+    finally:
+        api.close()
+        _log_stats(api, logger)
+
+        if args.metrics:
+            api.metrics.write_json(args.metrics)
+        if args.metrics_prometheus:
+            api.metrics.write_prometheus(args.metrics_prometheus)
+
+        if disk_cache:
+            disk_cache.close()
 
 
 if __name__ == "__main__":
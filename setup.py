@@ -8,6 +8,7 @@ fansly.com account data.
 """
 
 install_requires = [
+    "aiohttp>=3.8.0",
     "inflect>=7.0.0",
     "jinja2",
     "python-dateutil>=2.8.2",
@@ -16,6 +17,8 @@ install_requires = [
 ]
 
 extras_require = {
+    "fast": ["orjson>=3.6.0"],
+    "zstd": ["zstandard>=0.18.0"],
     "dev": [
         "flake8",
         "flake8-black",
@@ -34,7 +37,12 @@ setup(
     long_description=long_description,
     url="https://github.com/obsessedcake",
     packages=find_packages(),
-    entry_points={"console_scripts": ["fansly-utils=fansly_utils.run:main"]},
+    entry_points={
+        "console_scripts": [
+            "fansly-utils=fansly_utils.run:main",
+            "fansly-fake-server=fansly_utils.fakeserver:main",
+        ]
+    },
     license="GPL-3.0",
     classifiers=[
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",